@@ -0,0 +1,93 @@
+import heapq
+
+from repositorio import normalizar_placa
+
+
+def linha_agenda(veiculo, km_restantes, intervalo_km) -> dict:
+    return {
+        "placa": veiculo.placa,
+        "modelo": veiculo.modelo,
+        "tipo": veiculo.tipo,
+        "status": veiculo.status.value,
+        "quilometragem": veiculo.quilometragem,
+        "km_ultima_revisao": veiculo.km_ultima_revisao,
+        "km_proxima_revisao": veiculo.km_ultima_revisao + intervalo_km,
+        "km_restantes": km_restantes
+    }
+
+
+class AgendaManutencao:
+    """
+    Veículos em um min-heap de (km até a próxima revisão, ordem), atualizado
+    a cada viagem ou manutenção. Entradas substituídas continuam no heap e
+    são ignoradas nas consultas; o heap é refeito quando elas passam a ser maioria.
+    """
+
+    def __init__(self, veiculos=(), intervalo_km=10000, geracao=None):
+        self.intervalo_km = float(intervalo_km)
+        self.geracao = geracao
+        self._heap = []
+        self._por_placa = {}
+        self._atuais = {}  # ordem -> (km restantes, veículo)
+        self._proxima_ordem = 0
+        for v in veiculos:
+            self.atualizar(v)
+
+    def __len__(self):
+        return len(self._atuais)
+
+    def atualizar(self, veiculo):
+        """Insere ou reposiciona o veículo em O(log n)."""
+        placa = normalizar_placa(veiculo.placa)
+        ordem = self._por_placa.get(placa)
+        if ordem is None:
+            ordem = self._por_placa[placa] = self._proxima_ordem
+            self._proxima_ordem += 1
+        restantes = veiculo.km_ate_revisao(self.intervalo_km)
+        atual = self._atuais.get(ordem)
+        self._atuais[ordem] = (restantes, veiculo)
+        if atual is not None and atual[0] == restantes: return
+        heapq.heappush(self._heap, (restantes, ordem))
+        if len(self._heap) > 2 * len(self._atuais) + 32: self._compactar()
+
+    def remover(self, placa):
+        ordem = self._por_placa.pop(normalizar_placa(placa), None)
+        if ordem is not None: del self._atuais[ordem]
+
+    def _compactar(self):
+        self._heap = [(restantes, ordem) for ordem, (restantes, _) in self._atuais.items()]
+        heapq.heapify(self._heap)
+
+    def _em_ordem(self):
+        """
+        Percorre o heap do menor para o maior sem alterá-lo: uma fronteira
+        (outro heap) guarda os filhos dos nós já visitados, então os k
+        primeiros custam O(k log k).
+        """
+        heap = self._heap
+        if not heap: return
+        fronteira = [(heap[0], 0)]
+        vistos = set()
+        while fronteira:
+            (restantes, ordem), i = heapq.heappop(fronteira)
+            for filho in (2 * i + 1, 2 * i + 2):
+                if filho < len(heap): heapq.heappush(fronteira, (heap[filho], filho))
+            atual = self._atuais.get(ordem)
+            if atual is None or atual[0] != restantes or ordem in vistos: continue
+            vistos.add(ordem)
+            yield restantes, atual[1]
+
+    def proximas(self, n) -> list:
+        """Os n veículos mais próximos da revisão (vencidos primeiro)."""
+        linhas = []
+        for restantes, veiculo in self._em_ordem():
+            if len(linhas) >= n: break
+            linhas.append(linha_agenda(veiculo, restantes, self.intervalo_km))
+        return linhas
+
+    def vencidas(self) -> list:
+        linhas = []
+        for restantes, veiculo in self._em_ordem():
+            if restantes > 0: break
+            linhas.append(linha_agenda(veiculo, restantes, self.intervalo_km))
+        return linhas
@@ -0,0 +1,127 @@
+"""
+Alocação automática de viagens pendentes: escolhe, para cada viagem, um
+veículo ativo e um motorista habilitado, equilibrando a quilometragem.
+
+As viagens são distribuídas da mais longa para a mais curta, sempre para o
+veículo (do tipo pedido) com menor km projetada e para o motorista habilitado
+com menos km atribuídos no lote: a heurística LPT, que aproxima o
+emparelhamento de menor desequilíbrio em O(n log n).
+"""
+import heapq
+
+from models import Carro, Moto, Caminhao, StatusVeiculo, BITS_CNH
+
+CLASSES_VEICULO = {classe.tipo: classe for classe in (Carro, Moto, Caminhao)}
+
+
+def indice_habilitados(motoristas) -> dict:
+    """categoria_minima_cnh -> motoristas habilitados (pelas máscaras de CNH)."""
+    categorias = {classe.categoria_minima_cnh for classe in CLASSES_VEICULO.values()}
+    return {cat: [m for m in motoristas if m.capacidade_cnh & BITS_CNH[cat]] for cat in categorias}
+
+
+def _pendente(item) -> tuple:
+    """(destino, distancia, tipo, data) a partir de tupla ou dict."""
+    if isinstance(item, dict):
+        item = (item.get("destino"), item.get("distancia"), item.get("tipo"), item.get("data"))
+    if len(item) < 2: raise Exception("Informe destino e distância.")
+    destino, distancia = item[0], float(item[1])
+    if distancia <= 0: raise Exception("Distância deve ser positiva.")
+    tipo = (item[2] if len(item) > 2 else None) or None
+    if tipo and tipo not in CLASSES_VEICULO:
+        raise Exception(f"Tipo inválido: {tipo}. Use Carro, Moto ou Caminhão.")
+    return destino, distancia, tipo, item[3] if len(item) > 3 else None
+
+
+class _Motoristas:
+    """Um heap (km no lote, ordem, motorista) por categoria mínima; entradas velhas são descartadas ao sair."""
+
+    def __init__(self, motoristas):
+        motoristas = list(motoristas)
+        # Posição no cadastro desempata cargas iguais: mesma entrada, mesma alocação.
+        posicao = {id(m): i for i, m in enumerate(motoristas)}
+        self.carga = [0.0] * len(motoristas)
+        self.categorias = [[] for _ in motoristas]
+        self.heaps = {}
+        for categoria, habilitados in indice_habilitados(motoristas).items():
+            heap = [(0.0, posicao[id(m)], m) for m in habilitados]
+            for _, i, _ in heap:
+                self.categorias[i].append(categoria)
+            self.heaps[categoria] = heap  # já em ordem: um heap válido
+
+    def topo(self, categoria):
+        heap = self.heaps[categoria]
+        while heap and heap[0][0] != self.carga[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def atribuir(self, categoria, distancia):
+        carga, chave, motorista = self.topo(categoria)
+        self.carga[chave] = carga + distancia
+        # O motorista volta (com a nova carga) a todos os heaps em que aparece.
+        for outra in self.categorias[chave]:
+            heapq.heappush(self.heaps[outra], (carga + distancia, chave, motorista))
+        return motorista
+
+
+def alocar_viagens(pendentes, veiculos, motoristas) -> list:
+    """
+    Aloca viagens pendentes (destino, distancia[, tipo[, data]]) — tuplas ou dicts.
+    Sem tipo, a viagem vai para o veículo de menor km entre os tipos que têm
+    motorista habilitado. Um veículo ou motorista pode receber várias viagens.
+    Devolve, na ordem recebida, {"indice", "destino", "distancia", "tipo", "data",
+    "placa", "cpf", "km_projetada", "erro"}.
+    """
+    heaps_veiculos = {tipo: [] for tipo in CLASSES_VEICULO}
+    for i, v in enumerate(veiculos):
+        if v.status == StatusVeiculo.ATIVO and v.tipo in heaps_veiculos:
+            heaps_veiculos[v.tipo].append((v.quilometragem, i, v))
+    for heap in heaps_veiculos.values():
+        heapq.heapify(heap)
+    fila_motoristas = _Motoristas(motoristas)
+
+    alocacoes = []
+    ordem = []
+    for indice, item in enumerate(pendentes):
+        alocacao = {"indice": indice, "destino": None, "distancia": None, "tipo": None, "data": None,
+                    "placa": None, "cpf": None, "km_projetada": None, "erro": None}
+        try:
+            alocacao["destino"], alocacao["distancia"], alocacao["tipo"], alocacao["data"] = _pendente(item)
+            ordem.append(alocacao)
+        except Exception as e:
+            alocacao["erro"] = str(e)
+        alocacoes.append(alocacao)
+
+    # Mais longas primeiro (LPT); empates mantêm a ordem recebida.
+    ordem.sort(key=lambda a: -a["distancia"])
+    for alocacao in ordem:
+        tipos = [alocacao["tipo"]] if alocacao["tipo"] else list(CLASSES_VEICULO)
+        candidatos = [
+            tipo for tipo in tipos
+            if heaps_veiculos[tipo] and fila_motoristas.topo(CLASSES_VEICULO[tipo].categoria_minima_cnh)
+        ]
+        if not candidatos:
+            alocacao["erro"] = (f"Sem {alocacao['tipo']} ativo com motorista habilitado." if alocacao["tipo"]
+                                else "Sem veículo ativo com motorista habilitado.")
+            continue
+
+        tipo = min(candidatos, key=lambda t: heaps_veiculos[t][0][:2])
+        km, chave, veiculo = heapq.heappop(heaps_veiculos[tipo])
+        heapq.heappush(heaps_veiculos[tipo], (km + alocacao["distancia"], chave, veiculo))
+        motorista = fila_motoristas.atribuir(CLASSES_VEICULO[tipo].categoria_minima_cnh, alocacao["distancia"])
+
+        alocacao.update({"tipo": tipo, "placa": veiculo.placa, "cpf": motorista.cpf,
+                         "km_projetada": km + alocacao["distancia"]})
+    return alocacoes
+
+
+def desequilibrio_km(veiculos, alocacoes) -> dict:
+    """Por tipo, diferença entre a maior e a menor km projetada dos veículos ativos."""
+    km = {v.placa: v.quilometragem for v in veiculos if v.status == StatusVeiculo.ATIVO}
+    tipos = {v.placa: v.tipo for v in veiculos}
+    for a in alocacoes:
+        if not a["erro"]: km[a["placa"]] += a["distancia"]
+    por_tipo = {}
+    for placa, total in km.items():
+        por_tipo.setdefault(tipos[placa], []).append(total)
+    return {tipo: max(valores) - min(valores) for tipo, valores in por_tipo.items()}
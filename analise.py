@@ -0,0 +1,148 @@
+from array import array
+from itertools import repeat
+
+import numpy as np
+
+TIPOS_VEICULO = ("Carro", "Moto", "Caminhão")
+PERCENTIS_KM_L = (10, 25, 50, 75, 90)
+
+
+def _codigo_tipo(tipo: str) -> int:
+    return TIPOS_VEICULO.index(tipo) if tipo in TIPOS_VEICULO else 0
+
+
+class TabelaFrota:
+    """
+    A frota em colunas NumPy: uma linha por veículo e uma linha por registro
+    de histórico (ligada ao veículo por `veiculo`), para métricas vetorizadas.
+    """
+
+    def __init__(self, veiculos):
+        veiculos = list(veiculos)
+        n = len(veiculos)
+        self.placas = [v.placa for v in veiculos]
+        self.modelos = [v.modelo for v in veiculos]
+        self.tipo = np.fromiter((_codigo_tipo(v.tipo) for v in veiculos), dtype=np.int8, count=n)
+        self.quilometragem = np.fromiter((v.quilometragem for v in veiculos), dtype=np.float64, count=n)
+        self.km_entrada = np.fromiter((v.km_entrada for v in veiculos), dtype=np.float64, count=n)
+
+        # Acumula a frota inteira em buffers array() e converte uma única vez:
+        # muitos np.array pequenos (um por veículo) custariam mais que o laço.
+        m_veiculo, m_data, m_custo_base, m_custo_final = array('q'), array('l'), array('d'), array('d')
+        m_corretiva = bytearray()
+        a_veiculo, a_data, a_litros, a_valor = array('q'), array('l'), array('d'), array('d')
+        for i, v in enumerate(veiculos):
+            manutencoes = v.manutencoes_colunares()
+            m_veiculo.extend(repeat(i, len(manutencoes)))
+            m_data.extend(manutencoes.ordinais)
+            m_custo_base.extend(manutencoes.custos_base)
+            m_custo_final.extend(manutencoes.custos_finais)
+            m_corretiva.extend(t.lower() == "corretiva" for t in manutencoes.tipos)
+
+            abastecimentos = v.abastecimentos_colunares()
+            a_veiculo.extend(repeat(i, len(abastecimentos)))
+            a_data.extend(abastecimentos.ordinais)
+            a_litros.extend(abastecimentos.litros)
+            a_valor.extend(abastecimentos.valores)
+
+        self.manutencao_veiculo = np.frombuffer(m_veiculo, dtype=np.int64)
+        self.manutencao_data = np.frombuffer(m_data, dtype=np.dtype('l'))
+        self.manutencao_custo_base = np.frombuffer(m_custo_base, dtype=np.float64)
+        self.manutencao_custo = np.frombuffer(m_custo_final, dtype=np.float64)
+        self.manutencao_corretiva = np.frombuffer(m_corretiva, dtype=np.bool_)
+
+        self.abastecimento_veiculo = np.frombuffer(a_veiculo, dtype=np.int64)
+        self.abastecimento_data = np.frombuffer(a_data, dtype=np.dtype('l'))
+        self.abastecimento_litros = np.frombuffer(a_litros, dtype=np.float64)
+        self.abastecimento_valor = np.frombuffer(a_valor, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.placas)
+
+    # --- Somas por veículo (bincount soma na ordem dos registros, como o sum() original) ---
+
+    def custo_manutencao_por_veiculo(self) -> np.ndarray:
+        return np.bincount(self.manutencao_veiculo, weights=self.manutencao_custo, minlength=len(self))
+
+    def qtd_manutencoes_por_veiculo(self) -> np.ndarray:
+        return np.bincount(self.manutencao_veiculo, minlength=len(self))
+
+    def litros_por_veiculo(self) -> np.ndarray:
+        return np.bincount(self.abastecimento_veiculo, weights=self.abastecimento_litros, minlength=len(self))
+
+    def gasto_combustivel_por_veiculo(self) -> np.ndarray:
+        return np.bincount(self.abastecimento_veiculo, weights=self.abastecimento_valor, minlength=len(self))
+
+    def km_percorridos(self) -> np.ndarray:
+        return self.quilometragem - self.km_entrada
+
+    def km_l_por_veiculo(self) -> np.ndarray:
+        litros = self.litros_por_veiculo()
+        km = self.km_percorridos()
+        validos = (litros > 0) & (km > 0)
+        km_l = np.zeros(len(self))
+        np.divide(km, litros, out=km_l, where=validos)
+        return km_l
+
+    # --- Métricas da frota ---
+
+    def custo_por_tipo(self) -> dict:
+        tipo_por_registro = self.tipo[self.manutencao_veiculo]
+        manutencao = np.bincount(tipo_por_registro, weights=self.manutencao_custo, minlength=len(TIPOS_VEICULO))
+        tipo_por_registro = self.tipo[self.abastecimento_veiculo]
+        combustivel = np.bincount(tipo_por_registro, weights=self.abastecimento_valor, minlength=len(TIPOS_VEICULO))
+        return {
+            tipo: {"manutencao": float(manutencao[i]), "combustivel": float(combustivel[i])}
+            for i, tipo in enumerate(TIPOS_VEICULO)
+        }
+
+    def preco_medio_litro(self) -> float:
+        litros = self.abastecimento_litros.sum()
+        return float(self.abastecimento_valor.sum() / litros) if litros > 0 else 0.0
+
+    def percentis_km_l(self, percentis=PERCENTIS_KM_L) -> dict:
+        km_l = self.km_l_por_veiculo()
+        km_l = km_l[km_l > 0]
+        if not len(km_l): return {p: 0.0 for p in percentis}
+        return dict(zip(percentis, (float(x) for x in np.percentile(km_l, percentis))))
+
+    def custo_por_km(self) -> float:
+        """(Manutenção + combustível) / km percorridos de toda a frota."""
+        km = self.km_percorridos().clip(min=0).sum()
+        if km <= 0: return 0.0
+        return float((self.manutencao_custo.sum() + self.abastecimento_valor.sum()) / km)
+
+    def resumo(self) -> dict:
+        return {
+            "veiculos": len(self),
+            "manutencoes": int(len(self.manutencao_custo)),
+            "abastecimentos": int(len(self.abastecimento_litros)),
+            "custo_por_tipo": self.custo_por_tipo(),
+            "preco_medio_litro": self.preco_medio_litro(),
+            "percentis_km_l": self.percentis_km_l(),
+            "custo_por_km": self.custo_por_km(),
+        }
+
+    # --- Reprodução dos relatórios do controller ---
+
+    def relatorio_custos(self) -> list:
+        totais = self.custo_manutencao_por_veiculo()
+        quantidades = self.qtd_manutencoes_por_veiculo()
+        return [{
+            "placa": self.placas[i],
+            "modelo": self.modelos[i],
+            "total_manutencao": float(totais[i]),
+            "qtd_manutencoes": int(quantidades[i])
+        } for i in range(len(self))]
+
+    def relatorio_eficiencia(self) -> list:
+        litros = self.litros_por_veiculo()
+        km_l = self.km_l_por_veiculo()
+        # argsort estável em -km_l mantém a ordem de cadastro nos empates, como o sort original.
+        ordem = np.argsort(-km_l, kind="stable")
+        return [{
+            "placa": self.placas[i],
+            "modelo": self.modelos[i],
+            "litros": float(litros[i]),
+            "km_l": float(km_l[i])
+        } for i in ordem]
@@ -0,0 +1,197 @@
+import heapq
+import json
+import math
+import os
+
+from repositorio import normalizar_placa
+from trava import gravar_atomico
+
+# Desvio mínimo, relativo à média: com um histórico quase constante (mesmo preço, mesmos
+# litros), uma variação pequena não vira anomalia só porque o desvio amostral é ~0.
+DESVIO_MINIMO = 0.05
+
+MOTIVOS = {
+    "litros": "Litros fora do padrão do veículo",
+    "preco_litro": "Preço por litro fora do padrão do combustível",
+    "queda_km_l": "Queda de km/l desde o abastecimento anterior",
+}
+
+
+class Welford:
+    """Média e desvio padrão acumulados em uma passada (algoritmo de Welford), com memória O(1)."""
+    __slots__ = ("n", "media", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+
+    def atualizar(self, x):
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+
+    @property
+    def desvio(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def z(self, x) -> float:
+        return (x - self.media) / max(self.desvio, DESVIO_MINIMO * abs(self.media), 1e-9)
+
+
+class EWMA:
+    """Média móvel exponencial: o valor novo pesa `alfa`, o histórico 1 - alfa."""
+    __slots__ = ("alfa", "n", "valor")
+
+    def __init__(self, alfa):
+        self.alfa = alfa
+        self.n = 0
+        self.valor = 0.0
+
+    def atualizar(self, x):
+        self.valor = x if self.n == 0 else self.alfa * x + (1 - self.alfa) * self.valor
+        self.n += 1
+
+
+class _EstadoVeiculo:
+    __slots__ = ("litros", "km_l", "ultimo_dia")
+
+    def __init__(self, alfa):
+        self.litros = Welford()
+        self.km_l = EWMA(alfa)
+        self.ultimo_dia = None
+
+
+def _fluxo(k, veiculo):
+    for i, a in enumerate(veiculo.historico_abastecimentos):
+        yield a.ordinal, k, i, veiculo, a
+
+
+class DetectorAnomalias:
+    """
+    Sinaliza abastecimentos atípicos em tempo constante, com estatísticas
+    acumuladas por veículo (litros: Welford; km/l: EWMA) e por combustível
+    (preço por litro: Welford). Regras (ver MOTIVOS):
+    - litros ou preço por litro a mais de `limiar_z` desvios da média;
+    - km/l desde o abastecimento anterior abaixo de `queda_km_l` x a EWMA do veículo.
+    Cada regra só vale depois de `minimo_amostras` valores, e um valor
+    sinalizado não entra na estatística que o sinalizou.
+
+    O km/l usa os km das viagens datadas entre o abastecimento anterior
+    (exclusive) e o atual (inclusive), com o tanque completado a cada vez.
+    """
+
+    def __init__(self, limiar_z=3.0, minimo_amostras=5, alfa_ewma=0.3, queda_km_l=0.6):
+        self.parametros = {"limiar_z": float(limiar_z), "minimo_amostras": int(minimo_amostras),
+                           "alfa_ewma": float(alfa_ewma), "queda_km_l": float(queda_km_l)}
+        self.limiar_z = float(limiar_z)
+        self.minimo_amostras = int(minimo_amostras)
+        self.alfa_ewma = float(alfa_ewma)
+        self.queda_km_l = float(queda_km_l)
+        self.avaliados = 0
+        self.geracao = None  # marcado pelo backend que guarda o detector
+        self._veiculos = {}
+        self._combustiveis = {}
+
+    def _alerta(self, veiculo, abastecimento, regra, observado, esperado) -> dict:
+        return {
+            "placa": veiculo.placa,
+            "data": abastecimento.data,
+            "combustivel": abastecimento.combustivel,
+            "litros": abastecimento.litros,
+            "valor": abastecimento.valor,
+            "regra": regra,
+            "motivo": MOTIVOS[regra],
+            "observado": round(observado, 4),
+            "esperado": round(esperado, 4),
+        }
+
+    def _fora_do_padrao(self, estatistica, x) -> bool:
+        return estatistica.n >= self.minimo_amostras and abs(estatistica.z(x)) > self.limiar_z
+
+    def avaliar(self, veiculo, abastecimento) -> list:
+        """Alertas do abastecimento e atualização das estatísticas (chamar só depois de registrá-lo)."""
+        self.avaliados += 1
+        estado = self._veiculos.get(normalizar_placa(veiculo.placa))
+        if estado is None: estado = self._veiculos[normalizar_placa(veiculo.placa)] = _EstadoVeiculo(self.alfa_ewma)
+        combustivel = self._combustiveis.get(abastecimento.combustivel.strip().lower())
+        if combustivel is None: combustivel = self._combustiveis[abastecimento.combustivel.strip().lower()] = Welford()
+        alertas = []
+
+        litros = abastecimento.litros
+        if self._fora_do_padrao(estado.litros, litros):
+            alertas.append(self._alerta(veiculo, abastecimento, "litros", litros, estado.litros.media))
+        elif litros > 0:
+            estado.litros.atualizar(litros)
+
+        if litros > 0:
+            preco = abastecimento.valor / litros
+            if self._fora_do_padrao(combustivel, preco):
+                alertas.append(self._alerta(veiculo, abastecimento, "preco_litro", preco, combustivel.media))
+            else:
+                combustivel.atualizar(preco)
+
+        dia = abastecimento.ordinal
+        if estado.ultimo_dia is not None and 0 < estado.ultimo_dia < dia and litros > 0:
+            km = veiculo.km_entre(estado.ultimo_dia + 1, dia)
+            if km > 0:
+                km_l = km / litros
+                if estado.km_l.n >= self.minimo_amostras and km_l < self.queda_km_l * estado.km_l.valor:
+                    alertas.append(self._alerta(veiculo, abastecimento, "queda_km_l", km_l, estado.km_l.valor))
+                else:
+                    estado.km_l.atualizar(km_l)
+        if dia and (estado.ultimo_dia is None or dia > estado.ultimo_dia): estado.ultimo_dia = dia
+        return alertas
+
+    def varrer(self, veiculos):
+        """
+        Uma passada por todos os abastecimentos já registrados, em ordem de data
+        (intercalando os históricos, já ordenados, de cada veículo). Gera os alertas.
+        """
+        fluxos = [_fluxo(k, v) for k, v in enumerate(veiculos)]
+        for _, _, _, veiculo, abastecimento in heapq.merge(*fluxos, key=lambda item: item[:3]):
+            yield from self.avaliar(veiculo, abastecimento)
+
+    def aquecer(self, veiculos):
+        """Estatísticas do histórico, sem alertas (estado inicial para os próximos registros)."""
+        for _ in self.varrer(veiculos): pass
+        return self
+
+
+class DiarioAlertas:
+    """
+    Alertas gravados em JSONL (um por linha, somente anexação). Sem índice de
+    offsets: são poucos, e a listagem lê o arquivo inteiro.
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+
+    def _linha(self, alerta) -> bytes:
+        return (json.dumps(alerta, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _linhas(self) -> list:
+        try:
+            with open(self.arquivo, "rb") as f:
+                return [linha for linha in f if linha.endswith(b"\n")]  # descarta uma linha final incompleta
+        except FileNotFoundError:
+            return []
+
+    def __len__(self):
+        return len(self._linhas())
+
+    def anexar_varias(self, alertas):
+        pasta = os.path.dirname(self.arquivo)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        with open(self.arquivo, "ab") as f:
+            f.write(b"".join(self._linha(a) for a in alertas))
+
+    def ultimas(self, n) -> list:
+        """Os `n` alertas mais recentes, do mais antigo para o mais novo."""
+        return [json.loads(linha) for linha in self._linhas()[-n:]] if n > 0 else []
+
+    def reescrever(self, alertas):
+        pasta = os.path.dirname(self.arquivo)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        gravar_atomico(self.arquivo, b"".join(self._linha(a) for a in alertas))
@@ -0,0 +1,1240 @@
+import math
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from heapq import merge, nlargest
+from itertools import groupby, repeat
+
+from models import Veiculo, Motorista, ordinal, ordinal_da_data, data_do_ordinal, estrategia_para, observar_alteracoes
+from repositorio import RepositorioJSON, normalizar_placa, normalizar_cpf
+from snapshot import RepositorioSnapshot, arquivo_snapshot
+from particoes import RepositorioParticionado, linhas_custos, mapear_particao
+from cache_veiculos import RepositorioCache
+from diario import DiarioViagens
+from indice_viagens import IndiceViagens, CAMPOS as CAMPOS_VIAGEM
+from ranking import RankingEficiencia
+from agenda_manutencao import AgendaManutencao
+from listagem import IndiceListagem, paginar
+from anomalias import DetectorAnomalias
+from trava import obter_trava
+import instrumentacao
+
+
+class Armazenamento(ABC):
+    """
+    Interface de persistência usada pelo controller.
+    As mutações são aplicadas primeiro nos objetos de domínio e depois
+    comunicadas aqui, para que cada backend grave apenas o necessário.
+    """
+
+    @abstractmethod
+    def transacao(self):
+        """Context manager: tudo dentro dele é gravado junto (ou descartado em caso de erro)."""
+
+    @abstractmethod
+    def ponto_de_salvamento(self):
+        """Context manager dentro de uma transação: em caso de erro, desfaz só o que foi feito nele."""
+
+    @abstractmethod
+    def listar_veiculos(self) -> list: ...
+
+    @abstractmethod
+    def buscar_veiculo(self, placa): ...
+
+    @abstractmethod
+    def listar_motoristas(self) -> list: ...
+
+    @abstractmethod
+    def buscar_motorista(self, cpf): ...
+
+    @abstractmethod
+    def adicionar_veiculo(self, veiculo): ...
+
+    @abstractmethod
+    def atualizar_veiculo(self, veiculo): ...
+
+    @abstractmethod
+    def adicionar_motorista(self, motorista): ...
+
+    @abstractmethod
+    def atualizar_motorista(self, motorista): ...
+
+    @abstractmethod
+    def registrar_manutencao(self, veiculo, manutencao): ...
+
+    @abstractmethod
+    def registrar_abastecimento(self, veiculo, abastecimento): ...
+
+    @abstractmethod
+    def registrar_viagem(self, veiculo, dados_viagem: dict): ...
+
+    @abstractmethod
+    def salvar_veiculos(self, veiculos): ...
+
+    @abstractmethod
+    def salvar_motoristas(self, motoristas): ...
+
+    @abstractmethod
+    def ler_viagens(self, inicio=0, quantidade=None) -> list: ...
+
+    @abstractmethod
+    def total_viagens(self) -> int: ...
+
+    @abstractmethod
+    def reescrever_viagens(self, lista_dicts): ...
+
+    def valido(self) -> bool:
+        return True
+
+    def configurar_persistencia(self, durabilidade="por_operacao", intervalo_ms=200, max_operacoes=500):
+        """Ver DURABILIDADES."""
+
+    def descarregar(self):
+        """Grava o que estiver pendente (write-behind)."""
+
+    def ultimas_viagens(self, n) -> list:
+        return self.ler_viagens(max(0, self.total_viagens() - n), n)
+
+    def relatorio_custos(self) -> list:
+        return linhas_custos(self.listar_veiculos())
+
+    def relatorio_eficiencia(self) -> list:
+        """Usa (KM Atual - KM Entrada) / Litros Totais e ordena do mais eficiente ao menos."""
+        return RankingEficiencia(self.listar_veiculos()).relatorio()
+
+    def agenda_manutencao(self, intervalo_km) -> AgendaManutencao:
+        return AgendaManutencao(self.listar_veiculos(), intervalo_km)
+
+    def proximas_revisoes(self, n, intervalo_km) -> list:
+        return self.agenda_manutencao(intervalo_km).proximas(n)
+
+    def revisoes_vencidas(self, intervalo_km) -> list:
+        return self.agenda_manutencao(intervalo_km).vencidas()
+
+    def indice_listagem(self) -> IndiceListagem:
+        return IndiceListagem(self.listar_veiculos())
+
+    def linhas_frota(self, status=None, tipo=None, ordem_por="placa", decrescente=False):
+        """Gera só os campos de cabeçalho dos veículos, filtrados e ordenados (ver listagem.ORDENACOES)."""
+        return self.indice_listagem().linhas(status, tipo, ordem_por, decrescente)
+
+    def pagina_frota(self, status=None, tipo=None, ordem_por="placa", decrescente=False, pagina=1, por_pagina=50) -> dict:
+        return self.indice_listagem().pagina(status, tipo, ordem_por, decrescente, pagina, por_pagina)
+
+    def detector_anomalias(self, **parametros) -> DetectorAnomalias:
+        """Detector com as estatísticas de todos os abastecimentos já registrados (ver anomalias)."""
+        return DetectorAnomalias(**parametros).aquecer(self.listar_veiculos())
+
+    def _veiculos_do_periodo(self, placa):
+        if placa is None: return self.listar_veiculos()
+        veiculo = self.buscar_veiculo(placa)
+        return [veiculo] if veiculo else []
+
+    def totais_periodo(self, inicio, fim, placa=None) -> dict:
+        """Somas do período para um veículo ou a frota toda (bisect nos históricos ordenados por data)."""
+        totais = {"total_manutencao": 0.0, "qtd_manutencoes": 0, "litros": 0.0, "total_combustivel": 0.0, "km": 0.0}
+        for v in self._veiculos_do_periodo(placa):
+            totais["total_manutencao"] += v.custo_manutencao_entre(inicio, fim)
+            totais["qtd_manutencoes"] += v.qtd_manutencoes_entre(inicio, fim)
+            totais["litros"] += v.litros_entre(inicio, fim)
+            totais["total_combustivel"] += v.gasto_combustivel_entre(inicio, fim)
+            totais["km"] += v.km_entre(inicio, fim)
+        return totais
+
+    def relatorio_custos_periodo(self, inicio, fim) -> list:
+        return [{
+            "placa": v.placa,
+            "modelo": v.modelo,
+            "total_manutencao": v.custo_manutencao_entre(inicio, fim),
+            "qtd_manutencoes": v.qtd_manutencoes_entre(inicio, fim)
+        } for v in self.listar_veiculos()]
+
+    def relatorio_eficiencia_periodo(self, inicio, fim) -> list:
+        """Km das viagens do período / litros abastecidos no período, do mais eficiente ao menos."""
+        relatorio = []
+        for v in self.listar_veiculos():
+            litros = v.litros_entre(inicio, fim)
+            km = v.km_entre(inicio, fim)
+            relatorio.append({
+                "placa": v.placa,
+                "modelo": v.modelo,
+                "litros": litros,
+                "km": km,
+                "km_l": km / litros if litros > 0 and km > 0 else 0.0
+            })
+        relatorio.sort(key=lambda d: d["km_l"], reverse=True)
+        return relatorio
+
+    # Viagens por motorista/veículo. campo: "cpf_motorista" ou "placa_veiculo"; inicio/fim
+    # aceitam o mesmo que models.ordinal (None = sem limite). O padrão percorre o diário inteiro.
+
+    def viagens_por(self, campo, chave, inicio=None, fim=None) -> list:
+        normalizar = CAMPOS_VIAGEM[campo]
+        inicio, fim = _limites(inicio, fim)
+        return [d for d in self.ler_viagens() if normalizar(str(d.get(campo) or "")) == normalizar(chave)
+                and inicio <= ordinal_da_data(d.get("data") or "") <= fim]
+
+    def totais_viagens(self, campo, chave, inicio=None, fim=None) -> dict:
+        viagens = self.viagens_por(campo, chave, inicio, fim)
+        return {"viagens": len(viagens), "distancia": sum(float(d.get("distancia") or 0) for d in viagens)}
+
+    def utilizacao_motoristas(self, inicio=None, fim=None) -> list:
+        """Por CPF com viagem no período: viagens, km, dias com viagem e data da última viagem."""
+        inicio, fim = _limites(inicio, fim)
+        por_cpf = {}
+        for d in self.ler_viagens():
+            dia = ordinal_da_data(d.get("data") or "")
+            if not inicio <= dia <= fim: continue
+            linha = por_cpf.setdefault(normalizar_cpf(str(d.get("cpf_motorista") or "")), [0, 0.0, set()])
+            linha[0] += 1
+            linha[1] += float(d.get("distancia") or 0)
+            linha[2].add(dia)
+        return [{"cpf": cpf, "viagens": n, "distancia": km, "dias_ativos": len(dias),
+                 "ultima_viagem": data_do_ordinal(max(dias))} for cpf, (n, km, dias) in por_cpf.items()]
+
+    def verificar_agregados(self, corrigir=False) -> list:
+        """Recalcula os agregados do histórico bruto e devolve as divergências encontradas."""
+        with self.transacao():
+            divergencias = []
+            for v in self.listar_veiculos():
+                erros = v.divergencias_agregados()
+                if erros and corrigir:
+                    v.definir_agregados(v.calcular_agregados())
+                    self.atualizar_veiculo(v)
+                divergencias.extend(erros)
+        return divergencias
+
+    def recalcular_custos_manutencao(self, aplicar=False) -> dict:
+        """
+        Reprecifica todo o histórico de manutenções pelas regras de custo atuais, uma
+        passada pela frota (veículo a veículo, sobre o histórico colunar). Sem `aplicar`,
+        só devolve o impacto (simulação); com ele, grava os custos alterados.
+        """
+        impacto = _ImpactoCustos()
+        with self.transacao():
+            for v in self.listar_veiculos():
+                historico, custos = v.custos_manutencao_recalculados()
+                if impacto.somar(v.placa, historico.tipos, historico.custos_finais, custos) and aplicar:
+                    v.aplicar_custos_manutencao(historico, custos)
+                    self.atualizar_veiculo(v)
+        return impacto.relatorio(aplicar)
+
+
+class _ImpactoCustos:
+    """Diferença entre os custos gravados e os recalculados: no total, por tipo de manutenção e por veículo."""
+
+    def __init__(self):
+        self.manutencoes = 0
+        self.alteradas = 0
+        self.custo_atual = 0.0
+        self.custo_recalculado = 0.0
+        self.por_tipo = {}
+        self.veiculos = []
+
+    def somar(self, placa, tipos, atuais, novos) -> bool:
+        """Soma o histórico de um veículo; True se algum custo muda."""
+        alteradas = 0
+        for tipo, atual, novo in zip(tipos, atuais, novos):
+            if math.isclose(atual, novo, rel_tol=1e-9, abs_tol=1e-6): continue
+            alteradas += 1
+            linha = self.por_tipo.setdefault(tipo.lower(), {"alteradas": 0, "diferenca": 0.0})
+            linha["alteradas"] += 1
+            linha["diferenca"] += novo - atual
+        atual, novo = sum(atuais), sum(novos)
+        self.manutencoes += len(novos)
+        self.custo_atual += atual
+        self.custo_recalculado += novo
+        if alteradas:
+            self.alteradas += alteradas
+            self.veiculos.append({"placa": placa, "alteradas": alteradas, "custo_atual": atual,
+                                  "custo_recalculado": novo, "diferenca": novo - atual})
+        return bool(alteradas)
+
+    def relatorio(self, aplicado, n=20) -> dict:
+        return {
+            "aplicado": bool(aplicado),
+            "manutencoes": self.manutencoes,
+            "alteradas": self.alteradas,
+            "custo_atual": self.custo_atual,
+            "custo_recalculado": self.custo_recalculado,
+            "diferenca": self.custo_recalculado - self.custo_atual,
+            "por_tipo_manutencao": self.por_tipo,
+            "veiculos": nlargest(n, self.veiculos, key=lambda d: abs(d["diferenca"])),
+        }
+
+
+def _limites(inicio, fim):
+    return (0 if inicio is None else ordinal(inicio)), (sys.maxsize if fim is None else ordinal(fim))
+
+
+# "por_operacao": cada transação confirmada é gravada e sincronizada (fsync) na hora.
+# "grupo": write-behind; as transações se acumulam em memória e são gravadas juntas a cada
+#          intervalo_ms ou max_operacoes, com um fsync por grupo.
+# "nenhum": write-behind sem fsync (o sistema operacional decide quando ir ao disco).
+DURABILIDADES = ("por_operacao", "grupo", "nenhum")
+
+
+class _PontoSalvamento:
+    """
+    O necessário para desfazer o trecho de uma transação JSON sem reler o disco,
+    sem copiar históricos: dos veículos alterados no trecho (avisados pelo próprio
+    veículo, ver models.observar_alteracoes) e dos motoristas buscados, uma cópia
+    rasa dos atributos e a posição no registro de desfazer dos históricos; os
+    adicionados, as listas substituídas e as viagens pendentes.
+    """
+    __slots__ = ("viagens", "anteriores", "novos", "substituidos")
+
+    def __init__(self, viagens):
+        self.viagens = viagens
+        self.anteriores = {}  # id(item) -> (repositório, item, atributos, posição no registro de desfazer)
+        self.novos = []  # (repositório, item)
+        self.substituidos = {}  # repositório -> itens de antes
+
+
+class ArmazenamentoJSON(Armazenamento):
+    """
+    Arquivos JSON com mapa de identidade em memória e diário JSONL de viagens.
+    Transações seguram uma trava de arquivo (frota.lock) durante todo o ciclo
+    carregar-alterar-gravar, e cada gravação é atômica (temporário + rename).
+
+    Em write-behind, o que foi confirmado e ainda não gravado fica em memória:
+    use um único processo gravando os arquivos e chame `descarregar` ao sair.
+    Uma transação desfeita com um grupo pendente não relê o disco (perderia o
+    grupo): os veículos e motoristas que ela buscou voltam ao estado anterior
+    (ver _PontoSalvamento) e as viagens dela são descartadas.
+    """
+
+    def __init__(self, arquivo_veiculos, arquivo_motoristas, arquivo_viagens,
+                 durabilidade="por_operacao", intervalo_ms=200, max_operacoes=500, formato="json"):
+        self.trava = obter_trava(os.path.join(os.path.dirname(arquivo_veiculos), "frota.lock"))
+        self.formato = formato
+        if formato == "binario":
+            # Snapshots ao lado dos JSON (veiculos.snap...); os JSON existentes são importados uma vez.
+            self.veiculos = RepositorioSnapshot(arquivo_snapshot(arquivo_veiculos), "veiculos")
+            self.motoristas = RepositorioSnapshot(arquivo_snapshot(arquivo_motoristas), "motoristas")
+            with self.trava:
+                self.veiculos.migrar_de(arquivo_veiculos)
+                self.motoristas.migrar_de(arquivo_motoristas)
+        elif formato == "json":
+            self.veiculos = RepositorioJSON(arquivo_veiculos, Veiculo.from_dict, lambda v: normalizar_placa(v.placa))
+            self.motoristas = RepositorioJSON(arquivo_motoristas, Motorista.from_dict, lambda m: normalizar_cpf(m.cpf))
+        else:
+            raise ValueError(f"Formato inválido: {formato}. Use json ou binario.")
+        self.arquivo_viagens = arquivo_viagens
+        self.diario = DiarioViagens(os.path.splitext(arquivo_viagens)[0] + ".jsonl", self.trava)
+        self.indice_viagens = IndiceViagens(self.diario)
+        self._profundidade = 0
+        self._sujos = set()
+        self._viagens_pendentes = []
+        self._ranking = None
+        self._agenda = None
+        self._listagem = None
+        self._detector = None
+        self._operacoes_no_grupo = 0
+        self._marcacoes = 0
+        self._inicio_transacao = 0
+        self._pontos = []  # _PontoSalvamento abertos, do mais externo ao mais interno
+        self._desfazer = {}  # id(veículo) -> funções que desfazem as alterações nos históricos, em ordem
+        self._temporizador = None
+        self.erro_gravacao = None
+        self.configurar_persistencia(durabilidade, intervalo_ms, max_operacoes)
+
+    def configurar_persistencia(self, durabilidade="por_operacao", intervalo_ms=200, max_operacoes=500):
+        if durabilidade not in DURABILIDADES:
+            raise ValueError(f"Durabilidade inválida: {durabilidade}. Use {', '.join(DURABILIDADES)}.")
+        if durabilidade == "por_operacao" and getattr(self, "durabilidade", None) not in (None, "por_operacao"):
+            self.descarregar()
+        self.durabilidade = durabilidade
+        self.intervalo_ms = float(intervalo_ms)
+        self.max_operacoes = int(max_operacoes)
+
+    @contextmanager
+    def transacao(self):
+        with self.trava:
+            self._profundidade += 1
+            if self._profundidade == 1:
+                self._inicio_transacao = self._marcacoes
+                if self._operacoes_no_grupo: self._abrir_ponto()
+            try:
+                yield self
+                if self._profundidade == 1: self._confirmar()
+            except BaseException:
+                if self._profundidade == 1: self._descartar()
+                raise
+            finally:
+                if self._profundidade == 1 and self._pontos: self._fechar_ponto(self._pontos[0])
+                self._profundidade -= 1
+
+    @contextmanager
+    def ponto_de_salvamento(self):
+        with self.transacao():
+            ponto = self._abrir_ponto()
+            try:
+                yield self
+            except BaseException:
+                self._restaurar(ponto)
+                raise
+            finally:
+                self._fechar_ponto(ponto)
+
+    def _abrir_ponto(self):
+        if not self._pontos: observar_alteracoes(self._veiculo_alterando)
+        ponto = _PontoSalvamento(len(self._viagens_pendentes))
+        self._pontos.append(ponto)
+        return ponto
+
+    def _fechar_ponto(self, ponto):
+        """Fecha o ponto e os abertos depois dele."""
+        del self._pontos[self._pontos.index(ponto):]
+        if self._pontos: return
+        self._desfazer.clear()
+        observar_alteracoes(None)
+
+    def _confirmar(self):
+        if self.durabilidade == "por_operacao":
+            self._gravar_pendencias(sincronizar=True)
+            return
+        if self._marcacoes == self._inicio_transacao: return  # só leitura
+        self._operacoes_no_grupo += 1
+        if self._operacoes_no_grupo >= self.max_operacoes: self._gravar_grupo()
+        elif self._temporizador is None:
+            self._temporizador = threading.Timer(self.intervalo_ms / 1000, self._gravar_grupo_agendado)
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def _descartar(self):
+        self._detector = None  # avaliou abastecimentos que não foram gravados
+        if self._operacoes_no_grupo:
+            self._restaurar(self._pontos[0])
+            return
+        # Objetos em memória podem ter sido alterados: força releitura do disco.
+        if self._sujos or self._viagens_pendentes:
+            self.veiculos.invalidar()
+            self.motoristas.invalidar()
+        self._sujos.clear()
+        self._viagens_pendentes.clear()
+
+    def _gravar_pendencias(self, sincronizar=True):
+        if "veiculos" in self._sujos: self.veiculos.gravar(sincronizar=sincronizar)
+        if "motoristas" in self._sujos: self.motoristas.gravar(sincronizar=sincronizar)
+        if self._viagens_pendentes: self._diario().anexar_varias(self._viagens_pendentes, sincronizar)
+        self._sujos.clear()
+        self._viagens_pendentes.clear()
+
+    def _gravar_grupo(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        self._gravar_pendencias(sincronizar=self.durabilidade != "nenhum")
+        self._operacoes_no_grupo = 0
+
+    def _gravar_grupo_agendado(self):
+        with self.trava:
+            # Cancelado (o grupo já foi gravado) enquanto esperava a trava.
+            if self._temporizador is not threading.current_thread(): return
+            self._temporizador = None
+            try:
+                self._gravar_grupo()
+                self.erro_gravacao = None
+            except Exception as e:  # o grupo continua pendente; a próxima gravação tenta de novo
+                self.erro_gravacao = e
+
+    def descarregar(self):
+        with self.trava:
+            if self._operacoes_no_grupo: self._gravar_grupo()
+
+    def _marcar(self, nome, item=None):
+        with self.transacao():
+            self._sujos.add(nome)
+            self._marcacoes += 1
+            getattr(self, nome).marcar_alterado(item)
+
+    def _antes_de_alterar(self, nome, item):
+        """Registra o item nos pontos abertos que ainda não o viram: cópia rasa dos atributos, O(1) no histórico."""
+        atributos = None
+        for ponto in self._pontos:
+            if id(item) in ponto.anteriores: continue
+            if atributos is None: atributos = dict(vars(item))
+            ponto.anteriores[id(item)] = (nome, item, atributos, len(self._desfazer.get(id(item), ())))
+
+    def _veiculo_alterando(self, veiculo, desfazer=None):
+        self._antes_de_alterar("veiculos", veiculo)
+        if desfazer is not None: self._desfazer.setdefault(id(veiculo), []).append(desfazer)
+
+    def _restaurar(self, ponto):
+        """Desfaz o que foi feito desde o ponto; o estado restaurado fica pendente como uma alteração."""
+        del self._viagens_pendentes[ponto.viagens:]
+        marcacoes = self._marcacoes
+        for nome, itens in ponto.substituidos.items():
+            getattr(self, nome).substituir(itens)
+            self._marcar(nome)
+        novos = {id(item) for _, item in ponto.novos}
+        for nome in {nome for nome, _ in ponto.novos}:
+            repositorio = getattr(self, nome)
+            repositorio.substituir([item for item in repositorio.listar() if id(item) not in novos])
+            self._marcar(nome)
+        for nome, item, atributos, posicao in ponto.anteriores.values():
+            desfazer = self._desfazer.get(id(item), [])
+            if len(desfazer) == posicao and vars(item) == atributos: continue
+            while len(desfazer) > posicao: desfazer.pop()()
+            # No próprio objeto: quem guardou a referência (índices, caches de lote) vê o estado restaurado.
+            vars(item).clear()
+            vars(item).update(atributos)
+            if id(item) in novos: continue
+            if nome == "veiculos": self._veiculo_alterado(item)
+            else: self._marcar(nome, item)
+        if self._marcacoes != marcacoes: self._detector = None  # pode ter avaliado abastecimentos desfeitos
+
+    def _diario(self):
+        self.diario.migrar_de(self.arquivo_viagens)
+        return self.diario
+
+    def listar_veiculos(self):
+        return self.veiculos.listar()
+
+    def buscar_veiculo(self, placa):
+        return self.veiculos.buscar(normalizar_placa(placa))
+
+    def listar_motoristas(self):
+        return self.motoristas.listar()
+
+    def buscar_motorista(self, cpf):
+        motorista = self.motoristas.buscar(normalizar_cpf(cpf))
+        # Motoristas são alterados por atribuição direta (só campos de cabeçalho): registrados ao buscar.
+        if self._pontos and motorista is not None: self._antes_de_alterar("motoristas", motorista)
+        return motorista
+
+    def _ranking_atual(self):
+        self.veiculos.sincronizar()
+        if self._ranking is None or self._ranking.geracao != self.veiculos.geracao:
+            self._ranking = RankingEficiencia(self.veiculos.listar(), self.veiculos.geracao)
+        return self._ranking
+
+    def agenda_manutencao(self, intervalo_km):
+        self.veiculos.sincronizar()
+        agenda = self._agenda
+        if agenda is None or agenda.geracao != self.veiculos.geracao or agenda.intervalo_km != intervalo_km:
+            agenda = self._agenda = AgendaManutencao(self.veiculos.listar(), intervalo_km, self.veiculos.geracao)
+        return agenda
+
+    def detector_anomalias(self, **parametros):
+        # Aquecido uma vez por geração; depois, cada abastecimento registrado passa por avaliar().
+        self.veiculos.sincronizar()
+        detector = self._detector
+        if detector is None or detector.geracao != self.veiculos.geracao or \
+                detector.parametros != DetectorAnomalias(**parametros).parametros:
+            detector = self._detector = super().detector_anomalias(**parametros)
+            detector.geracao = self.veiculos.geracao
+        return detector
+
+    def indice_listagem(self):
+        self.veiculos.sincronizar()
+        if self._listagem is None or self._listagem.geracao != self.veiculos.geracao:
+            self._listagem = IndiceListagem(self.veiculos.listar(), self.veiculos.geracao)
+        return self._listagem
+
+    def _veiculo_alterado(self, veiculo):
+        for derivado in (self._ranking, self._agenda, self._listagem):
+            if derivado is not None and derivado.geracao == self.veiculos.geracao:
+                derivado.atualizar(veiculo)
+        self._marcar("veiculos", veiculo)
+
+    def adicionar_veiculo(self, veiculo):
+        for ponto in self._pontos: ponto.novos.append(("veiculos", veiculo))
+        self.veiculos.adicionar(veiculo)
+        self._veiculo_alterado(veiculo)
+
+    def atualizar_veiculo(self, veiculo):
+        self._veiculo_alterado(veiculo)
+
+    def adicionar_motorista(self, motorista):
+        for ponto in self._pontos: ponto.novos.append(("motoristas", motorista))
+        self.motoristas.adicionar(motorista)
+        self._marcar("motoristas", motorista)
+
+    def atualizar_motorista(self, motorista):
+        self._marcar("motoristas", motorista)
+
+    def registrar_manutencao(self, veiculo, manutencao):
+        self._veiculo_alterado(veiculo)
+
+    def registrar_abastecimento(self, veiculo, abastecimento):
+        self._veiculo_alterado(veiculo)
+
+    def registrar_viagem(self, veiculo, dados_viagem):
+        with self.transacao():
+            self._veiculo_alterado(veiculo)
+            self._viagens_pendentes.append(dados_viagem)
+
+    def _antes_de_substituir(self, nome):
+        anteriores = getattr(self, nome).listar()
+        for ponto in self._pontos: ponto.substituidos.setdefault(nome, anteriores)
+
+    def salvar_veiculos(self, veiculos):
+        if self._pontos: self._antes_de_substituir("veiculos")
+        self.veiculos.substituir(veiculos)
+        self._marcar("veiculos")
+
+    def salvar_motoristas(self, motoristas):
+        if self._pontos: self._antes_de_substituir("motoristas")
+        self.motoristas.substituir(motoristas)
+        self._marcar("motoristas")
+
+    def _diario_em_dia(self):
+        # Viagens de um grupo ainda em memória precisam estar no diário antes de lê-lo.
+        if self._viagens_pendentes and self._operacoes_no_grupo and not self._profundidade: self.descarregar()
+        return self._diario()
+
+    def ler_viagens(self, inicio=0, quantidade=None):
+        return self._diario_em_dia().ler(inicio, quantidade)
+
+    def total_viagens(self):
+        return len(self._diario_em_dia())
+
+    def reescrever_viagens(self, lista_dicts):
+        self._viagens_pendentes.clear()
+        self.diario.reescrever(lista_dicts)
+
+    def relatorio_eficiencia(self):
+        return self._ranking_atual().relatorio()
+
+    def _indice_viagens(self):
+        self._diario_em_dia()
+        return self.indice_viagens
+
+    def viagens_por(self, campo, chave, inicio=None, fim=None):
+        return self._indice_viagens().viagens(campo, chave, *self._limites_indice(inicio, fim))
+
+    def totais_viagens(self, campo, chave, inicio=None, fim=None):
+        return self._indice_viagens().totais(campo, chave, *self._limites_indice(inicio, fim))
+
+    def utilizacao_motoristas(self, inicio=None, fim=None):
+        return self._indice_viagens().utilizacao_motoristas(*self._limites_indice(inicio, fim))
+
+    @staticmethod
+    def _limites_indice(inicio, fim):
+        return (None if inicio is None else ordinal(inicio)), (None if fim is None else ordinal(fim))
+
+
+class ArmazenamentoParticionado(ArmazenamentoJSON):
+    """
+    Backend JSON com os veículos divididos em `particoes` arquivos pela placa
+    (ver particoes.py); motoristas e viagens como no ArmazenamentoJSON.
+    Buscar, alterar e gravar um veículo tocam só a partição dele.
+
+    Os relatórios de custos e de eficiência, com as partições ainda não
+    carregadas neste processo, são map-reduce: cada partição é lida e
+    resumida em um processo do pool, e as partes são juntadas aqui (o
+    ranking por intercalação das partes já ordenadas).
+    """
+
+    def __init__(self, arquivo_veiculos, arquivo_motoristas, arquivo_viagens, particoes=8, processos=0, **opcoes):
+        super().__init__(arquivo_veiculos, arquivo_motoristas, arquivo_viagens, **opcoes)
+        unico = self.veiculos
+        self.veiculos = RepositorioParticionado(arquivo_veiculos, int(particoes), self.formato)
+        with self.trava:
+            self.veiculos.migrar_de(unico)
+        self.processos = int(processos) or os.cpu_count() or 1
+
+    def _mapear(self, relatorio):
+        """Partes do relatório, uma por partição, na ordem das partições; None se o disco não está em dia."""
+        # Dentro de uma transação o grupo pendente não pode ir ao disco (um rollback o descartaria).
+        if self._profundidade: return None
+        self.descarregar()  # write-behind: os processos do pool leem os arquivos
+        if self.veiculos.alteracoes_pendentes: return None
+        arquivos = self.veiculos.arquivos
+        argumentos = (arquivos, repeat(self.veiculos.formato), repeat(relatorio))
+        if self.processos == 1: return list(map(mapear_particao, *argumentos))
+        with ProcessPoolExecutor(max_workers=min(self.processos, len(arquivos))) as pool:
+            return list(pool.map(mapear_particao, *argumentos))
+
+    def relatorio_custos(self):
+        partes = None if self.veiculos.carregado else self._mapear("custos")
+        if partes is None: return super().relatorio_custos()
+        return [linha for parte in partes for linha in parte]
+
+    def relatorio_eficiencia(self):
+        # Partes em ordem de partição: nos empates, a intercalação mantém a ordem de listar_veiculos.
+        partes = None if self.veiculos.carregado else self._mapear("eficiencia")
+        if partes is None: return super().relatorio_eficiencia()
+        return list(merge(*partes, key=lambda linha: -linha["km_l"]))
+
+
+class ArmazenamentoCache(ArmazenamentoJSON):
+    """
+    Backend JSON para frotas maiores que a memória: os veículos ficam em um
+    arquivo JSONL indexado por placa (veiculos.jsonl, ver cache_veiculos.py)
+    e só até `max_entradas` / `max_bytes` deles em memória, em LRU.
+    Motoristas e viagens como no ArmazenamentoJSON.
+
+    Ranking, agenda e listagem não ficam retidos (seriam a frota inteira em
+    memória): cada relatório lê a frota do disco, um veículo por vez.
+    """
+
+    def __init__(self, arquivo_veiculos, arquivo_motoristas, arquivo_viagens, max_entradas=1000, max_bytes=0, **opcoes):
+        super().__init__(arquivo_veiculos, arquivo_motoristas, arquivo_viagens, **opcoes)
+        unico = self.veiculos
+        self.veiculos = RepositorioCache(os.path.splitext(arquivo_veiculos)[0] + ".jsonl", self.trava,
+                                         max_entradas, max_bytes)
+        with self.trava:
+            self.veiculos.migrar_de(unico)
+
+    def _confirmar(self):
+        self.veiculos.confirmar()
+        super()._confirmar()
+
+    def estatisticas_cache(self) -> dict:
+        return self.veiculos.estatisticas()
+
+    relatorio_eficiencia = Armazenamento.relatorio_eficiencia
+    agenda_manutencao = Armazenamento.agenda_manutencao
+    indice_listagem = Armazenamento.indice_listagem
+
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS veiculos (
+    id INTEGER PRIMARY KEY,
+    placa TEXT NOT NULL,
+    placa_norm TEXT NOT NULL UNIQUE,
+    tipo TEXT NOT NULL,
+    marca TEXT,
+    modelo TEXT,
+    ano INTEGER,
+    quilometragem REAL NOT NULL,
+    km_entrada REAL NOT NULL,
+    km_ultima_revisao REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS motoristas (
+    cpf TEXT PRIMARY KEY,
+    nome TEXT,
+    cnh TEXT,
+    categoria_cnh TEXT
+);
+CREATE TABLE IF NOT EXISTS manutencoes (
+    id INTEGER PRIMARY KEY,
+    veiculo_id INTEGER NOT NULL REFERENCES veiculos(id) ON DELETE CASCADE,
+    data TEXT,
+    data_ordinal INTEGER NOT NULL DEFAULT 0,
+    tipo TEXT,
+    custo_base REAL NOT NULL,
+    custo_final REAL NOT NULL,
+    descricao TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_manutencoes_veiculo ON manutencoes(veiculo_id);
+CREATE TABLE IF NOT EXISTS abastecimentos (
+    id INTEGER PRIMARY KEY,
+    veiculo_id INTEGER NOT NULL REFERENCES veiculos(id) ON DELETE CASCADE,
+    data TEXT,
+    data_ordinal INTEGER NOT NULL DEFAULT 0,
+    combustivel TEXT,
+    litros REAL NOT NULL,
+    valor REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_abastecimentos_veiculo ON abastecimentos(veiculo_id);
+CREATE TABLE IF NOT EXISTS viagens (
+    id INTEGER PRIMARY KEY,
+    cpf_motorista TEXT,
+    nome_motorista TEXT,
+    placa_veiculo TEXT,
+    modelo_veiculo TEXT,
+    destino TEXT,
+    distancia REAL,
+    data TEXT,
+    data_ordinal INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_viagens_motorista ON viagens(cpf_motorista);
+CREATE INDEX IF NOT EXISTS idx_viagens_placa ON viagens(placa_veiculo);
+CREATE INDEX IF NOT EXISTS idx_veiculos_km ON veiculos(quilometragem);
+CREATE INDEX IF NOT EXISTS idx_veiculos_ano ON veiculos(ano);
+"""
+
+# Criados depois da migração: bancos antigos só ganham data_ordinal e km_ultima_revisao em _migrar.
+INDICES_MIGRADOS = """
+CREATE INDEX IF NOT EXISTS idx_veiculos_revisao ON veiculos(km_ultima_revisao - quilometragem);
+CREATE INDEX IF NOT EXISTS idx_manutencoes_periodo ON manutencoes(veiculo_id, data_ordinal);
+CREATE INDEX IF NOT EXISTS idx_manutencoes_data ON manutencoes(data_ordinal);
+CREATE INDEX IF NOT EXISTS idx_abastecimentos_periodo ON abastecimentos(veiculo_id, data_ordinal);
+CREATE INDEX IF NOT EXISTS idx_abastecimentos_data ON abastecimentos(data_ordinal);
+CREATE INDEX IF NOT EXISTS idx_viagens_periodo ON viagens(placa_veiculo, data_ordinal);
+CREATE INDEX IF NOT EXISTS idx_viagens_motorista_periodo ON viagens(cpf_motorista, data_ordinal);
+"""
+
+COLUNAS_VIAGEM = ("cpf_motorista", "nome_motorista", "placa_veiculo", "modelo_veiculo", "destino", "distancia", "data")
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Tabelas normalizadas e indexadas; cada operação grava só as linhas afetadas."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        self.conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False, timeout=30)
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute("PRAGMA foreign_keys = ON")
+        self.conexao.execute("PRAGMA journal_mode = WAL")
+        self.conexao.create_function("ordinal_da_data", 1, ordinal_da_data, deterministic=True)
+        self.conexao.executescript(ESQUEMA_SQLITE)
+        self._migrar()
+        self.conexao.executescript(INDICES_MIGRADOS)
+        self._profundidade = 0
+        self._detector = None
+        self.durabilidade = None
+        self.configurar_persistencia()
+
+    # No SQLite cada transação já grava só as linhas afetadas; a durabilidade vira o
+    # PRAGMA synchronous (em WAL, NORMAL só sincroniza nos checkpoints: fsync por grupo).
+    SINCRONIZACAO = {"por_operacao": "FULL", "grupo": "NORMAL", "nenhum": "OFF"}
+
+    def configurar_persistencia(self, durabilidade="por_operacao", intervalo_ms=200, max_operacoes=500):
+        if durabilidade not in DURABILIDADES:
+            raise ValueError(f"Durabilidade inválida: {durabilidade}. Use {', '.join(DURABILIDADES)}.")
+        if durabilidade != self.durabilidade:
+            self.conexao.execute(f"PRAGMA synchronous = {self.SINCRONIZACAO[durabilidade]}")
+            self.durabilidade = durabilidade
+
+    def _migrar(self):
+        """Bancos de versões anteriores: adiciona as colunas novas e as preenche."""
+        novas = {"manutencoes": ("data_ordinal",), "abastecimentos": ("data_ordinal",),
+                 "viagens": ("data", "data_ordinal"), "veiculos": ("km_ultima_revisao",)}
+        tipos = {"data_ordinal": "INTEGER NOT NULL DEFAULT 0", "data": "TEXT", "km_ultima_revisao": "REAL NOT NULL DEFAULT 0"}
+        for tabela, colunas in novas.items():
+            existentes = {l["name"] for l in self.conexao.execute(f"PRAGMA table_info({tabela})")}
+            for coluna in colunas:
+                if coluna in existentes: continue
+                self.conexao.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipos[coluna]}")
+                if coluna == "data_ordinal" and "data" in existentes:
+                    self.conexao.execute(f"UPDATE {tabela} SET data_ordinal = ordinal_da_data(data)")
+                if coluna == "km_ultima_revisao":
+                    self.conexao.execute("UPDATE veiculos SET km_ultima_revisao = km_entrada")
+
+    def valido(self):
+        return os.path.exists(self.caminho)
+
+    def fechar(self):
+        self.conexao.close()
+
+    @contextmanager
+    def transacao(self):
+        if self._profundidade == 0: self.conexao.execute("BEGIN IMMEDIATE")
+        self._profundidade += 1
+        try:
+            yield self
+        except BaseException:
+            self._profundidade -= 1
+            if self._profundidade == 0:
+                self.conexao.execute("ROLLBACK")
+                self._detector = None  # avaliou abastecimentos que não foram gravados
+            raise
+        self._profundidade -= 1
+        if self._profundidade == 0: self.conexao.execute("COMMIT")
+
+    @contextmanager
+    def ponto_de_salvamento(self):
+        with self.transacao():
+            nome = f"ponto_{self._profundidade}"
+            alteracoes = self.conexao.total_changes
+            self.conexao.execute(f"SAVEPOINT {nome}")
+            try:
+                yield self
+            except BaseException:
+                self.conexao.execute(f"ROLLBACK TO {nome}")
+                if self.conexao.total_changes != alteracoes: self._detector = None
+                raise
+            finally:
+                self.conexao.execute(f"RELEASE {nome}")
+
+    def _id_veiculo(self, placa):
+        linha = self.conexao.execute(
+            "SELECT id FROM veiculos WHERE placa_norm = ?", (normalizar_placa(placa),)
+        ).fetchone()
+        if linha is None: raise KeyError(f"Veículo {placa} não está no banco.")
+        return linha["id"]
+
+    # Cabeçalho do veículo + agregados calculados pelo banco; os históricos
+    # só são consultados quando acessados (ver Veiculo.definir_historicos_brutos).
+    CONSULTA_VEICULOS = (
+        "SELECT v.*, COALESCE(m.total, 0.0) AS total_manutencao, COALESCE(m.qtd, 0) AS qtd_manutencoes, "
+        "COALESCE(a.litros, 0.0) AS total_litros, COALESCE(a.valor, 0.0) AS total_combustivel, "
+        "COALESCE(a.qtd, 0) AS qtd_abastecimentos "
+        "FROM veiculos v "
+        "LEFT JOIN (SELECT veiculo_id, SUM(custo_final) AS total, COUNT(*) AS qtd "
+        "           FROM manutencoes GROUP BY veiculo_id) m ON m.veiculo_id = v.id "
+        "LEFT JOIN (SELECT veiculo_id, SUM(litros) AS litros, SUM(valor) AS valor, COUNT(*) AS qtd "
+        "           FROM abastecimentos GROUP BY veiculo_id) a ON a.veiculo_id = v.id "
+    )
+
+    # Um veículo só: agregados por subconsultas correlacionadas (índice por veiculo_id),
+    # sem agrupar as tabelas de histórico inteiras como na listagem.
+    CONSULTA_VEICULO = (
+        "SELECT v.*, "
+        "(SELECT COALESCE(SUM(custo_final), 0.0) FROM manutencoes WHERE veiculo_id = v.id) AS total_manutencao, "
+        "(SELECT COUNT(*) FROM manutencoes WHERE veiculo_id = v.id) AS qtd_manutencoes, "
+        "(SELECT COALESCE(SUM(litros), 0.0) FROM abastecimentos WHERE veiculo_id = v.id) AS total_litros, "
+        "(SELECT COALESCE(SUM(valor), 0.0) FROM abastecimentos WHERE veiculo_id = v.id) AS total_combustivel, "
+        "(SELECT COUNT(*) FROM abastecimentos WHERE veiculo_id = v.id) AS qtd_abastecimentos "
+        "FROM veiculos v WHERE v.placa_norm = ?"
+    )
+
+    def _montar_veiculo(self, linha):
+        instrumentacao.contar_objetos(1)
+        veiculo_id = linha["id"]
+        return Veiculo.from_dict({
+            "tipo": linha["tipo"],
+            "placa": linha["placa"],
+            "marca": linha["marca"],
+            "modelo": linha["modelo"],
+            "ano": linha["ano"],
+            "quilometragem": linha["quilometragem"],
+            "km_entrada": linha["km_entrada"],
+            "km_ultima_revisao": linha["km_ultima_revisao"],
+            "status": linha["status"],
+            "agregados": {
+                "total_manutencao": linha["total_manutencao"],
+                "qtd_manutencoes": linha["qtd_manutencoes"],
+                "total_litros": linha["total_litros"],
+                "total_combustivel": linha["total_combustivel"],
+                "qtd_abastecimentos": linha["qtd_abastecimentos"],
+                "km_percorridos": linha["quilometragem"] - linha["km_entrada"],
+            },
+            "manutencoes": lambda: self._manutencoes_de(veiculo_id),
+            "abastecimentos": lambda: self._abastecimentos_de(veiculo_id),
+            "km_por_dia": lambda: self._km_por_dia_de(linha["placa"]),
+        })
+
+    def _manutencoes_de(self, veiculo_id):
+        return [dict(m) for m in self.conexao.execute(
+            "SELECT data, tipo, custo_base, custo_final, descricao FROM manutencoes WHERE veiculo_id = ? ORDER BY data_ordinal, id",
+            (veiculo_id,),
+        )]
+
+    def _abastecimentos_de(self, veiculo_id):
+        return [dict(a) for a in self.conexao.execute(
+            "SELECT data, combustivel, litros, valor FROM abastecimentos WHERE veiculo_id = ? ORDER BY data_ordinal, id",
+            (veiculo_id,),
+        )]
+
+    def _km_por_dia_de(self, placa):
+        return [tuple(l) for l in self.conexao.execute(
+            "SELECT data_ordinal, SUM(distancia) FROM viagens WHERE placa_veiculo = ? "
+            "GROUP BY data_ordinal ORDER BY data_ordinal",
+            (placa,),
+        )]
+
+    def listar_veiculos(self):
+        return [self._montar_veiculo(linha) for linha in self.conexao.execute(self.CONSULTA_VEICULOS + "ORDER BY v.id")]
+
+    def buscar_veiculo(self, placa):
+        linha = self.conexao.execute(self.CONSULTA_VEICULO, (normalizar_placa(placa),)).fetchone()
+        return self._montar_veiculo(linha) if linha else None
+
+    def listar_motoristas(self):
+        motoristas = [Motorista.from_dict(dict(l)) for l in self.conexao.execute("SELECT * FROM motoristas ORDER BY rowid")]
+        instrumentacao.contar_objetos(len(motoristas))
+        return motoristas
+
+    def buscar_motorista(self, cpf):
+        linha = self.conexao.execute("SELECT * FROM motoristas WHERE cpf = ?", (normalizar_cpf(cpf),)).fetchone()
+        return Motorista.from_dict(dict(linha)) if linha else None
+
+    def _inserir_veiculo(self, v):
+        cursor = self.conexao.execute(
+            "INSERT INTO veiculos (placa, placa_norm, tipo, marca, modelo, ano, quilometragem, km_entrada, "
+            "km_ultima_revisao, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (v.placa, normalizar_placa(v.placa), v.tipo, v.marca, v.modelo, v.ano,
+             v.quilometragem, v.km_entrada, v.km_ultima_revisao, v.status.value),
+        )
+        veiculo_id = cursor.lastrowid
+        for m in v.historico_manutencoes: self._inserir_manutencao(veiculo_id, m)
+        for a in v.historico_abastecimentos: self._inserir_abastecimento(veiculo_id, a)
+
+    def _inserir_manutencao(self, veiculo_id, m):
+        self.conexao.execute(
+            "INSERT INTO manutencoes (veiculo_id, data, data_ordinal, tipo, custo_base, custo_final, descricao) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (veiculo_id, m.data, m.ordinal, m.tipo, m.custo_base, m.custo_final, m.descricao),
+        )
+
+    def _inserir_abastecimento(self, veiculo_id, a):
+        self.conexao.execute(
+            "INSERT INTO abastecimentos (veiculo_id, data, data_ordinal, combustivel, litros, valor) VALUES (?, ?, ?, ?, ?, ?)",
+            (veiculo_id, a.data, a.ordinal, a.combustivel, a.litros, a.valor),
+        )
+
+    def _inserir_motorista(self, m):
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO motoristas (cpf, nome, cnh, categoria_cnh) VALUES (?, ?, ?, ?)",
+            (normalizar_cpf(m.cpf), m.nome, m.cnh, m.categoria_cnh),
+        )
+
+    def _atualizar_cabecalho(self, v):
+        self.conexao.execute(
+            "UPDATE veiculos SET marca = ?, modelo = ?, ano = ?, quilometragem = ?, km_ultima_revisao = ?, status = ? "
+            "WHERE placa_norm = ?",
+            (v.marca, v.modelo, v.ano, v.quilometragem, v.km_ultima_revisao, v.status.value, normalizar_placa(v.placa)),
+        )
+
+    def adicionar_veiculo(self, veiculo):
+        with self.transacao():
+            self._inserir_veiculo(veiculo)
+
+    def atualizar_veiculo(self, veiculo):
+        with self.transacao():
+            self._atualizar_cabecalho(veiculo)
+
+    def adicionar_motorista(self, motorista):
+        with self.transacao():
+            self._inserir_motorista(motorista)
+
+    def atualizar_motorista(self, motorista):
+        with self.transacao():
+            self._inserir_motorista(motorista)
+
+    def registrar_manutencao(self, veiculo, manutencao):
+        with self.transacao():
+            self._atualizar_cabecalho(veiculo)
+            self._inserir_manutencao(self._id_veiculo(veiculo.placa), manutencao)
+
+    def registrar_abastecimento(self, veiculo, abastecimento):
+        with self.transacao():
+            self._inserir_abastecimento(self._id_veiculo(veiculo.placa), abastecimento)
+
+    INSERIR_VIAGEM = (
+        f"INSERT INTO viagens ({', '.join(COLUNAS_VIAGEM)}, data_ordinal) "
+        f"VALUES ({', '.join('?' * len(COLUNAS_VIAGEM))}, ?)"
+    )
+
+    @staticmethod
+    def _linha_viagem(dados):
+        return tuple(dados.get(c) for c in COLUNAS_VIAGEM) + (ordinal_da_data(dados.get("data") or ""),)
+
+    def registrar_viagem(self, veiculo, dados_viagem):
+        with self.transacao():
+            self._atualizar_cabecalho(veiculo)
+            self.conexao.execute(self.INSERIR_VIAGEM, self._linha_viagem(dados_viagem))
+
+    def salvar_veiculos(self, veiculos):
+        with self.transacao():
+            self.conexao.execute("DELETE FROM veiculos")
+            for v in veiculos: self._inserir_veiculo(v)
+
+    def salvar_motoristas(self, motoristas):
+        with self.transacao():
+            self.conexao.execute("DELETE FROM motoristas")
+            for m in motoristas: self._inserir_motorista(m)
+
+    def ler_viagens(self, inicio=0, quantidade=None):
+        if quantidade is None: quantidade = -1
+        cursor = self.conexao.execute(
+            f"SELECT {', '.join(COLUNAS_VIAGEM)} FROM viagens ORDER BY id LIMIT ? OFFSET ?",
+            (quantidade, max(0, inicio)),
+        )
+        return [dict(l) for l in cursor]
+
+    def total_viagens(self):
+        return self.conexao.execute("SELECT COUNT(*) FROM viagens").fetchone()[0]
+
+    def reescrever_viagens(self, lista_dicts):
+        with self.transacao():
+            self.conexao.execute("DELETE FROM viagens")
+            self.conexao.executemany(self.INSERIR_VIAGEM, [self._linha_viagem(d) for d in lista_dicts])
+
+    def _chave_viagem(self, campo, chave):
+        """Valor gravado nas viagens (o do cadastro, como foi digitado); None se a entidade não existe."""
+        if campo == "placa_veiculo":
+            veiculo = self.buscar_veiculo(chave)
+            return veiculo.placa if veiculo else None
+        motorista = self.buscar_motorista(chave)
+        return motorista.cpf if motorista else None
+
+    def _consulta_viagens(self, campo, chave, inicio, fim, colunas):
+        valor = self._chave_viagem(campo, CAMPOS_VIAGEM[campo](chave))
+        if valor is None: return None
+        return self.conexao.execute(
+            f"SELECT {colunas} FROM viagens WHERE {campo} = ? AND data_ordinal BETWEEN ? AND ? ORDER BY id",
+            (valor,) + _limites(inicio, fim),
+        )
+
+    def viagens_por(self, campo, chave, inicio=None, fim=None):
+        cursor = self._consulta_viagens(campo, chave, inicio, fim, ", ".join(COLUNAS_VIAGEM))
+        if cursor is None: return super().viagens_por(campo, chave, inicio, fim)
+        return [dict(l) for l in cursor]
+
+    def totais_viagens(self, campo, chave, inicio=None, fim=None):
+        cursor = self._consulta_viagens(campo, chave, inicio, fim, "COUNT(*), COALESCE(SUM(distancia), 0.0)")
+        if cursor is None: return super().totais_viagens(campo, chave, inicio, fim)
+        viagens, distancia = cursor.fetchone()
+        return {"viagens": viagens, "distancia": distancia}
+
+    def utilizacao_motoristas(self, inicio=None, fim=None):
+        cursor = self.conexao.execute(
+            "SELECT cpf_motorista, COUNT(*) AS viagens, COALESCE(SUM(distancia), 0.0) AS distancia, "
+            "COUNT(DISTINCT data_ordinal) AS dias_ativos, MAX(data_ordinal) AS ultimo "
+            "FROM viagens WHERE data_ordinal BETWEEN ? AND ? GROUP BY cpf_motorista",
+            _limites(inicio, fim),
+        )
+        return [{"cpf": normalizar_cpf(l["cpf_motorista"] or ""), "viagens": l["viagens"], "distancia": l["distancia"],
+                 "dias_ativos": l["dias_ativos"], "ultima_viagem": data_do_ordinal(l["ultimo"])} for l in cursor]
+
+    def detector_anomalias(self, **parametros):
+        # data_version muda quando outra conexão confirma algo: aí o detector é aquecido de novo.
+        versao = self.conexao.execute("PRAGMA data_version").fetchone()[0]
+        detector = self._detector
+        if detector is None or detector.geracao != versao or detector.parametros != DetectorAnomalias(**parametros).parametros:
+            detector = self._detector = super().detector_anomalias(**parametros)
+            detector.geracao = versao
+        return detector
+
+    def recalcular_custos_manutencao(self, aplicar=False):
+        # Sem montar veículos: as manutenções vêm em uma consulta, agrupadas por veículo.
+        impacto = _ImpactoCustos()
+        alteracoes = []
+        with self.transacao():
+            cursor = self.conexao.execute(
+                "SELECT m.id, m.tipo, m.data_ordinal, m.custo_base, m.custo_final, v.placa, v.tipo AS tipo_veiculo "
+                "FROM manutencoes m JOIN veiculos v ON v.id = m.veiculo_id ORDER BY m.veiculo_id, m.data_ordinal, m.id"
+            )
+            for _, linhas in groupby(cursor, key=lambda l: l["placa"]):
+                linhas = list(linhas)
+                custos = [estrategia_para(l["tipo"], l["tipo_veiculo"], l["data_ordinal"]).calcular_custo(l["custo_base"])
+                          for l in linhas]
+                if impacto.somar(linhas[0]["placa"], [l["tipo"] for l in linhas], [l["custo_final"] for l in linhas],
+                                 custos) and aplicar:
+                    alteracoes.extend((custo, l["id"]) for custo, l in zip(custos, linhas))
+            if alteracoes: self.conexao.executemany("UPDATE manutencoes SET custo_final = ? WHERE id = ?", alteracoes)
+        return impacto.relatorio(aplicar)
+
+    def relatorio_custos(self):
+        cursor = self.conexao.execute(
+            "SELECT v.placa, v.modelo, COALESCE(SUM(m.custo_final), 0.0) AS total_manutencao, "
+            "COUNT(m.id) AS qtd_manutencoes "
+            "FROM veiculos v LEFT JOIN manutencoes m ON m.veiculo_id = v.id "
+            "GROUP BY v.id ORDER BY v.id"
+        )
+        return [dict(l) for l in cursor]
+
+    def relatorio_eficiencia(self):
+        cursor = self.conexao.execute(
+            "SELECT v.placa, v.modelo, COALESCE(a.litros, 0.0) AS litros, "
+            "CASE WHEN a.litros > 0 AND v.quilometragem - v.km_entrada > 0 "
+            "     THEN (v.quilometragem - v.km_entrada) / a.litros ELSE 0.0 END AS km_l "
+            "FROM veiculos v LEFT JOIN ("
+            "    SELECT veiculo_id, SUM(litros) AS litros FROM abastecimentos GROUP BY veiculo_id"
+            ") a ON a.veiculo_id = v.id "
+            "ORDER BY km_l DESC, v.id"
+        )
+        return [dict(l) for l in cursor]
+
+    def totais_periodo(self, inicio, fim, placa=None):
+        filtro_veiculo = filtro_placa = ""
+        por_veiculo = por_placa = []
+        if placa is not None:
+            veiculo = self.buscar_veiculo(placa)
+            if veiculo is None: return super().totais_periodo(inicio, fim, placa)
+            filtro_veiculo, por_veiculo = " AND veiculo_id = ?", [self._id_veiculo(placa)]
+            filtro_placa, por_placa = " AND placa_veiculo = ?", [veiculo.placa]
+        periodo = [ordinal(inicio), ordinal(fim)]
+        manutencao = self.conexao.execute(
+            "SELECT COALESCE(SUM(custo_final), 0.0), COUNT(*) FROM manutencoes "
+            "WHERE data_ordinal BETWEEN ? AND ?" + filtro_veiculo, periodo + por_veiculo,
+        ).fetchone()
+        abastecimento = self.conexao.execute(
+            "SELECT COALESCE(SUM(litros), 0.0), COALESCE(SUM(valor), 0.0) FROM abastecimentos "
+            "WHERE data_ordinal BETWEEN ? AND ?" + filtro_veiculo, periodo + por_veiculo,
+        ).fetchone()
+        km = self.conexao.execute(
+            "SELECT COALESCE(SUM(distancia), 0.0) FROM viagens "
+            "WHERE data_ordinal BETWEEN ? AND ?" + filtro_placa, periodo + por_placa,
+        ).fetchone()
+        return {"total_manutencao": manutencao[0], "qtd_manutencoes": manutencao[1],
+                "litros": abastecimento[0], "total_combustivel": abastecimento[1], "km": km[0]}
+
+    def relatorio_custos_periodo(self, inicio, fim):
+        cursor = self.conexao.execute(
+            "SELECT v.placa, v.modelo, COALESCE(SUM(m.custo_final), 0.0) AS total_manutencao, "
+            "COUNT(m.id) AS qtd_manutencoes "
+            "FROM veiculos v LEFT JOIN manutencoes m "
+            "     ON m.veiculo_id = v.id AND m.data_ordinal BETWEEN ? AND ? "
+            "GROUP BY v.id ORDER BY v.id",
+            (ordinal(inicio), ordinal(fim)),
+        )
+        return [dict(l) for l in cursor]
+
+    def relatorio_eficiencia_periodo(self, inicio, fim):
+        periodo = (ordinal(inicio), ordinal(fim))
+        cursor = self.conexao.execute(
+            "SELECT v.placa, v.modelo, COALESCE(a.litros, 0.0) AS litros, COALESCE(k.km, 0.0) AS km, "
+            "CASE WHEN a.litros > 0 AND k.km > 0 THEN k.km / a.litros ELSE 0.0 END AS km_l "
+            "FROM veiculos v "
+            "LEFT JOIN (SELECT veiculo_id, SUM(litros) AS litros FROM abastecimentos "
+            "           WHERE data_ordinal BETWEEN ? AND ? GROUP BY veiculo_id) a ON a.veiculo_id = v.id "
+            "LEFT JOIN (SELECT placa_veiculo, SUM(distancia) AS km FROM viagens "
+            "           WHERE data_ordinal BETWEEN ? AND ? GROUP BY placa_veiculo) k ON k.placa_veiculo = v.placa "
+            "ORDER BY km_l DESC, v.id",
+            periodo + periodo,
+        )
+        return [dict(l) for l in cursor]
+
+    # Mesmas linhas da AgendaManutencao; a ordenação usa o índice idx_veiculos_revisao.
+    ORDENACOES_SQL = {"placa": "placa_norm", "km": "quilometragem", "ano": "ano"}
+
+    def _consulta_frota(self, status, tipo, ordem_por, decrescente):
+        condicoes, parametros = [], []
+        if status is not None:
+            condicoes.append("status = ?")
+            parametros.append(status)
+        if tipo is not None:
+            condicoes.append("tipo = ?")
+            parametros.append(tipo)
+        onde = f"WHERE {' AND '.join(condicoes)} " if condicoes else ""
+        sentido = "DESC" if decrescente else "ASC"
+        return onde, f"ORDER BY {self.ORDENACOES_SQL[ordem_por]} {sentido}, id {sentido} ", parametros
+
+    def linhas_frota(self, status=None, tipo=None, ordem_por="placa", decrescente=False, inicio=0, quantidade=-1):
+        onde, ordem, parametros = self._consulta_frota(status, tipo, ordem_por, decrescente)
+        cursor = self.conexao.execute(
+            "SELECT placa, tipo, marca, modelo, ano, quilometragem, status FROM veiculos "
+            + onde + ordem + "LIMIT ? OFFSET ?", parametros + [quantidade, inicio])
+        return (dict(l) for l in cursor)
+
+    def pagina_frota(self, status=None, tipo=None, ordem_por="placa", decrescente=False, pagina=1, por_pagina=50):
+        onde, _, parametros = self._consulta_frota(status, tipo, ordem_por, decrescente)
+        total = self.conexao.execute("SELECT COUNT(*) FROM veiculos " + onde, parametros).fetchone()[0]
+        return paginar(total, pagina, por_pagina, lambda inicio, quantidade: list(
+            self.linhas_frota(status, tipo, ordem_por, decrescente, inicio, quantidade)))
+
+    CONSULTA_REVISOES = (
+        "SELECT placa, modelo, tipo, status, quilometragem, km_ultima_revisao, "
+        "km_ultima_revisao + :intervalo AS km_proxima_revisao, "
+        "km_ultima_revisao + :intervalo - quilometragem AS km_restantes "
+        "FROM veiculos "
+    )
+
+    def proximas_revisoes(self, n, intervalo_km):
+        cursor = self.conexao.execute(
+            self.CONSULTA_REVISOES + "ORDER BY km_ultima_revisao - quilometragem, id LIMIT :n",
+            {"intervalo": intervalo_km, "n": n},
+        )
+        return [dict(l) for l in cursor]
+
+    def revisoes_vencidas(self, intervalo_km):
+        cursor = self.conexao.execute(
+            self.CONSULTA_REVISOES + "WHERE km_ultima_revisao - quilometragem <= -:intervalo "
+            "ORDER BY km_ultima_revisao - quilometragem, id",
+            {"intervalo": intervalo_km},
+        )
+        return [dict(l) for l in cursor]
+
+
+def copiar_dados(origem: Armazenamento, destino: Armazenamento):
+    """Copia veículos, motoristas e viagens entre backends (ex.: JSON -> SQLite)."""
+    with destino.transacao():
+        destino.salvar_veiculos(origem.listar_veiculos())
+        destino.salvar_motoristas(origem.listar_motoristas())
+        destino.reescrever_viagens(origem.ler_viagens())
@@ -0,0 +1,100 @@
+"""
+Compara as métricas da frota calculadas com laços Python por veículo (como os
+relatórios originais do controller) com os passes vetorizados de analise.py.
+
+    python bench_analise.py [--veiculos 100000] [--colunar]
+"""
+import argparse
+import random
+import time
+
+from models import Veiculo, Carro, Moto, Caminhao, Manutencao, Abastecimento
+from analise import TabelaFrota, TIPOS_VEICULO, PERCENTIS_KM_L
+
+
+def frota_sintetica(n, semente=42):
+    rnd = random.Random(semente)
+    classes = (Carro, Moto, Caminhao)
+    veiculos = []
+    for i in range(n):
+        v = classes[i % 3](f"BEN{i:05d}", "Marca", f"Modelo {i % 50}", 2015 + i % 10, rnd.randint(0, 50_000))
+        for _ in range(rnd.randint(0, 6)):
+            v.adicionar_manutencao(Manutencao(f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2025",
+                                              rnd.choice(("preventiva", "corretiva")), rnd.uniform(80, 2000), ""))
+            v.finalizar_manutencao_status()
+        for _ in range(rnd.randint(0, 12)):
+            v.abastecer(Abastecimento(f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2025",
+                                      "gasolina", rnd.uniform(10, 60), rnd.uniform(60, 400)))
+        v.quilometragem = v.km_entrada + rnd.uniform(0, 30_000)
+        veiculos.append(v)
+    return veiculos
+
+
+def _percentil(ordenados, p):
+    """Interpolação linear, a mesma regra padrão do np.percentile."""
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    if i + 1 >= len(ordenados): return ordenados[-1]
+    return ordenados[i] + (ordenados[i + 1] - ordenados[i]) * (k - i)
+
+
+def metricas_python(veiculos):
+    """Mesmas métricas de TabelaFrota.resumo(), um veículo por vez com somas por gerador."""
+    custo_por_tipo = {t: {"manutencao": 0.0, "combustivel": 0.0} for t in TIPOS_VEICULO}
+    litros_frota = valor_frota = manutencao_frota = km_frota = 0.0
+    km_ls = []
+    for v in veiculos:
+        total_manutencao = sum(m.custo_final for m in v)
+        total_litros = sum(a.litros for a in v.historico_abastecimentos)
+        total_valor = sum(a.valor for a in v.historico_abastecimentos)
+        custo_por_tipo[v.tipo]["manutencao"] += total_manutencao
+        custo_por_tipo[v.tipo]["combustivel"] += total_valor
+        litros_frota += total_litros
+        valor_frota += total_valor
+        manutencao_frota += total_manutencao
+        distancia = v.quilometragem - v.km_entrada
+        km_frota += max(distancia, 0)
+        if total_litros > 0 and distancia > 0:
+            km_ls.append(distancia / total_litros)
+    km_ls.sort()
+    return {
+        "custo_por_tipo": custo_por_tipo,
+        "preco_medio_litro": valor_frota / litros_frota if litros_frota else 0.0,
+        "percentis_km_l": {p: _percentil(km_ls, p) for p in PERCENTIS_KM_L} if km_ls else {},
+        "custo_por_km": (manutencao_frota + valor_frota) / km_frota if km_frota else 0.0,
+    }
+
+
+def _cronometrar(funcao, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--veiculos", type=int, default=100_000)
+    parser.add_argument("--colunar", action="store_true", help="Históricos em colunas (historico.colunar)")
+    args = parser.parse_args()
+
+    Veiculo.historico_colunar = args.colunar
+    print(f"Gerando frota sintética com {args.veiculos} veículos...")
+    veiculos = frota_sintetica(args.veiculos)
+
+    t_python, esperado = _cronometrar(lambda: metricas_python(veiculos))
+    t_tabela, tabela = _cronometrar(lambda: TabelaFrota(veiculos), repeticoes=1)
+    t_numpy, resumo = _cronometrar(tabela.resumo)
+    t_relatorios, _ = _cronometrar(lambda: (tabela.relatorio_custos(), tabela.relatorio_eficiencia()))
+
+    print(f"{'ETAPA':<36} | {'SEGUNDOS':>9}")
+    print("-" * 49)
+    print(f"{'Métricas em laço Python':<36} | {t_python:>9.3f}")
+    print(f"{'Montagem da TabelaFrota (uma vez)':<36} | {t_tabela:>9.3f}")
+    print(f"{'Métricas vetorizadas (NumPy)':<36} | {t_numpy:>9.3f}")
+    print(f"{'Relatórios custos + eficiência':<36} | {t_relatorios:>9.3f}")
+    print(f"\nAceleração das métricas: {t_python / t_numpy:.0f}x")
+    desvio = abs(esperado["custo_por_km"] - resumo["custo_por_km"])
+    print(f"Diferença em custo/km entre as versões: {desvio:.2e}")
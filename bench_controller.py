@@ -0,0 +1,212 @@
+"""
+Benchmark das funções do controller sobre uma frota sintética (gerador_frota).
+Para cada operação mede ops/s, latência p50/p99 e pico de memória, e grava
+o resultado em JSON para comparar entre commits.
+
+    python bench_controller.py --veiculos 10000 [--backend sqlite] [--saida bench.json] [--comparar base.json]
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import configuracoes
+import controller
+from gerador_frota import gerar_frota, gravar_frota, armazenamento_da_pasta, resumo_frota
+from models import StatusVeiculo
+
+
+def percentil(amostras, p):
+    """Percentil pelo posto mais próximo (amostras já ordenadas)."""
+    return amostras[max(0, math.ceil(p / 100 * len(amostras)) - 1)]
+
+
+def operacoes(frota):
+    """
+    (nome, função(k), pesada): função executa a k-ésima chamada da operação.
+    Operações pesadas (varrem a frota inteira) rodam menos vezes.
+    """
+    ativos = [v.placa for v in frota["veiculos"] if v.status == StatusVeiculo.ATIVO]
+    cpf_universal = frota["motoristas"][0].cpf  # categoria AE: dirige qualquer tipo
+    placa = lambda k: ativos[k % len(ativos)]
+
+    def frio(_):
+        controller._armazenamentos.clear()
+        return controller.carregar_veiculos()
+
+    return [
+        ("carregar_veiculos (frio)", frio, True),
+        ("carregar_veiculos", lambda k: controller.carregar_veiculos(), True),
+        ("buscar_veiculo", lambda k: controller.buscar_veiculo(placa(k)), False),
+        ("buscar_motorista", lambda k: controller.buscar_motorista(frota["motoristas"][k % len(frota["motoristas"])].cpf), False),
+        ("cadastrar_veiculo_controller",
+         lambda k: controller.cadastrar_veiculo_controller("Carro", f"BEN{k:04d}", "Fiat", "Mobi", "2024", "0"), False),
+        ("cadastrar_motorista_controller",
+         lambda k: controller.cadastrar_motorista_controller("Bench", f"BENCH-{k}", "0", "B"), False),
+        ("atualizar_veiculo_controller",
+         lambda k: controller.atualizar_veiculo_controller(placa(k), f"Marca {k}", "", ""), False),
+        ("realizar_viagem_controller",
+         lambda k: controller.realizar_viagem_controller(cpf_universal, placa(k), "Bench", "12.5", "15/06/2025"), False),
+        ("registrar_abastecimento_controller",
+         lambda k: controller.registrar_abastecimento_controller(placa(k), "15/06/2025", "Gasolina", "30", "180"), False),
+        ("registrar_manutencao_controller",
+         lambda k: controller.registrar_manutencao_controller(placa(k), "16/06/2025", "preventiva", "200", "Bench"), False),
+        ("finalizar_manutencao_controller", lambda k: controller.finalizar_manutencao_controller(placa(k)), False),
+        ("listar_viagens", lambda k: controller.listar_viagens(k + 1, 50), False),
+        ("ultimas_viagens", lambda k: controller.ultimas_viagens(20), False),
+        ("gerar_relatorio_custos", lambda k: controller.gerar_relatorio_custos(), True),
+        ("gerar_relatorio_eficiencia", lambda k: controller.gerar_relatorio_eficiencia(), True),
+        ("gerar_relatorio_custos_periodo",
+         lambda k: controller.gerar_relatorio_custos_periodo("01/06/2025", "30/06/2025"), True),
+        ("gerar_relatorio_eficiencia_periodo",
+         lambda k: controller.gerar_relatorio_eficiencia_periodo("01/06/2025", "30/06/2025"), True),
+        ("totais_periodo_controller", lambda k: controller.totais_periodo_controller("01/06/2025", "30/06/2025"), True),
+        ("proximas_revisoes_controller", lambda k: controller.proximas_revisoes_controller(20), False),
+        ("revisoes_vencidas_controller", lambda k: controller.revisoes_vencidas_controller(), False),
+        ("listar_frota_controller",
+         lambda k: controller.listar_frota_controller(None, None, ("placa", "km", "ano")[k % 3], k % 2, k + 1), False),
+        ("listar_frota_controller (filtro)",
+         lambda k: controller.listar_frota_controller("Ativo", "Moto", "km", False, k + 1), False),
+        ("verificar_agregados_controller", lambda k: controller.verificar_agregados_controller(), True),
+    ]
+
+
+def medir(funcao, repeticoes, tempo_max, com_memoria=True):
+    latencias = []
+    inicio_total = time.perf_counter()
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for k in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao(k)
+            latencias.append(time.perf_counter() - inicio)
+            if time.perf_counter() - inicio_total > tempo_max and len(latencias) >= 3: break
+
+        pico = None
+        if com_memoria:
+            # Uma chamada extra sob tracemalloc (que deixaria as latências acima mais lentas).
+            tracemalloc.start()
+            funcao(len(latencias))
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    latencias.sort()
+    return {
+        "chamadas": len(latencias),
+        "ops_por_segundo": len(latencias) / sum(latencias),
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "pico_memoria_bytes": pico,
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def _controller_em(pasta, backend, persistencia=None):
+    """Aponta o controller (arquivos e settings.json) para a pasta da frota sintética."""
+    anteriores = (controller.DATA_DIR, controller.FILE_VEICULOS, controller.FILE_MOTORISTAS,
+                  controller.FILE_VIAGENS, configuracoes.ARQUIVO_CONFIG)
+    configuracao = dict(configuracoes.carregar_configuracoes())
+    configuracao["armazenamento"] = {"backend": backend, "arquivo_sqlite": "frota.db"}
+    if persistencia is not None: configuracao["persistencia"] = persistencia
+    arquivo_config = os.path.join(pasta, "settings.json")
+    with open(arquivo_config, "w", encoding="utf-8") as f:
+        json.dump(configuracao, f)
+
+    controller.DATA_DIR = pasta
+    controller.FILE_VEICULOS = os.path.join(pasta, "veiculos.json")
+    controller.FILE_MOTORISTAS = os.path.join(pasta, "motoristas.json")
+    controller.FILE_VIAGENS = os.path.join(pasta, "viagens.json")
+    configuracoes.ARQUIVO_CONFIG = arquivo_config
+    controller._armazenamentos.clear()
+    try:
+        yield
+    finally:
+        (controller.DATA_DIR, controller.FILE_VEICULOS, controller.FILE_MOTORISTAS,
+         controller.FILE_VIAGENS, configuracoes.ARQUIVO_CONFIG) = anteriores
+        controller._armazenamentos.clear()
+
+
+def executar(veiculos=1000, backend="json", semente=42, repeticoes=50, repeticoes_pesadas=3,
+             tempo_max=10.0, com_memoria=True, filtro=None, pasta=None) -> dict:
+    pasta_temporaria = pasta is None
+    pasta = pasta or tempfile.mkdtemp(prefix="bench_frota_")
+    try:
+        inicio = time.perf_counter()
+        frota = gerar_frota(veiculos, semente=semente)
+        gravar_frota(frota, armazenamento_da_pasta(pasta, backend))
+        tempo_geracao = time.perf_counter() - inicio
+
+        resultados = {}
+        with _controller_em(pasta, backend):
+            for nome, funcao, pesada in operacoes(frota):
+                if filtro and filtro not in nome: continue
+                resultados[nome] = medir(funcao, repeticoes_pesadas if pesada else repeticoes, tempo_max, com_memoria)
+    finally:
+        if pasta_temporaria: shutil.rmtree(pasta, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": _commit_atual(),
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "backend": backend,
+            "semente": semente,
+            "frota": resumo_frota(frota),
+            "tempo_geracao_s": tempo_geracao,
+        },
+        "resultados": resultados,
+    }
+
+
+def exibir(resultado, base=None):
+    print(f"{'OPERAÇÃO':<36} | {'OPS/S':>10} | {'P50 ms':>9} | {'P99 ms':>9} | {'PICO MB':>8}" + (" | VS BASE" if base else ""))
+    print("-" * (84 + (10 if base else 0)))
+    for nome, r in resultado["resultados"].items():
+        pico = f"{r['pico_memoria_bytes'] / 2**20:>8.1f}" if r["pico_memoria_bytes"] is not None else f"{'-':>8}"
+        linha = f"{nome:<36} | {r['ops_por_segundo']:>10.1f} | {r['p50_ms']:>9.2f} | {r['p99_ms']:>9.2f} | {pico}"
+        if base and nome in base["resultados"]:
+            # >1 = mais lento que a base (razão entre os p50).
+            linha += f" | {r['p50_ms'] / base['resultados'][nome]['p50_ms']:>6.2f}x"
+        print(linha)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--veiculos", type=int, default=1000)
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=50, help="Chamadas por operação leve")
+    parser.add_argument("--repeticoes-pesadas", type=int, default=3, help="Chamadas por operação que varre a frota")
+    parser.add_argument("--tempo-max", type=float, default=10.0, help="Segundos máximos por operação")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede o pico de memória (mais rápido)")
+    parser.add_argument("--operacao", help="Roda só as operações cujo nome contém este texto")
+    parser.add_argument("--saida", default="bench_controller.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar os p50")
+    args = parser.parse_args()
+
+    resultado = executar(args.veiculos, args.backend, args.semente, args.repeticoes, args.repeticoes_pesadas,
+                         args.tempo_max, not args.sem_memoria, args.operacao)
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+    exibir(resultado, base)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=4, ensure_ascii=False)
+    print(f"\nResultados gravados em {args.saida}.")
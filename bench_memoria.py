@@ -0,0 +1,86 @@
+"""
+Mede a memória por registro de histórico (manutenções e abastecimentos)
+em cada representação: objetos com __dict__ (formato anterior), objetos com
+__slots__ e histórico colunar.
+
+    python bench_memoria.py [--registros 200000]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from models import (
+    Manutencao, Abastecimento, HistoricoManutencoes, HistoricoAbastecimentos,
+    ManutencaoBasica, ManutencaoCorretiva
+)
+
+
+class _ManutencaoComDict:
+    """Representação anterior: __dict__ por registro e uma estratégia alocada por manutenção."""
+
+    def __init__(self, data, tipo, custo_base, descricao):
+        self.data = data
+        self.tipo = tipo
+        self.descricao = descricao
+        self.custo_base = float(custo_base)
+        self.estrategia = ManutencaoCorretiva() if tipo == "corretiva" else ManutencaoBasica()
+        self.custo_final = self.estrategia.calcular_custo(self.custo_base)
+
+
+class _AbastecimentoComDict:
+    def __init__(self, data, combustivel, litros, valor):
+        self.data = data
+        self.combustivel = combustivel
+        self.litros = float(litros)
+        self.valor = float(valor)
+
+
+def _dicts(n):
+    manutencoes = [{"data": f"{1 + i % 28:02d}/01/2025", "tipo": ("preventiva", "corretiva")[i % 2],
+                    "custo_base": 100.0 + i, "custo_final": 100.0 + i, "descricao": "revisão"} for i in range(n)]
+    abastecimentos = [{"data": f"{1 + i % 28:02d}/01/2025", "combustivel": "diesel",
+                       "litros": 40.0 + i % 10, "valor": 250.0 + i} for i in range(n)]
+    return manutencoes, abastecimentos
+
+
+def _medir(construir):
+    gc.collect()
+    tracemalloc.start()
+    objeto = construir()
+    atual = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objeto
+    return atual
+
+
+def medir(n):
+    manutencoes, abastecimentos = _dicts(n)
+    cenarios = {
+        "__dict__ (anterior)": (
+            lambda: [_ManutencaoComDict(m["data"], m["tipo"], m["custo_base"], m["descricao"]) for m in manutencoes],
+            lambda: [_AbastecimentoComDict(a["data"], a["combustivel"], a["litros"], a["valor"]) for a in abastecimentos],
+        ),
+        "__slots__": (
+            lambda: [Manutencao.from_dict(m) for m in manutencoes],
+            lambda: [Abastecimento.from_dict(a) for a in abastecimentos],
+        ),
+        "colunar": (
+            lambda: HistoricoManutencoes.from_dicts(manutencoes),
+            lambda: HistoricoAbastecimentos.from_dicts(abastecimentos),
+        ),
+    }
+    return {
+        nome: {"manutencao": _medir(m) / n, "abastecimento": _medir(a) / n}
+        for nome, (m, a) in cenarios.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registros", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'REPRESENTAÇÃO':<22} | {'BYTES/MANUTENÇÃO':>17} | {'BYTES/ABASTECIMENTO':>20}")
+    print("-" * 66)
+    for nome, r in medir(args.registros).items():
+        print(f"{nome:<22} | {r['manutencao']:>17.1f} | {r['abastecimento']:>20.1f}")
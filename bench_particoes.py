@@ -0,0 +1,64 @@
+"""
+Relatórios de custos e de eficiência com os veículos divididos em partições
+(ArmazenamentoParticionado), calculados por map-reduce com 1, 2, 4... processos,
+comparados com o arquivo único. Cada medição abre o backend do zero, como
+uma execução nova do CLI (nenhuma partição carregada).
+
+    python bench_particoes.py [--veiculos 100000] [--particoes 8] [--processos 1,2,4,8]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from armazenamento import ArmazenamentoJSON, ArmazenamentoParticionado
+from gerador_frota import gerar_frota
+
+
+def _abrir(pasta, particoes=1, processos=1):
+    arquivos = [os.path.join(pasta, nome) for nome in ("veiculos.json", "motoristas.json", "viagens.json")]
+    if particoes == 1: return ArmazenamentoJSON(*arquivos)
+    return ArmazenamentoParticionado(*arquivos, particoes, processos)
+
+
+def _medir(pasta, particoes, processos, repeticoes):
+    tempos = {}
+    for relatorio in ("relatorio_custos", "relatorio_eficiencia"):
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            arm = _abrir(pasta, particoes, processos)
+            inicio = time.perf_counter()
+            getattr(arm, relatorio)()
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[relatorio] = melhor
+    return tempos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--veiculos", type=int, default=100000)
+    parser.add_argument("--particoes", type=int, default=8)
+    parser.add_argument("--processos", default="1,2,4,8")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_particoes_")
+    try:
+        frota = gerar_frota(args.veiculos)
+        with _abrir(pasta).transacao() as arm:
+            arm.salvar_veiculos(frota["veiculos"])
+        del frota
+        _abrir(pasta, args.particoes)  # divide o veiculos.json nas partições
+
+        print(f"{args.veiculos} veículos, {args.particoes} partições, {os.cpu_count()} CPU(s)")
+        print(f"{'LAYOUT':<22} | {'CUSTOS s':>9} | {'EFICIÊNCIA s':>12}")
+        print("-" * 50)
+        base = _medir(pasta, 1, 1, args.repeticoes)
+        print(f"{'arquivo único':<22} | {base['relatorio_custos']:>9.2f} | {base['relatorio_eficiencia']:>12.2f}")
+        for processos in (int(p) for p in args.processos.split(",")):
+            t = _medir(pasta, args.particoes, processos, args.repeticoes)
+            print(f"{f'partições, {processos} proc.':<22} | {t['relatorio_custos']:>9.2f} | "
+                  f"{t['relatorio_eficiencia']:>12.2f}   ({base['relatorio_eficiencia'] / t['relatorio_eficiencia']:.1f}x)")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
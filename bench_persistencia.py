@@ -0,0 +1,65 @@
+"""
+Mede N abastecimentos consecutivos pelo controller (cada um é uma transação)
+em cada modo de durabilidade do settings.json ("persistencia.durabilidade").
+
+    python bench_persistencia.py [--operacoes 10000] [--veiculos 1000] [--modos por_operacao,grupo,nenhum]
+
+No modo por_operacao cada abastecimento regrava veiculos.json; o tempo das
+operações restantes é estimado pela média das primeiras (--amostra).
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import controller
+from bench_controller import _controller_em
+from gerador_frota import gerar_frota, gravar_frota, armazenamento_da_pasta
+
+
+def _pasta_com_frota(frota):
+    pasta = tempfile.mkdtemp(prefix="bench_persistencia_")
+    gravar_frota(frota, armazenamento_da_pasta(pasta))
+    return pasta
+
+
+def medir_modo(frota, durabilidade, operacoes, amostra=None, intervalo_ms=200, max_operacoes=500) -> dict:
+    placas = [v.placa for v in frota["veiculos"]]
+    pasta = _pasta_com_frota(frota)
+    persistencia = {"durabilidade": durabilidade, "intervalo_ms": intervalo_ms, "max_operacoes": max_operacoes}
+    try:
+        with _controller_em(pasta, "json", persistencia):
+            executadas = min(operacoes, amostra or operacoes)
+            inicio = time.perf_counter()
+            for k in range(executadas):
+                controller.registrar_abastecimento_controller(placas[k % len(placas)], "15/06/2025",
+                                                              "Gasolina", "30", "180")
+            controller.descarregar_armazenamentos()
+            duracao = time.perf_counter() - inicio
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return {
+        "durabilidade": durabilidade,
+        "executadas": executadas,
+        "segundos": duracao,
+        "estimado_total_s": duracao / executadas * operacoes,
+        "ops_por_segundo": executadas / duracao,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operacoes", type=int, default=10_000)
+    parser.add_argument("--veiculos", type=int, default=1000)
+    parser.add_argument("--modos", default="por_operacao,grupo,nenhum")
+    parser.add_argument("--amostra", type=int, default=200, help="Operações medidas no modo por_operacao")
+    args = parser.parse_args()
+
+    frota = gerar_frota(args.veiculos)
+    print(f"{args.operacoes} abastecimentos, frota de {args.veiculos} veículos")
+    print(f"{'DURABILIDADE':<14} | {'MEDIDAS':>8} | {'OPS/S':>9} | {'TOTAL (s)':>10}")
+    print("-" * 50)
+    for modo in args.modos.split(","):
+        r = medir_modo(frota, modo, args.operacoes, args.amostra if modo == "por_operacao" else None)
+        estimado = "~" if r["executadas"] < args.operacoes else ""
+        print(f"{modo:<14} | {r['executadas']:>8} | {r['ops_por_segundo']:>9.0f} | {estimado}{r['estimado_total_s']:>9.1f}")
@@ -0,0 +1,77 @@
+"""
+Compara o JSON indentado com o snapshot binário (snapshot.py) na carga
+inicial de veículos e motoristas: tamanho em disco, tempo de gravação e
+tempo de carga (leitura do arquivo + objetos de domínio prontos).
+
+    python bench_snapshot.py [--veiculos 10000,100000] [--repeticoes 3]
+"""
+import argparse
+import gc
+import os
+import shutil
+import tempfile
+import time
+
+from models import Veiculo, Motorista
+from repositorio import RepositorioJSON, normalizar_placa, normalizar_cpf
+from snapshot import RepositorioSnapshot
+from gerador_frota import gerar_frota
+
+
+def _repositorios(pasta, formato):
+    if formato == "binario":
+        return (RepositorioSnapshot(os.path.join(pasta, "veiculos.snap"), "veiculos"),
+                RepositorioSnapshot(os.path.join(pasta, "motoristas.snap"), "motoristas"))
+    return (RepositorioJSON(os.path.join(pasta, "veiculos.json"), Veiculo.from_dict, lambda v: normalizar_placa(v.placa)),
+            RepositorioJSON(os.path.join(pasta, "motoristas.json"), Motorista.from_dict, lambda m: normalizar_cpf(m.cpf)))
+
+
+def _melhor_tempo(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def medir(frota, formato, repeticoes=3) -> dict:
+    pasta = tempfile.mkdtemp(prefix="bench_snapshot_")
+    try:
+        veiculos, motoristas = _repositorios(pasta, formato)
+        inicio = time.perf_counter()
+        veiculos.gravar(frota["veiculos"], sincronizar=False)
+        motoristas.gravar(frota["motoristas"], sincronizar=False)
+        gravacao = time.perf_counter() - inicio
+
+        def carregar():
+            v, m = _repositorios(pasta, formato)
+            return v.listar(), m.listar()
+
+        return {
+            "formato": formato,
+            "bytes": os.path.getsize(veiculos.arquivo) + os.path.getsize(motoristas.arquivo),
+            "gravacao_s": gravacao,
+            "carga_s": _melhor_tempo(carregar, repeticoes),
+        }
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--veiculos", default="10000,100000")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'VEÍCULOS':>9} | {'FORMATO':<8} | {'TAMANHO MB':>10} | {'GRAVAÇÃO s':>10} | {'CARGA s':>8}")
+    print("-" * 58)
+    for n in (int(x) for x in args.veiculos.split(",")):
+        frota = gerar_frota(n)
+        resultados = [medir(frota, formato, args.repeticoes) for formato in ("json", "binario")]
+        for r in resultados:
+            print(f"{n:>9} | {r['formato']:<8} | {r['bytes'] / 1e6:>10.1f} | {r['gravacao_s']:>10.2f} | {r['carga_s']:>8.3f}")
+        print(f"{'':>9}   carga {resultados[0]['carga_s'] / resultados[1]['carga_s']:.1f}x mais rápida, "
+              f"arquivo {resultados[0]['bytes'] / resultados[1]['bytes']:.1f}x menor")
+        del frota
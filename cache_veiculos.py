@@ -0,0 +1,357 @@
+import json
+import os
+from collections import OrderedDict
+
+from models import Veiculo
+from repositorio import ConflitoVersaoError, normalizar_placa
+from snapshot import EscritorColunas, LeitorColunas, SnapshotInvalidoError
+from trava import gravar_atomico
+import instrumentacao
+
+# O índice é regravado quando os registros ainda não cobertos por ele passam de
+# max(GRAVAR_INDICE_A_CADA, 1/8 dos cobertos); ao abrir, só essa cauda é lida.
+GRAVAR_INDICE_A_CADA = 1000
+# Compacta quando o arquivo passa de COMPACTAR_ACIMA x os bytes vivos (e de 1 MB).
+COMPACTAR_ACIMA = 2
+COMPACTAR_MINIMO = 2**20
+
+
+class ArmazemVeiculos:
+    """
+    Veículos em um arquivo JSONL só de anexação (uma versão do veículo por
+    linha, a última vale), com índice placa -> (offset, tamanho) em memória,
+    gravado em <arquivo>.idx no layout colunar do snapshot.py. Ler um
+    veículo é um seek + uma linha; o arquivo é compactado quando as versões
+    antigas passam a dominar.
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.arquivo_indice = arquivo + ".idx"
+        self._indice = {}  # placa normalizada -> (offset, tamanho); ordem = ordem de cadastro
+        self._coberto = 0  # bytes do arquivo refletidos em _indice
+        self._inode = None
+        self._registros_sem_indice = 0
+        self._indice_gravado = 0
+        self.alteradas = set()  # placas gravadas por outros processos, até o repositório consumi-las
+
+    def __len__(self):
+        return len(self._indice)
+
+    def existe(self) -> bool:
+        return os.path.exists(self.arquivo)
+
+    def __contains__(self, placa):
+        return placa in self._indice
+
+    def _estado_arquivo(self):
+        try:
+            st = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return None, 0
+        return st.st_ino, st.st_size
+
+    def _carregar_indice(self, inode):
+        self._indice, self._coberto, self._inode = {}, 0, inode
+        try:
+            with open(self.arquivo_indice, "rb") as f:
+                leitor = LeitorColunas(f.read())
+            if leitor.entidade != b"K" or leitor.numeros("inode")[0] != (inode or 0): return
+            self._indice = dict(zip(leitor.textos("placa"), zip(leitor.numeros("offset"), leitor.numeros("tamanho"))))
+            self._coberto = leitor.numeros("coberto")[0]
+            self._indice_gravado = len(self._indice)
+        except (FileNotFoundError, SnapshotInvalidoError):
+            pass
+
+    def atualizar(self):
+        """Acompanha as gravações de outros processos (placas acumuladas em `alteradas`)."""
+        inode, tamanho = self._estado_arquivo()
+        alteradas = self.alteradas
+        if inode != self._inode or tamanho < self._coberto:  # compactado ou recriado
+            alteradas.update(self._indice)
+            self._carregar_indice(inode)
+            alteradas.update(self._indice)
+        if tamanho > self._coberto:
+            with open(self.arquivo, "rb") as f:
+                f.seek(self._coberto)
+                cauda = f.read(tamanho - self._coberto)
+            instrumentacao.contar_leitura(len(cauda))
+            offset = self._coberto
+            for linha in cauda.splitlines(keepends=True):
+                if not linha.endswith(b"\n"): break  # gravação em andamento (ou interrompida)
+                placa = json.loads(linha)["placa"]
+                self._indice[placa] = (offset, len(linha))
+                alteradas.add(placa)
+                offset += len(linha)
+                self._registros_sem_indice += 1
+            self._coberto = offset
+
+    def tamanho(self, placa) -> int:
+        return self._indice[placa][1]
+
+    def ler(self, placa):
+        posicao = self._indice.get(placa)
+        if posicao is None: return None
+        with open(self.arquivo, "rb") as f:
+            f.seek(posicao[0])
+            linha = f.read(posicao[1])
+        instrumentacao.contar_leitura(len(linha))
+        return Veiculo.from_dict(json.loads(linha)["veiculo"])
+
+    def iterar(self):
+        """Todos os veículos em ordem de cadastro, lidos um a um (nenhum fica retido aqui)."""
+        with open(self.arquivo, "rb") as f:
+            for offset, tamanho in list(self._indice.values()):
+                f.seek(offset)
+                yield Veiculo.from_dict(json.loads(f.read(tamanho))["veiculo"])
+
+    @staticmethod
+    def _linha(placa, veiculo) -> bytes:
+        return (json.dumps({"placa": placa, "veiculo": veiculo.to_dict()}, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def anexar(self, veiculos: dict, sincronizar=True):
+        """Grava uma nova versão de cada veículo ({placa: veiculo}); chamar com a trava e o índice em dia."""
+        if not veiculos: return
+        pasta = os.path.dirname(self.arquivo)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        with open(self.arquivo, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            if offset != self._coberto: raise ConflitoVersaoError(f"{self.arquivo} foi alterado por outro processo.")
+            for placa, veiculo in veiculos.items():
+                linha = self._linha(placa, veiculo)
+                f.write(linha)
+                self._indice[placa] = (offset, len(linha))
+                offset += len(linha)
+            if sincronizar:
+                f.flush()
+                os.fsync(f.fileno())
+        instrumentacao.contar_escrita(offset - self._coberto)
+        self._coberto = offset
+        self._inode = self._estado_arquivo()[0]
+        self._registros_sem_indice += len(veiculos)
+        self._manter(sincronizar)
+
+    def _manter(self, sincronizar):
+        vivos = sum(tamanho for _, tamanho in self._indice.values())
+        if self._coberto > max(COMPACTAR_MINIMO, COMPACTAR_ACIMA * vivos):
+            self.reescrever(self.iterar(), sincronizar)
+        elif self._registros_sem_indice >= max(GRAVAR_INDICE_A_CADA, self._indice_gravado // 8):
+            self.gravar_indice(sincronizar)
+
+    def reescrever(self, veiculos, sincronizar=True):
+        """Novo arquivo só com os veículos dados (substituição da frota ou compactação)."""
+        linhas, indice, offset = [], {}, 0
+        for v in veiculos:
+            placa = normalizar_placa(v.placa)
+            linha = self._linha(placa, v)
+            linhas.append(linha)
+            indice[placa] = (offset, len(linha))
+            offset += len(linha)
+        gravar_atomico(self.arquivo, b"".join(linhas), sincronizar)
+        self._indice, self._coberto, self._inode = indice, offset, self._estado_arquivo()[0]
+        self.gravar_indice(sincronizar)
+
+    def gravar_indice(self, sincronizar=True):
+        escritor = EscritorColunas(b"K", len(self._indice))
+        escritor.numeros("inode", "q", [self._inode or 0])
+        escritor.numeros("coberto", "q", [self._coberto])
+        escritor.textos("placa", list(self._indice))
+        escritor.numeros("offset", "q", [o for o, _ in self._indice.values()])
+        escritor.numeros("tamanho", "q", [t for _, t in self._indice.values()])
+        gravar_atomico(self.arquivo_indice, escritor.conteudo(), sincronizar)
+        self._registros_sem_indice = 0
+        self._indice_gravado = len(self._indice)
+
+
+class RepositorioCache:
+    """
+    Mesma interface do RepositorioJSON para os veículos, mas só um conjunto
+    limitado deles fica em memória: cache LRU sobre o ArmazemVeiculos, com
+    limite de entradas e/ou de bytes (tamanho do registro em disco, como
+    estimativa). Faltas leem o veículo do disco pelo índice. Alterados ficam
+    marcados e são gravados no commit ou ao sair do cache. Os alterados na
+    transação aberta não saem (o cache pode passar do limite até o commit).
+    """
+
+    def __init__(self, arquivo, trava, max_entradas=1000, max_bytes=0):
+        self.armazem = ArmazemVeiculos(arquivo)
+        self.arquivo = arquivo
+        self.trava = trava
+        self.max_entradas = int(max_entradas)
+        self.max_bytes = int(max_bytes)
+        self.geracao = 0
+        self._entradas = OrderedDict()  # placa -> veículo, do menos ao mais recente
+        self._bytes = 0
+        self._tamanhos = {}
+        self._sujos = set()
+        self._retidos = set()  # alterados desde o último commit
+        self._substituta = None  # frota inteira trocada por `substituir`, até o próximo `gravar`
+        self.acertos = self.faltas = self.despejos = self.gravados_no_despejo = 0
+
+    @property
+    def alteracoes_pendentes(self):
+        return bool(self._sujos) or self._substituta is not None
+
+    def estatisticas(self) -> dict:
+        consultas = self.acertos + self.faltas
+        return {
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "despejos": self.despejos,
+            "gravados_no_despejo": self.gravados_no_despejo,
+            "entradas": len(self._entradas),
+            "bytes": self._bytes,
+            "max_entradas": self.max_entradas,
+            "max_bytes": self.max_bytes,
+            "veiculos_no_disco": len(self.armazem),
+        }
+
+    # --- Entradas ---
+
+    def _inserir(self, placa, veiculo, tamanho):
+        if placa in self._entradas: self._bytes -= self._tamanhos[placa]
+        self._entradas[placa] = veiculo
+        self._entradas.move_to_end(placa)
+        self._tamanhos[placa] = tamanho
+        self._bytes += tamanho
+        self._despejar()
+
+    def _retirar(self, placa):
+        del self._entradas[placa]
+        self._bytes -= self._tamanhos.pop(placa)
+        self._sujos.discard(placa)
+
+    def _limpar(self):
+        self._entradas.clear()
+        self._tamanhos.clear()
+        self._bytes = 0
+        self._sujos.clear()
+        self._retidos.clear()
+        self._substituta = None
+        self.geracao += 1
+
+    def _acima_do_limite(self) -> bool:
+        return (0 < self.max_entradas < len(self._entradas)) or (0 < self.max_bytes < self._bytes)
+
+    def _despejar(self):
+        if not self._acima_do_limite(): return
+        entradas, total = len(self._entradas), self._bytes
+        vitimas = []
+        for placa in self._entradas:
+            if (self.max_entradas <= 0 or entradas <= self.max_entradas) and \
+                    (self.max_bytes <= 0 or total <= self.max_bytes): break
+            if placa in self._retidos: continue
+            vitimas.append(placa)
+            entradas -= 1
+            total -= self._tamanhos[placa]
+        # Os alterados que saem são gravados juntos, em uma só anexação.
+        sujos = [p for p in vitimas if p in self._sujos]
+        if sujos: self._gravar_entradas(sujos)
+        self.gravados_no_despejo += len(sujos)
+        self.despejos += len(vitimas)
+        for placa in vitimas: self._retirar(placa)
+
+    def _gravar_entradas(self, placas, sincronizar=True):
+        with self.trava:
+            self.armazem.atualizar()
+            conflitos = [p for p in placas if p in self.armazem.alteradas]
+            if conflitos:
+                raise ConflitoVersaoError(f"{self.arquivo}: {', '.join(conflitos[:5])} alterado(s) por outro "
+                                          f"processo com gravações pendentes aqui.")
+            self.armazem.anexar({p: self._entradas[p] for p in placas}, sincronizar)
+
+    # --- Interface do repositório ---
+
+    def sincronizar(self):
+        if self._substituta is not None: return  # a frota inteira será regravada
+        with self.trava:
+            self.armazem.atualizar()
+        alteradas = self.armazem.alteradas
+        if not alteradas: return
+        conflitos = [p for p in alteradas if p in self._sujos]
+        if conflitos:
+            raise ConflitoVersaoError(f"{self.arquivo}: {', '.join(conflitos[:5])} alterado(s) por outro processo "
+                                      f"com gravações pendentes aqui.")
+        for placa in alteradas:
+            if placa in self._entradas: self._retirar(placa)
+        alteradas.clear()
+        self.geracao += 1
+
+    def buscar(self, chave):
+        self.sincronizar()
+        veiculo = self._entradas.get(chave)
+        if veiculo is None and self._substituta is not None: veiculo = self._substituta.get(chave)
+        if veiculo is not None:
+            if chave in self._entradas: self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return veiculo
+        self.faltas += 1
+        if self._substituta is not None: return None
+        veiculo = self.armazem.ler(chave)
+        if veiculo is not None: self._inserir(chave, veiculo, self.armazem.tamanho(chave))
+        return veiculo
+
+    def _novos(self, existentes) -> list:
+        return [v for p, v in self._entradas.items() if p not in existentes]
+
+    def listar(self) -> list:
+        """Frota inteira (os do cache + os demais lidos do disco, sem entrar no cache): use só em relatórios."""
+        self.sincronizar()
+        if self._substituta is not None:
+            return list(self._substituta.values()) + self._novos(self._substituta)
+        with self.trava:
+            veiculos = [self._entradas.get(normalizar_placa(v.placa), v) for v in self.armazem.iterar()]
+        return veiculos + self._novos(self.armazem)
+
+    def adicionar(self, item):
+        self.sincronizar()
+        self.marcar_alterado(item)
+
+    def marcar_alterado(self, item=None):
+        if item is None:
+            self._sujos.update(self._entradas)
+            self._retidos.update(self._entradas)
+            return
+        placa = normalizar_placa(item.placa)
+        if self._substituta is not None and placa in self._substituta: return  # regravado com a frota
+        self._sujos.add(placa)
+        self._retidos.add(placa)
+        if self._entradas.get(placa) is not item: self._inserir(placa, item, self._tamanhos.get(placa, 0))
+
+    def substituir(self, itens):
+        """Troca a frota inteira: gravada de uma vez (arquivo novo) no próximo `gravar`."""
+        self._limpar()
+        self._substituta = {normalizar_placa(v.placa): v for v in itens}
+
+    def confirmar(self):
+        """Fim da transação: os alterados continuam pendentes (write-behind), mas já podem sair do cache."""
+        self._retidos.clear()
+        self._despejar()
+
+    def gravar(self, sincronizar=True):
+        with self.trava:
+            if self._substituta is not None:
+                self.armazem.reescrever(list(self._substituta.values()) + self._novos(self._substituta), sincronizar)
+                self._substituta = None
+                self.armazem.alteradas.clear()
+                self._sujos.clear()
+            elif self._sujos:
+                self._gravar_entradas([p for p in self._entradas if p in self._sujos], sincronizar)
+        for placa in self._sujos:
+            self._bytes += self.armazem.tamanho(placa) - self._tamanhos[placa]
+            self._tamanhos[placa] = self.armazem.tamanho(placa)
+        self._sujos.clear()
+        self._retidos.clear()
+        self._despejar()
+
+    def invalidar(self):
+        """Descarta as alterações em memória (transação desfeita)."""
+        self._limpar()
+
+    def migrar_de(self, repositorio):
+        """Importa o veiculos.json (uma vez, sem apagá-lo) se o armazém ainda não existe."""
+        if self.armazem.existe() or not os.path.exists(repositorio.arquivo): return False
+        self.armazem.reescrever(repositorio.listar())
+        return True
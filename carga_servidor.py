@@ -0,0 +1,171 @@
+"""
+Teste de carga do servidor.py: muitos clientes simultâneos (conexões
+keep-alive) misturando consultas e viagens. Sem --porta, sobe uma instância
+local em uma pasta temporária com uma frota sintética (gerador_frota).
+
+    python carga_servidor.py [--clientes 200] [--segundos 10] [--veiculos 2000] [--backend sqlite]
+    python carga_servidor.py --porta 8080   # contra um servidor já no ar
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import configuracoes
+from gerador_frota import gerar_frota, gravar_frota, armazenamento_da_pasta
+
+# (operação, peso)
+MISTURA = (("buscar_veiculo", 60), ("buscar_motorista", 10), ("registrar_viagem", 20),
+           ("proximas_revisoes", 5), ("ultimas_viagens", 5))
+
+
+async def requisitar(reader, writer, metodo, caminho, corpo=None):
+    """Uma requisição em uma conexão keep-alive já aberta; devolve (status, json)."""
+    dados = json.dumps(corpo).encode("utf-8") if corpo is not None else b""
+    writer.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: frota\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(dados)}\r\n\r\n".encode("latin-1") + dados)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    cabecalhos = {}
+    while True:
+        linha = await reader.readline()
+        if linha in (b"\r\n", b""): break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    resposta = await reader.readexactly(int(cabecalhos.get("content-length", 0)))
+    return status, json.loads(resposta) if resposta else None
+
+
+def _percentil(ordenadas, p):
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+
+async def _cliente(host, porta, fim, rnd, placas, cpfs, cpf_universal, latencias, erros):
+    reader, writer = await asyncio.open_connection(host, porta)
+    nomes, pesos = zip(*MISTURA)
+    try:
+        while time.perf_counter() < fim:
+            operacao = rnd.choices(nomes, pesos)[0]
+            if operacao == "buscar_veiculo":
+                args = ("GET", f"/veiculos/{rnd.choice(placas)}")
+            elif operacao == "buscar_motorista":
+                args = ("GET", f"/motoristas/{rnd.choice(cpfs)}")
+            elif operacao == "registrar_viagem":
+                args = ("POST", "/viagens", {"cpf": cpf_universal, "placa": rnd.choice(placas),
+                                             "destino": "Carga", "distancia": round(rnd.uniform(1, 50), 1)})
+            elif operacao == "proximas_revisoes":
+                args = ("GET", "/revisoes?n=10")
+            else:
+                args = ("GET", "/viagens/ultimas?n=20")
+            inicio = time.perf_counter()
+            status, _ = await requisitar(reader, writer, *args)
+            latencias.setdefault(operacao, []).append(time.perf_counter() - inicio)
+            if status >= 400: erros[operacao] = erros.get(operacao, 0) + 1
+    finally:
+        writer.close()
+
+
+async def executar_carga(host, porta, clientes=200, segundos=10.0, semente=1) -> dict:
+    reader, writer = await asyncio.open_connection(host, porta)
+    _, veiculos = await requisitar(reader, writer, "GET", "/veiculos")
+    _, motoristas = await requisitar(reader, writer, "GET", "/motoristas")
+    writer.close()
+    placas = [v["placa"] for v in veiculos if v["status"] == "Ativo"]
+    cpfs = [m["cpf"] for m in motoristas]
+    # Motorista que dirige qualquer tipo (o gerador sempre cria o primeiro com AE).
+    cpf_universal = next((m["cpf"] for m in motoristas if m["categoria_cnh"] == "AE"), cpfs[0])
+
+    latencias, erros = {}, {}
+    inicio = time.perf_counter()
+    fim = inicio + segundos
+    await asyncio.gather(*(
+        _cliente(host, porta, fim, random.Random(semente + i), placas, cpfs, cpf_universal, latencias, erros)
+        for i in range(clientes)
+    ))
+    duracao = time.perf_counter() - inicio
+
+    resultado = {"clientes": clientes, "segundos": duracao, "operacoes": {}}
+    total = 0
+    for operacao, amostras in latencias.items():
+        amostras.sort()
+        total += len(amostras)
+        resultado["operacoes"][operacao] = {
+            "requisicoes": len(amostras),
+            "erros": erros.get(operacao, 0),
+            "p50_ms": _percentil(amostras, 50) * 1000,
+            "p99_ms": _percentil(amostras, 99) * 1000,
+        }
+    resultado["requisicoes_por_segundo"] = total / duracao
+    return resultado
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def subir_instancia_local(pasta, veiculos, backend):
+    """Grava uma frota sintética em pasta/data e inicia servidor.py com a pasta como diretório de trabalho."""
+    gravar_frota(gerar_frota(veiculos), armazenamento_da_pasta(os.path.join(pasta, "data"), backend))
+    configuracao = dict(configuracoes.carregar_configuracoes())
+    configuracao["armazenamento"] = {"backend": backend, "arquivo_sqlite": "frota.db"}
+    with open(os.path.join(pasta, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump(configuracao, f)
+
+    porta = _porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor.py"), "--porta", str(porta)],
+        cwd=pasta, stdout=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=0.5).close()
+            return processo, porta
+        except OSError:
+            if processo.poll() is not None: raise RuntimeError("O servidor encerrou ao iniciar.")
+            time.sleep(0.1)
+    processo.kill()
+    raise RuntimeError("O servidor não respondeu em 60 s.")
+
+
+def exibir(resultado):
+    print(f"{resultado['clientes']} clientes, {resultado['segundos']:.1f} s, "
+          f"{resultado['requisicoes_por_segundo']:.0f} requisições/s")
+    print(f"{'OPERAÇÃO':<20} | {'REQS':>8} | {'ERROS':>6} | {'P50 ms':>8} | {'P99 ms':>8}")
+    print("-" * 62)
+    for nome, r in resultado["operacoes"].items():
+        print(f"{nome:<20} | {r['requisicoes']:>8} | {r['erros']:>6} | {r['p50_ms']:>8.2f} | {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, help="Servidor já no ar (sem esta opção, sobe uma instância local)")
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--veiculos", type=int, default=2000, help="Tamanho da frota da instância local")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args()
+
+    processo = pasta = None
+    porta = args.porta
+    try:
+        if porta is None:
+            pasta = tempfile.mkdtemp(prefix="carga_frota_")
+            processo, porta = subir_instancia_local(pasta, args.veiculos, args.backend)
+        exibir(asyncio.run(executar_carga(args.host, porta, args.clientes, args.segundos)))
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+        if pasta is not None: shutil.rmtree(pasta, ignore_errors=True)
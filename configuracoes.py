@@ -0,0 +1,25 @@
+import os
+import json
+
+ARQUIVO_CONFIG = "settings.json"
+
+_cache = {}
+
+
+def carregar_configuracoes() -> dict:
+    """Lê o settings.json (relido apenas quando o arquivo muda)."""
+    try:
+        st = os.stat(ARQUIVO_CONFIG)
+    except FileNotFoundError:
+        return {}
+
+    assinatura = (ARQUIVO_CONFIG, st.st_mtime_ns, st.st_size)
+    if _cache.get("assinatura") != assinatura:
+        with open(ARQUIVO_CONFIG, "r", encoding="utf-8") as f:
+            _cache["dados"] = json.load(f)
+        _cache["assinatura"] = assinatura
+    return _cache["dados"]
+
+
+def secao(nome: str) -> dict:
+    return carregar_configuracoes().get(nome, {})
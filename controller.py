@@ -1,72 +1,119 @@
 import os
 import json
 from models import (
-    Veiculo, Motorista, Viagem, Carro, Moto, Caminhao, 
-    Manutencao, Abastecimento, AlocacaoInvalidaError, ManutencaoInvalidaError
+    Veiculo, Motorista, Viagem, Carro, Moto, Caminhao,
+    Manutencao, Abastecimento, AlocacaoInvalidaError, ManutencaoInvalidaError,
+    ordinal_da_data, data_do_ordinal, intervalo_mes, configurar_regras_custo
 )
+from repositorio import normalizar_placa, normalizar_cpf
+from armazenamento import ArmazenamentoJSON, ArmazenamentoSQLite, ArmazenamentoParticionado, ArmazenamentoCache
+import configuracoes
+import importacao
+import alocacao
+from listagem import ORDENACOES
+from anomalias import DetectorAnomalias, DiarioAlertas
+import instrumentacao
 
 DATA_DIR = "data"
 FILE_VEICULOS = os.path.join(DATA_DIR, "veiculos.json")
 FILE_MOTORISTAS = os.path.join(DATA_DIR, "motoristas.json")
 FILE_VIAGENS = os.path.join(DATA_DIR, "viagens.json")
 
+_armazenamentos = {}
+
+def obter_armazenamento():
+    """
+    Backend escolhido em settings.json ("armazenamento.backend": "json" ou "sqlite";
+    no backend json, "armazenamento.formato": "json" ou "binario" para veículos e motoristas,
+    "armazenamento.particoes" > 1 divide os veículos em arquivos por placa e
+    "armazenamento.cache_max_entradas" / "cache_max_mb" > 0 mantêm só parte deles em memória).
+    """
+    Veiculo.historico_colunar = bool(configuracoes.secao("historico").get("colunar", False))
+    configurar_regras_custo(configuracoes.secao("regras_custo"))
+    config = configuracoes.secao("armazenamento")
+    if config.get("backend", "json") == "sqlite":
+        chave = ("sqlite", os.path.join(DATA_DIR, config.get("arquivo_sqlite", "frota.db")))
+    else:
+        chave = ("json", FILE_VEICULOS, FILE_MOTORISTAS, FILE_VIAGENS, config.get("formato", "json"),
+                 int(config.get("particoes", 1)), int(config.get("processos", 0)),
+                 int(config.get("cache_max_entradas", 0)), int(float(config.get("cache_max_mb", 0)) * 2**20))
+
+    arm = _armazenamentos.get(chave)
+    if arm is None or not arm.valido():
+        if chave[0] == "sqlite": arm = ArmazenamentoSQLite(chave[1])
+        elif chave[5] > 1: arm = ArmazenamentoParticionado(*chave[1:4], chave[5], chave[6], formato=chave[4])
+        elif chave[7] or chave[8]: arm = ArmazenamentoCache(*chave[1:4], chave[7], chave[8], formato=chave[4])
+        else: arm = ArmazenamentoJSON(*chave[1:4], formato=chave[4])
+        _armazenamentos[chave] = arm
+    persistencia = configuracoes.secao("persistencia")
+    arm.configurar_persistencia(persistencia.get("durabilidade", "por_operacao"),
+                                persistencia.get("intervalo_ms", 200), persistencia.get("max_operacoes", 500))
+    return arm
+
+def descarregar_armazenamentos():
+    """Grava as alterações pendentes (write-behind) de todos os backends abertos. Chamar ao encerrar."""
+    for arm in list(_armazenamentos.values()):
+        arm.descarregar()
+
 def _criar_diretorio():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
 def salvar_objetos(lista_objetos, arquivo):
-    _criar_diretorio()
-    lista_dicts = [item.to_dict() for item in lista_objetos]
-    with open(arquivo, "w", encoding="utf-8") as f:
-        json.dump(lista_dicts, f, indent=4, ensure_ascii=False)
+    if arquivo == FILE_VEICULOS:
+        obter_armazenamento().salvar_veiculos(lista_objetos)
+    elif arquivo == FILE_MOTORISTAS:
+        obter_armazenamento().salvar_motoristas(lista_objetos)
+    else:
+        _criar_diretorio()
+        with open(arquivo, "w", encoding="utf-8") as f:
+            json.dump([item.to_dict() for item in lista_objetos], f, indent=4, ensure_ascii=False)
 
+# Arquivo ausente já é lista vazia no armazenamento; conflito ou arquivo corrompido sobem ao chamador.
 def carregar_veiculos() -> list:
-    if not os.path.exists(FILE_VEICULOS): return []
-    try:
-        with open(FILE_VEICULOS, "r", encoding="utf-8") as f:
-            dados = json.load(f)
-            return [Veiculo.from_dict(d) for d in dados]
-    except Exception as e:
-        print(f"Erro ao carregar veículos: {e}")
-        return []
+    return obter_armazenamento().listar_veiculos()
 
 def carregar_motoristas() -> list:
-    if not os.path.exists(FILE_MOTORISTAS): return []
-    try:
-        with open(FILE_MOTORISTAS, "r", encoding="utf-8") as f:
-            dados = json.load(f)
-            return [Motorista.from_dict(d) for d in dados]
-    except Exception:
-        return []
+    return obter_armazenamento().listar_motoristas()
 
 def carregar_viagens_dicts():
-    if not os.path.exists(FILE_VIAGENS): return []
-    try:
-        with open(FILE_VIAGENS, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
+    return obter_armazenamento().ler_viagens()
 
 def salvar_viagens_dicts(lista_dicts):
-    _criar_diretorio()
-    with open(FILE_VIAGENS, "w", encoding="utf-8") as f:
-        json.dump(lista_dicts, f, indent=4, ensure_ascii=False)
+    obter_armazenamento().reescrever_viagens(lista_dicts)
+
+def listar_viagens(pagina=1, por_pagina=20):
+    """Página de viagens (1 = mais antigas), sem ler o histórico inteiro."""
+    return obter_armazenamento().ler_viagens((pagina - 1) * por_pagina, por_pagina)
+
+def ultimas_viagens(n=20):
+    return obter_armazenamento().ultimas_viagens(n)
 
 def buscar_veiculo(placa, lista_veiculos=None):
-    if lista_veiculos is None: lista_veiculos = carregar_veiculos()
+    if lista_veiculos is None:
+        try:
+            return obter_armazenamento().buscar_veiculo(placa)
+        except Exception as e:
+            print(f"Erro ao carregar veículos: {e}")
+            return None
+    chave = normalizar_placa(placa)
     for v in lista_veiculos:
-        if v.placa.upper() == placa.upper(): return v
+        if normalizar_placa(v.placa) == chave: return v
     return None
 
 def buscar_motorista(cpf, lista_motoristas=None):
-    if lista_motoristas is None: lista_motoristas = carregar_motoristas()
+    if lista_motoristas is None:
+        try:
+            return obter_armazenamento().buscar_motorista(cpf)
+        except Exception:
+            return None
+    chave = normalizar_cpf(cpf)
     for m in lista_motoristas:
-        if m.cpf == cpf: return m
+        if normalizar_cpf(m.cpf) == chave: return m
     return None
 
 def cadastrar_veiculo_controller(tipo, placa, marca, modelo, ano, km_inicial):
-    veiculos = carregar_veiculos()
-    if buscar_veiculo(placa, veiculos):
+    if buscar_veiculo(placa):
         raise Exception(f"Veículo com placa {placa} já existe!")
 
     tipo = tipo.capitalize()
@@ -77,156 +124,368 @@ def cadastrar_veiculo_controller(tipo, placa, marca, modelo, ano, km_inicial):
 
     try:
         novo = cls(placa, marca, modelo, int(ano), float(km_inicial))
-        veiculos.append(novo)
-        salvar_objetos(veiculos, FILE_VEICULOS)
-        return "Veículo cadastrado com sucesso!"
     except ValueError:
         raise Exception("Ano ou KM devem ser números válidos.")
+    obter_armazenamento().adicionar_veiculo(novo)
+    return "Veículo cadastrado com sucesso!"
 
 def cadastrar_motorista_controller(nome, cpf, cnh, categoria):
-    motoristas = carregar_motoristas()
-    if buscar_motorista(cpf, motoristas):
+    if buscar_motorista(cpf):
         raise Exception(f"Motorista CPF {cpf} já existe!")
-    
+
     novo = Motorista(nome, cpf, cnh, categoria)
-    motoristas.append(novo)
-    salvar_objetos(motoristas, FILE_MOTORISTAS)
+    obter_armazenamento().adicionar_motorista(novo)
     return "Motorista cadastrado com sucesso!"
 
 def atualizar_veiculo_controller(placa, nova_marca, novo_modelo, novo_ano):
-    veiculos = carregar_veiculos()
-    veic = buscar_veiculo(placa, veiculos)
-    if not veic: raise Exception("Veículo não encontrado.")
-
-    alterado = False
-    if nova_marca: 
-        veic.marca = nova_marca
-        alterado = True
-    if novo_modelo: 
-        veic.modelo = novo_modelo
-        alterado = True
-    if novo_ano: 
-        veic.ano = int(novo_ano)
-        alterado = True
-    
-    if alterado:
-        salvar_objetos(veiculos, FILE_VEICULOS)
-        return f"Veículo {placa} atualizado."
+    arm = obter_armazenamento()
+    with arm.transacao():
+        veic = arm.buscar_veiculo(placa)
+        if not veic: raise Exception("Veículo não encontrado.")
+        if novo_ano: novo_ano = int(novo_ano)
+
+        alterado = False
+        if nova_marca:
+            veic.marca = nova_marca
+            alterado = True
+        if novo_modelo:
+            veic.modelo = novo_modelo
+            alterado = True
+        if novo_ano:
+            veic.ano = novo_ano
+            alterado = True
+
+        if alterado:
+            arm.atualizar_veiculo(veic)
+            return f"Veículo {placa} atualizado."
     return "Nenhuma alteração realizada."
 
 def atualizar_motorista_controller(cpf, novo_nome, nova_cnh, nova_cat):
-    motoristas = carregar_motoristas()
-    mot = buscar_motorista(cpf, motoristas)
-    if not mot: raise Exception("Motorista não encontrado.")
-
-    alterado = False
-    if novo_nome: 
-        mot.nome = novo_nome
-        alterado = True
-    if nova_cnh: 
-        mot.cnh = nova_cnh
-        alterado = True
-    if nova_cat: 
-        mot.categoria_cnh = nova_cat.upper()
-        alterado = True
-
-    if alterado:
-        salvar_objetos(motoristas, FILE_MOTORISTAS)
-        return f"Motorista {cpf} atualizado."
+    arm = obter_armazenamento()
+    with arm.transacao():
+        mot = arm.buscar_motorista(cpf)
+        if not mot: raise Exception("Motorista não encontrado.")
+
+        alterado = False
+        if novo_nome:
+            mot.nome = novo_nome
+            alterado = True
+        if nova_cnh:
+            mot.cnh = nova_cnh
+            alterado = True
+        if nova_cat:
+            mot.categoria_cnh = nova_cat
+            alterado = True
+
+        if alterado:
+            arm.atualizar_motorista(mot)
+            return f"Motorista {cpf} atualizado."
     return "Nenhuma alteração realizada."
 
-def realizar_viagem_controller(cpf, placa, destino, distancia):
-    motoristas = carregar_motoristas()
-    veiculos = carregar_veiculos()
-    
-    mot = buscar_motorista(cpf, motoristas)
-    veic = buscar_veiculo(placa, veiculos)
-    
-    if not mot: raise Exception(f"Motorista CPF {cpf} não encontrado.")
-    if not veic: raise Exception(f"Veículo Placa {placa} não encontrado.")
-
-    viagem = Viagem(mot, veic, destino, float(distancia))
-    viagem.realizar_viagem()
-    
-    salvar_objetos(veiculos, FILE_VEICULOS)
-    
-    historico = carregar_viagens_dicts()
-    historico.append(viagem.to_dict())
-    salvar_viagens_dicts(historico)
-    
+def _validar_data(data):
+    if not ordinal_da_data(data): raise Exception(f"Data inválida: {data}. Use DD/MM/AAAA.")
+    return data
+
+def realizar_viagem_controller(cpf, placa, destino, distancia, data=None):
+    if data: _validar_data(data)
+    arm = obter_armazenamento()
+    with arm.transacao():
+        mot = arm.buscar_motorista(cpf)
+        veic = arm.buscar_veiculo(placa)
+
+        if not mot: raise Exception(f"Motorista CPF {cpf} não encontrado.")
+        if not veic: raise Exception(f"Veículo Placa {placa} não encontrado.")
+
+        viagem = Viagem(mot, veic, destino, float(distancia), data)
+        viagem.realizar_viagem()
+        arm.registrar_viagem(veic, viagem.to_dict())
+
     return f"Viagem registrada! Nova KM do veículo: {veic.quilometragem}"
 
+def realizar_viagens_lote(viagens):
+    """
+    Despacha várias viagens (cpf, placa, destino, distancia[, data]) em uma única transação:
+    cada motorista/veículo é buscado uma vez, as viagens são validadas e aplicadas na ordem
+    (várias no mesmo veículo acumulam a km) e a gravação acontece uma vez, ao final.
+    Viagens inválidas não interrompem o lote: o resultado traz sucesso ou erro por viagem.
+    """
+    arm = obter_armazenamento()
+    motoristas, veiculos = {}, {}
+    resultados = []
+    with arm.transacao():
+        for indice, item in enumerate(viagens):
+            cpf = placa = None
+            try:
+                if isinstance(item, dict):
+                    item = (item.get("cpf"), item.get("placa"), item.get("destino"), item.get("distancia"), item.get("data"))
+                if len(item) < 4: raise Exception("Informe CPF, placa, destino e distância.")
+                cpf, placa, destino, distancia = item[:4]
+                data = item[4] if len(item) > 4 else None
+                if data: _validar_data(data)
+                chave_cpf, chave_placa = normalizar_cpf(cpf), normalizar_placa(placa)
+                if chave_cpf not in motoristas: motoristas[chave_cpf] = arm.buscar_motorista(cpf)
+                if chave_placa not in veiculos: veiculos[chave_placa] = arm.buscar_veiculo(placa)
+                mot, veic = motoristas[chave_cpf], veiculos[chave_placa]
+
+                if not mot: raise Exception(f"Motorista CPF {cpf} não encontrado.")
+                if not veic: raise Exception(f"Veículo Placa {placa} não encontrado.")
+
+                # A viagem altera a km antes de ser registrada: se o registro falhar, a km volta.
+                with arm.ponto_de_salvamento():
+                    viagem = Viagem(mot, veic, destino, float(distancia), data)
+                    viagem.realizar_viagem(exibir_mensagem=False)
+                    arm.registrar_viagem(veic, viagem.to_dict())
+                resultados.append({"indice": indice, "cpf": cpf, "placa": placa, "sucesso": True,
+                                   "quilometragem": veic.quilometragem, "erro": None})
+            except Exception as e:
+                resultados.append({"indice": indice, "cpf": cpf, "placa": placa, "sucesso": False,
+                                   "quilometragem": None, "erro": str(e)})
+    return resultados
+
+def alocar_viagens_controller(pendentes):
+    """Sugere veículo e motorista para cada viagem pendente (destino, distancia[, tipo[, data]]), sem gravar."""
+    arm = obter_armazenamento()
+    veiculos = arm.listar_veiculos()
+    alocacoes = alocacao.alocar_viagens(pendentes, veiculos, arm.listar_motoristas())
+    return {"alocacoes": alocacoes, "desequilibrio_km": alocacao.desequilibrio_km(veiculos, alocacoes)}
+
+def despachar_alocacoes_lote(alocacoes):
+    """Registra as viagens alocadas por alocar_viagens_controller (as com erro são ignoradas)."""
+    validas = [a for a in alocacoes if not a["erro"]]
+    resultados = realizar_viagens_lote([(a["cpf"], a["placa"], a["destino"], a["distancia"], a["data"]) for a in validas])
+    for a, r in zip(validas, resultados):
+        r["indice"] = a["indice"]
+    return resultados
+
 def registrar_manutencao_controller(placa, data, tipo, custo, descricao):
-    veiculos = carregar_veiculos()
-    veic = buscar_veiculo(placa, veiculos)
-    if not veic: raise Exception("Veículo não encontrado.")
-
-    manutencao = Manutencao(data, tipo, float(custo), descricao)
-    veic.adicionar_manutencao(manutencao)
-    
-    salvar_objetos(veiculos, FILE_VEICULOS)
+    _validar_data(data)
+    arm = obter_armazenamento()
+    with arm.transacao():
+        veic = arm.buscar_veiculo(placa)
+        if not veic: raise Exception("Veículo não encontrado.")
+
+        manutencao = Manutencao(data, tipo, float(custo), descricao, veic.tipo)
+        veic.adicionar_manutencao(manutencao)
+        arm.registrar_manutencao(veic, manutencao)
+
     return f"Manutenção ({tipo}) registrada. Custo final calculado: R$ {manutencao.custo_final:.2f}"
 
 def finalizar_manutencao_controller(placa):
-    veiculos = carregar_veiculos()
-    veic = buscar_veiculo(placa, veiculos)
-    if not veic: raise Exception("Veículo não encontrado.")
-    
-    veic.finalizar_manutencao_status()
-    salvar_objetos(veiculos, FILE_VEICULOS)
+    arm = obter_armazenamento()
+    with arm.transacao():
+        veic = arm.buscar_veiculo(placa)
+        if not veic: raise Exception("Veículo não encontrado.")
+
+        veic.finalizar_manutencao_status()
+        arm.atualizar_veiculo(veic)
     return f"Veículo {placa} liberado da manutenção com sucesso."
 
+def _parametros_anomalias():
+    """Seção "anomalias" do settings.json (ver anomalias.DetectorAnomalias)."""
+    config = configuracoes.secao("anomalias")
+    return {chave: config[chave] for chave in ("limiar_z", "minimo_amostras", "alfa_ewma", "queda_km_l") if chave in config}
+
+def _diario_alertas():
+    return DiarioAlertas(os.path.join(DATA_DIR, "alertas_abastecimento.jsonl"))
+
 def registrar_abastecimento_controller(placa, data, combustivel, litros, valor):
-    veiculos = carregar_veiculos()
-    veic = buscar_veiculo(placa, veiculos)
-    if not veic: raise Exception("Veículo não encontrado.")
-
-    abast = Abastecimento(data, combustivel, float(litros), float(valor))
-    veic.abastecer(abast)
-    
-    salvar_objetos(veiculos, FILE_VEICULOS)
+    _validar_data(data)
+    arm = obter_armazenamento()
+    with arm.transacao():
+        veic = arm.buscar_veiculo(placa)
+        if not veic: raise Exception("Veículo não encontrado.")
+
+        abast = Abastecimento(data, combustivel, float(litros), float(valor))
+        detector = arm.detector_anomalias(**_parametros_anomalias())  # aquecido sem este abastecimento
+        veic.abastecer(abast)
+        arm.registrar_abastecimento(veic, abast)
+        alertas = detector.avaliar(veic, abast)
+
+    if alertas:
+        _diario_alertas().anexar_varias(alertas)
+        return (f"Abastecimento registrado para o veículo {placa}. "
+                f"ATENÇÃO: {'; '.join(a['motivo'] for a in alertas)}.")
     return f"Abastecimento registrado para o veículo {placa}."
 
+def importar_lote_controller(tipo, caminho):
+    """Importa abastecimentos, manutenções ou viagens de um CSV/JSONL com uma única gravação."""
+    if not os.path.exists(caminho): raise Exception(f"Arquivo {caminho} não encontrado.")
+    resultado = importacao.importar_arquivo(obter_armazenamento(), tipo.lower(), caminho, _parametros_anomalias())
+    if resultado["alertas"]: _diario_alertas().anexar_varias(resultado["alertas"])
+    return resultado
+
+def listar_alertas_controller(n=50):
+    """Os n alertas de abastecimento mais recentes (do mais novo ao mais antigo) e o total gravado."""
+    diario = _diario_alertas()
+    return {"total": len(diario), "alertas": diario.ultimas(int(n))[::-1]}
+
+def reprocessar_alertas_controller():
+    """
+    Refaz os alertas com uma única passada por todo o histórico de abastecimentos
+    (ex.: depois de importar dados antigos ou mudar os parâmetros) e regrava o arquivo.
+    """
+    detector = DetectorAnomalias(**_parametros_anomalias())
+    alertas = list(detector.varrer(obter_armazenamento().listar_veiculos()))
+    _diario_alertas().reescrever(alertas)
+    return {"abastecimentos": detector.avaliados, "alertas": len(alertas)}
+
 def gerar_relatorio_custos():
     """Retorna lista com custo total de manutenção por veículo."""
-    veiculos = carregar_veiculos()
-    relatorio = []
-    
-    for v in veiculos:
-        total = sum(m.custo_final for m in v) 
-        relatorio.append({
-            "placa": v.placa,
-            "modelo": v.modelo,
-            "total_manutencao": total,
-            "qtd_manutencoes": len(v.historico_manutencoes)
-        })
-    return relatorio
+    return obter_armazenamento().relatorio_custos()
 
 def gerar_relatorio_eficiencia():
     """
     Retorna eficiência (km/l) estimada e ordena (Ranking).
     CORREÇÃO IMPORTANTE: Usa (KM Atual - KM Entrada) / Litros Totais.
     """
-    veiculos = carregar_veiculos()
+    return obter_armazenamento().relatorio_eficiencia()
+
+def _periodo(inicio, fim):
+    """Converte as datas "DD/MM/AAAA" do período em ordinais, validando a ordem."""
+    inicio, fim = ordinal_da_data(_validar_data(inicio)), ordinal_da_data(_validar_data(fim))
+    if inicio > fim: raise Exception("A data inicial deve ser anterior à final.")
+    return inicio, fim
+
+def periodo_do_mes(mes, ano):
+    """Datas "DD/MM/AAAA" do primeiro e do último dia do mês (fechamento mensal)."""
+    try:
+        inicio, fim = intervalo_mes(int(ano), int(mes))
+    except ValueError:
+        raise Exception(f"Mês inválido: {mes}/{ano}.")
+    return data_do_ordinal(inicio), data_do_ordinal(fim)
+
+def totais_periodo_controller(inicio, fim, placa=None):
+    """Custos, litros e km do período para um veículo (placa) ou para a frota."""
+    arm = obter_armazenamento()
+    if placa is not None and not arm.buscar_veiculo(placa): raise Exception("Veículo não encontrado.")
+    return arm.totais_periodo(*_periodo(inicio, fim), placa)
+
+def gerar_relatorio_custos_periodo(inicio, fim):
+    """Relatório de custos de manutenção restrito ao período (limites inclusivos)."""
+    return obter_armazenamento().relatorio_custos_periodo(*_periodo(inicio, fim))
+
+def gerar_relatorio_eficiencia_periodo(inicio, fim):
+    """Ranking km/l do período: km das viagens do período / litros abastecidos no período."""
+    return obter_armazenamento().relatorio_eficiencia_periodo(*_periodo(inicio, fim))
+
+def _periodo_opcional(inicio, fim):
+    """Sem datas = todo o histórico; com uma delas, as duas são exigidas."""
+    if not inicio and not fim: return None, None
+    return _periodo(inicio, fim)
+
+def viagens_do_motorista_controller(cpf, inicio=None, fim=None):
+    """Viagens do motorista (no período, se dado) e seus totais, pelo índice de viagens por CPF."""
+    motorista = obter_armazenamento().buscar_motorista(cpf)
+    if not motorista: raise Exception("Motorista não encontrado.")
+    return _viagens_da_entidade("cpf_motorista", motorista.cpf, inicio, fim)
+
+def viagens_do_veiculo_controller(placa, inicio=None, fim=None):
+    veiculo = obter_armazenamento().buscar_veiculo(placa)
+    if not veiculo: raise Exception("Veículo não encontrado.")
+    return _viagens_da_entidade("placa_veiculo", veiculo.placa, inicio, fim)
+
+def _viagens_da_entidade(campo, chave, inicio, fim):
+    arm = obter_armazenamento()
+    periodo = _periodo_opcional(inicio, fim)
+    totais = arm.totais_viagens(campo, chave, *periodo)
+    return {"viagens": arm.viagens_por(campo, chave, *periodo),
+            "total_viagens": totais["viagens"], "distancia": totais["distancia"]}
+
+def utilizacao_motoristas_controller(inicio=None, fim=None):
+    """
+    Uso de cada motorista cadastrado no período (todos, inclusive sem viagens):
+    viagens, km, dias com viagem, última viagem e participação no km total.
+    """
+    arm = obter_armazenamento()
+    por_cpf = {d["cpf"]: d for d in arm.utilizacao_motoristas(*_periodo_opcional(inicio, fim))}
+    total_km = sum(d["distancia"] for d in por_cpf.values())
     relatorio = []
-    
-    for v in veiculos:
-        total_litros = sum(a.litros for a in v.historico_abastecimentos)
-        
-        km_inicial_real = getattr(v, 'km_entrada', 0)
-        distancia_percorrida = v.quilometragem - km_inicial_real
-        
-        if total_litros > 0 and distancia_percorrida > 0:
-            km_l = distancia_percorrida / total_litros
-        else:
-            km_l = 0.0
-            
+    for m in arm.listar_motoristas():
+        uso = por_cpf.get(normalizar_cpf(m.cpf), {"viagens": 0, "distancia": 0.0, "dias_ativos": 0, "ultima_viagem": ""})
         relatorio.append({
-            "placa": v.placa,
-            "modelo": v.modelo,
-            "litros": total_litros,
-            "km_l": km_l
+            "cpf": m.cpf,
+            "nome": m.nome,
+            "viagens": uso["viagens"],
+            "distancia": uso["distancia"],
+            "dias_ativos": uso["dias_ativos"],
+            "ultima_viagem": uso["ultima_viagem"],
+            "participacao_km": uso["distancia"] / total_km if total_km > 0 else 0.0,
         })
-    
-    relatorio.sort(key=lambda x: x['km_l'], reverse=True)
-    return relatorio
\ No newline at end of file
+    relatorio.sort(key=lambda d: d["distancia"], reverse=True)
+    return relatorio
+
+def recalcular_custos_controller(aplicar=False):
+    """
+    Impacto das regras de custo atuais (settings.json "regras_custo") sobre todo o histórico
+    de manutenções; com aplicar=True, grava os custos recalculados.
+    """
+    return obter_armazenamento().recalcular_custos_manutencao(bool(aplicar))
+
+def verificar_agregados_controller(corrigir=False):
+    """Confere os agregados mantidos incrementalmente contra o histórico bruto."""
+    return obter_armazenamento().verificar_agregados(corrigir)
+
+def _intervalo_revisao():
+    return float(configuracoes.secao("manutencao").get("intervalo_km", 10000))
+
+def proximas_revisoes_controller(n=10):
+    """Os n veículos mais próximos da revisão preventiva (manutencao.intervalo_km do settings.json)."""
+    return obter_armazenamento().proximas_revisoes(int(n), _intervalo_revisao())
+
+def revisoes_vencidas_controller():
+    return obter_armazenamento().revisoes_vencidas(_intervalo_revisao())
+
+FILTROS_STATUS = {"ativo": "Ativo", "manutencao": "Em Manutenção", "em manutenção": "Em Manutenção",
+                  "em manutencao": "Em Manutenção", "manutenção": "Em Manutenção", "inativo": "Inativo"}
+FILTROS_TIPO = {"carro": "Carro", "moto": "Moto", "caminhao": "Caminhão", "caminhão": "Caminhão"}
+
+def _filtro(valor, opcoes, nome):
+    if valor is None or not str(valor).strip(): return None
+    chave = str(valor).strip().lower()
+    if chave not in opcoes:
+        raise Exception(f"{nome} inválido: {valor}. Use {', '.join(sorted(set(opcoes.values())))}.")
+    return opcoes[chave]
+
+def listar_frota_controller(status=None, tipo=None, ordem="placa", decrescente=False, pagina=1, por_pagina=50):
+    """
+    Uma página da listagem da frota, só com os campos de cabeçalho.
+    ordem: "placa", "km" ou "ano"; filtros vazios não filtram.
+    """
+    ordem = (ordem or "placa").strip().lower()
+    if ordem not in ORDENACOES:
+        raise Exception(f"Ordenação inválida: {ordem}. Use {', '.join(ORDENACOES)}.")
+    try:
+        pagina, por_pagina = int(pagina), int(por_pagina)
+    except ValueError:
+        raise Exception("Página e tamanho da página devem ser números inteiros.")
+    return obter_armazenamento().pagina_frota(_filtro(status, FILTROS_STATUS, "Status"),
+                                              _filtro(tipo, FILTROS_TIPO, "Tipo"),
+                                              ordem, bool(decrescente), pagina, por_pagina)
+
+def gerar_painel_analitico():
+    """Métricas da frota calculadas em lote com NumPy (módulo analise)."""
+    try:
+        import analise
+    except ImportError:
+        raise Exception("Painel analítico requer NumPy (pip install numpy).")
+    return analise.TabelaFrota(obter_armazenamento().listar_veiculos()).resumo()
+
+def estatisticas_cache_controller():
+    """Acertos, faltas e despejos do cache de veículos (None se a frota inteira fica em memória)."""
+    arm = obter_armazenamento()
+    if not hasattr(arm, "estatisticas_cache"): return None
+    return arm.estatisticas_cache()
+
+def resumo_instrumentacao():
+    """Tempo, E/S e objetos por função medida (vazio se a instrumentação estiver desligada)."""
+    return {"ativa": instrumentacao.ativa(), "funcoes": instrumentacao.resumo()}
+
+def exportar_instrumentacao(caminho):
+    """Grava as chamadas medidas em JSONL (uma por linha) e devolve quantas foram exportadas."""
+    return instrumentacao.exportar_jsonl(caminho)
+
+# Instrumentação opcional (FROTA_INSTRUMENTACAO=1 ou "instrumentacao.ativa" no settings.json).
+instrumentacao.instrumentar(
+    globals(),
+    lambda nome: nome.endswith(("_controller", "_lote")) or nome.startswith(("carregar_", "salvar_", "gerar_relatorio"))
+)
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+from array import array
+from contextlib import nullcontext
+
+import instrumentacao
+from trava import gravar_atomico
+
+TAMANHO_OFFSET = array("Q").itemsize
+
+
+class DiarioViagens:
+    """
+    Histórico de viagens em JSONL (uma viagem por linha, somente anexação),
+    com um índice lateral de offsets (.idx) para paginar sem ler o arquivo todo.
+    """
+
+    def __init__(self, arquivo, trava=None):
+        self.arquivo = arquivo
+        self.arquivo_indice = arquivo + ".idx"
+        # Trava entre processos usada para reconstruir o índice sem disputar com quem está anexando.
+        self.trava = trava if trava is not None else nullcontext()
+        # Índices secundários (ver indice_viagens): avisados a cada anexação e reescrita.
+        self.indices = []
+
+    def _linha(self, dados) -> bytes:
+        return (json.dumps(dados, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _criar_diretorio(self):
+        pasta = os.path.dirname(self.arquivo)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+
+    def existe(self) -> bool:
+        return os.path.exists(self.arquivo)
+
+    def __len__(self):
+        self._verificar_indice()
+        if not os.path.exists(self.arquivo_indice): return 0
+        return os.path.getsize(self.arquivo_indice) // TAMANHO_OFFSET
+
+    def _verificar_indice(self):
+        """Reconstrói o índice se ele não cobre o final do diário (ex.: queda entre as duas escritas)."""
+        if self._indice_consistente(): return
+        with self.trava:
+            if not self._indice_consistente(): self.reconstruir_indice()
+
+    def _indice_consistente(self) -> bool:
+        if not self.existe(): return True
+        tamanho = os.path.getsize(self.arquivo)
+        tamanho_indice = os.path.getsize(self.arquivo_indice) if os.path.exists(self.arquivo_indice) else 0
+
+        if tamanho_indice % TAMANHO_OFFSET != 0: return False
+        if tamanho_indice == 0: return tamanho == 0
+        ultimo = self.offsets(tamanho_indice // TAMANHO_OFFSET - 1, 1)[0]
+        with open(self.arquivo, "rb") as f:
+            f.seek(ultimo)
+            return ultimo + len(f.readline()) == tamanho
+
+    def reconstruir_indice(self):
+        offsets = array("Q")
+        with open(self.arquivo, "r+b") as f:
+            posicao = 0
+            for linha in f:
+                if not linha.endswith(b"\n"): break
+                offsets.append(posicao)
+                posicao += len(linha)
+            # Descarta uma linha final incompleta para que a próxima anexação não a corrompa.
+            f.truncate(posicao)
+        with open(self.arquivo_indice, "wb") as f:
+            offsets.tofile(f)
+
+    def offsets(self, inicio, quantidade) -> array:
+        offsets = array("Q")
+        with open(self.arquivo_indice, "rb") as f:
+            f.seek(inicio * TAMANHO_OFFSET)
+            offsets.frombytes(f.read(quantidade * TAMANHO_OFFSET))
+        return offsets
+
+    def anexar(self, dados):
+        """Grava uma viagem no final do diário em O(1)."""
+        self.anexar_varias([dados])
+
+    def anexar_varias(self, lista_dicts, sincronizar=False):
+        """Grava várias viagens com uma única abertura de cada arquivo (e um fsync de cada, se pedido)."""
+        self._criar_diretorio()
+        with self.trava:
+            self._anexar_varias(lista_dicts, sincronizar)
+
+    def _anexar_varias(self, lista_dicts, sincronizar=False):
+        self._verificar_indice()
+        posicao = os.path.getsize(self.arquivo_indice) // TAMANHO_OFFSET if os.path.exists(self.arquivo_indice) else 0
+        offsets = array("Q")
+        with open(self.arquivo, "ab") as f:
+            offset = inicial = f.seek(0, os.SEEK_END)
+            for dados in lista_dicts:
+                linha = self._linha(dados)
+                offsets.append(offset)
+                f.write(linha)
+                offset += len(linha)
+            if sincronizar:
+                f.flush()
+                os.fsync(f.fileno())
+        with open(self.arquivo_indice, "ab") as f:
+            offsets.tofile(f)
+        instrumentacao.contar_escrita(offset - inicial + len(offsets) * TAMANHO_OFFSET)
+        for indice in self.indices:
+            indice.anexadas(posicao, lista_dicts, offsets)
+
+    def ler(self, inicio=0, quantidade=None) -> list:
+        """Lê `quantidade` viagens a partir da posição `inicio` (0 = mais antiga)."""
+        total = len(self)
+        inicio = max(0, inicio)
+        if quantidade is None: quantidade = total - inicio
+        quantidade = min(quantidade, total - inicio)
+        if quantidade <= 0: return []
+
+        primeiro = self.offsets(inicio, 1)[0]
+        with open(self.arquivo, "rb") as f:
+            f.seek(primeiro)
+            linhas = [f.readline() for _ in range(quantidade)]
+        instrumentacao.contar_leitura(sum(map(len, linhas)))
+        inicio_parse = time.perf_counter()
+        viagens = [json.loads(linha) for linha in linhas]
+        instrumentacao.contar_json("parse", time.perf_counter() - inicio_parse)
+        return viagens
+
+    def ler_em(self, offsets) -> list:
+        """Lê as viagens que começam nos offsets dados (ex.: vindos de um índice secundário), na ordem dada."""
+        if not offsets: return []
+        with open(self.arquivo, "rb") as f:
+            linhas = []
+            for offset in offsets:
+                f.seek(offset)
+                linhas.append(f.readline())
+        instrumentacao.contar_leitura(sum(map(len, linhas)))
+        inicio_parse = time.perf_counter()
+        viagens = [json.loads(linha) for linha in linhas]
+        instrumentacao.contar_json("parse", time.perf_counter() - inicio_parse)
+        return viagens
+
+    def ultimas(self, n) -> list:
+        """Devolve as `n` viagens mais recentes, da mais antiga para a mais nova."""
+        return self.ler(len(self) - n, n)
+
+    def reescrever(self, lista_dicts):
+        self._criar_diretorio()
+        offsets = array("Q")
+        linhas = []
+        posicao = 0
+        for dados in lista_dicts:
+            linha = self._linha(dados)
+            offsets.append(posicao)
+            linhas.append(linha)
+            posicao += len(linha)
+        with self.trava:
+            gravar_atomico(self.arquivo, b"".join(linhas))
+            gravar_atomico(self.arquivo_indice, offsets.tobytes())
+            for indice in self.indices:
+                indice.redefinir()
+
+    def migrar_de(self, arquivo_json):
+        """Migração única do antigo viagens.json: só ocorre se o diário ainda não existe."""
+        if self.existe() or not os.path.exists(arquivo_json): return False
+        with self.trava:
+            if self.existe(): return False
+            with open(arquivo_json, "r", encoding="utf-8") as f:
+                self.reescrever(json.load(f))
+        return True
@@ -0,0 +1,207 @@
+"""
+Gera frotas sintéticas determinísticas (mesma semente, mesmos dados) para
+testes de carga: veículos dos três tipos, motoristas com categorias de CNH
+variadas e históricos de viagens, abastecimentos e manutenções coerentes
+entre si (km, consumo e intervalos de revisão).
+
+    python gerador_frota.py --veiculos 10000 --pasta data_bench [--semente 42] [--backend sqlite]
+"""
+import argparse
+import os
+import random
+
+import configuracoes
+from models import (
+    Veiculo, Carro, Moto, Caminhao, Motorista, Viagem, Manutencao, Abastecimento,
+    AlocacaoInvalidaError, ordinal, data_do_ordinal
+)
+from armazenamento import ArmazenamentoJSON, ArmazenamentoSQLite
+
+PERFIS = {
+    Carro: {"peso": 6, "distancia": (10, 300), "km_l": (9.0, 14.0), "tanque": 45,
+            "combustiveis": ("Gasolina", "Etanol"), "custo": (150, 1500)},
+    Moto: {"peso": 2, "distancia": (5, 80), "km_l": (25.0, 40.0), "tanque": 12,
+           "combustiveis": ("Gasolina",), "custo": (80, 600)},
+    Caminhao: {"peso": 2, "distancia": (50, 900), "km_l": (2.5, 4.0), "tanque": 300,
+               "combustiveis": ("Diesel",), "custo": (800, 8000)},
+}
+PRECOS = {"Gasolina": (5.5, 6.5), "Etanol": (3.8, 4.4), "Diesel": (5.8, 6.4)}
+CATEGORIAS_CNH = (("B", 45), ("AB", 25), ("A", 10), ("C", 8), ("D", 6), ("E", 4), ("AE", 2))
+
+MARCAS = {
+    Carro: (("Fiat", "Mobi"), ("Fiat", "Argo"), ("VW", "Gol"), ("VW", "Polo"), ("Chevrolet", "Onix"), ("Toyota", "Corolla")),
+    Moto: (("Honda", "CG 160"), ("Honda", "Biz"), ("Yamaha", "Factor"), ("Yamaha", "Fazer")),
+    Caminhao: (("Volvo", "FH 540"), ("Scania", "R450"), ("Mercedes", "Actros"), ("VW", "Delivery")),
+}
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Hugo", "Isabel", "João",
+         "Karina", "Lucas", "Marina", "Nelson", "Olívia", "Paulo", "Renata", "Sérgio", "Tânia", "Vítor")
+SOBRENOMES = ("Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Costa", "Almeida", "Ferreira", "Rocha")
+DESTINOS = ("Centro", "Aeroporto", "Porto", "Campinas", "Santos", "Sorocaba", "Curitiba", "Belo Horizonte",
+            "Rio de Janeiro", "Ribeirão Preto", "Distrito Industrial", "CEASA", "Filial Norte", "Filial Sul")
+DESCRICOES_CORRETIVAS = ("Troca de pneu", "Freios", "Embreagem", "Suspensão", "Sistema elétrico", "Radiador")
+
+
+def placa_sintetica(i: int) -> str:
+    """Placa no padrão Mercosul (AAA0A00), única para cada índice."""
+    letras = ""
+    resto = i // 1000
+    for _ in range(4):
+        resto, n = divmod(resto, 26)
+        letras = chr(65 + n) + letras
+    return f"{letras[:3]}{(i % 1000) // 100}{letras[3]}{i % 100:02d}"
+
+
+def cpf_sintetico(i: int) -> str:
+    return f"{i // 1_000_000 % 1000:03d}.{i // 1000 % 1000:03d}.{i % 1000:03d}-{i * 7 % 100:02d}"
+
+
+def _compatibilidade() -> dict:
+    """Tipo de veículo -> categorias de CNH aceitas, pela própria regra de Viagem."""
+    aceitas = {}
+    for classe in PERFIS:
+        veiculo = classe("TESTE", "", "", 2020)
+        aceitas[classe] = set()
+        for categoria, _ in CATEGORIAS_CNH:
+            try:
+                Viagem(Motorista("", "", "", categoria), veiculo, "", 0)
+                aceitas[classe].add(categoria)
+            except AlocacaoInvalidaError:
+                pass
+    return aceitas
+
+
+def gerar_motoristas(rnd, n):
+    categorias, pesos = zip(*CATEGORIAS_CNH)
+    motoristas = []
+    for i in range(n):
+        # O primeiro motorista (AE) dirige qualquer tipo: garante condutor para toda a frota.
+        categoria = "AE" if i == 0 else rnd.choices(categorias, pesos)[0]
+        nome = f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)}"
+        motoristas.append(Motorista(nome, cpf_sintetico(i), f"{10_000_000_000 + i}", categoria))
+    return motoristas
+
+
+def _gerar_veiculo(rnd, i, motoristas_por_classe, viagens_por_veiculo, inicio, dias, intervalo_km):
+    classes = tuple(PERFIS)
+    classe = rnd.choices(classes, [PERFIS[c]["peso"] for c in classes])[0]
+    perfil = PERFIS[classe]
+    marca, modelo = rnd.choice(MARCAS[classe])
+    veiculo = classe(placa_sintetica(i), marca, modelo, rnd.randint(2010, 2025), round(rnd.uniform(0, 80_000), 1))
+
+    km_l = rnd.uniform(*perfil["km_l"])
+    combustivel = rnd.choice(perfil["combustiveis"])
+    autonomia = perfil["tanque"] * km_l * 0.7
+    desde_abastecimento = 0.0
+    desde_revisao = rnd.uniform(0, intervalo_km)
+
+    viagens = []
+    candidatos = motoristas_por_classe[classe]
+    datas = sorted(rnd.randrange(dias) for _ in range(rnd.randint(0, 2 * viagens_por_veiculo)))
+    for deslocamento in datas:
+        data = data_do_ordinal(inicio + deslocamento)
+        distancia = round(rnd.uniform(*perfil["distancia"]), 1)
+        viagem = Viagem(rnd.choice(candidatos), veiculo, rnd.choice(DESTINOS), distancia, data)
+        viagem.realizar_viagem(exibir_mensagem=False)
+        viagens.append(viagem.to_dict())
+
+        desde_abastecimento += distancia
+        desde_revisao += distancia
+        if desde_abastecimento >= autonomia:
+            litros = round(desde_abastecimento / km_l * rnd.uniform(0.95, 1.05), 2)
+            valor = round(litros * rnd.uniform(*PRECOS[combustivel]), 2)
+            veiculo.abastecer(Abastecimento(data, combustivel, litros, valor))
+            desde_abastecimento = 0.0
+        if desde_revisao >= intervalo_km or rnd.random() < 0.01:
+            preventiva = desde_revisao >= intervalo_km
+            custo = round(rnd.uniform(*perfil["custo"]) * (0.5 if preventiva else 1), 2)
+            descricao = "Revisão periódica" if preventiva else rnd.choice(DESCRICOES_CORRETIVAS)
+            veiculo.adicionar_manutencao(Manutencao(data, "preventiva" if preventiva else "corretiva", custo, descricao,
+                                                    veiculo.tipo))
+            veiculo.finalizar_manutencao_status()
+            if preventiva: desde_revisao = 0.0
+
+    if desde_abastecimento > 0:
+        # Completa o tanque no fim do período: o km/l da frota fica próximo do perfil do veículo.
+        litros = round(desde_abastecimento / km_l, 2)
+        veiculo.abastecer(Abastecimento(data, combustivel, litros, round(litros * rnd.uniform(*PRECOS[combustivel]), 2)))
+
+    # Uma pequena parte da frota termina parada na oficina.
+    if rnd.random() < 0.02:
+        data = data_do_ordinal(inicio + dias - 1)
+        veiculo.adicionar_manutencao(Manutencao(data, "corretiva", round(rnd.uniform(*perfil["custo"]), 2),
+                                                rnd.choice(DESCRICOES_CORRETIVAS), veiculo.tipo))
+    return veiculo, viagens
+
+
+def gerar_frota(veiculos=1000, motoristas=None, semente=42, viagens_por_veiculo=8,
+                inicio="01/01/2025", dias=365) -> dict:
+    """
+    Devolve {"veiculos", "motoristas", "viagens"}: objetos de domínio e
+    viagens no formato de Viagem.to_dict, em ordem cronológica.
+    """
+    rnd = random.Random(semente)
+    intervalo_km = float(configuracoes.secao("manutencao").get("intervalo_km", 10000))
+    lista_motoristas = gerar_motoristas(rnd, motoristas or max(10, veiculos // 3))
+
+    aceitas = _compatibilidade()
+    motoristas_por_classe = {
+        classe: [m for m in lista_motoristas if m.categoria_cnh in aceitas[classe]] for classe in PERFIS
+    }
+
+    # Históricos colunares durante a geração: milhões de registros sem um objeto por registro.
+    colunar_anterior = Veiculo.historico_colunar
+    Veiculo.historico_colunar = True
+    try:
+        lista_veiculos = []
+        viagens = []
+        for i in range(veiculos):
+            veiculo, viagens_veiculo = _gerar_veiculo(rnd, i, motoristas_por_classe, viagens_por_veiculo,
+                                                      ordinal(inicio), dias, intervalo_km)
+            lista_veiculos.append(veiculo)
+            viagens.extend(viagens_veiculo)
+    finally:
+        Veiculo.historico_colunar = colunar_anterior
+
+    viagens.sort(key=lambda v: ordinal(v["data"]))
+    return {"veiculos": lista_veiculos, "motoristas": lista_motoristas, "viagens": viagens}
+
+
+def gravar_frota(frota: dict, arm):
+    with arm.transacao():
+        arm.salvar_veiculos(frota["veiculos"])
+        arm.salvar_motoristas(frota["motoristas"])
+        arm.reescrever_viagens(frota["viagens"])
+
+
+def armazenamento_da_pasta(pasta, backend="json", arquivo_sqlite="frota.db"):
+    """Backend sobre os mesmos nomes de arquivo usados pelo controller em data/."""
+    if backend == "sqlite": return ArmazenamentoSQLite(os.path.join(pasta, arquivo_sqlite))
+    return ArmazenamentoJSON(os.path.join(pasta, "veiculos.json"), os.path.join(pasta, "motoristas.json"),
+                             os.path.join(pasta, "viagens.json"))
+
+
+def resumo_frota(frota: dict) -> dict:
+    return {
+        "veiculos": len(frota["veiculos"]),
+        "motoristas": len(frota["motoristas"]),
+        "viagens": len(frota["viagens"]),
+        "manutencoes": sum(v.qtd_manutencoes for v in frota["veiculos"]),
+        "abastecimentos": sum(v.qtd_abastecimentos for v in frota["veiculos"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--veiculos", type=int, default=1000)
+    parser.add_argument("--motoristas", type=int, help="Padrão: um terço do número de veículos")
+    parser.add_argument("--viagens-por-veiculo", type=int, default=8, help="Média de viagens por veículo")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--pasta", default="data")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.pasta, "veiculos.json")) or os.path.exists(os.path.join(args.pasta, "frota.db")):
+        parser.error(f"{args.pasta} já contém dados; use uma pasta vazia.")
+    frota = gerar_frota(args.veiculos, args.motoristas, args.semente, args.viagens_por_veiculo)
+    gravar_frota(frota, armazenamento_da_pasta(args.pasta, args.backend))
+    print(", ".join(f"{qtd} {nome}" for nome, qtd in resumo_frota(frota).items()) + f" gravados em {args.pasta}.")
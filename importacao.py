@@ -0,0 +1,191 @@
+import csv
+import json
+
+from models import Manutencao, Abastecimento, Viagem, ordinal_da_data
+from repositorio import normalizar_placa, normalizar_cpf
+
+CAMPOS = {
+    "abastecimentos": ("placa", "data", "combustivel", "litros", "valor"),
+    "manutencoes": ("placa", "data", "tipo", "custo", "descricao"),
+    "viagens": ("cpf", "placa", "destino", "distancia"),
+}
+
+# Nomes alternativos aceitos nas colunas (ex.: o formato de Viagem.to_dict).
+SINONIMOS = {
+    "placa_veiculo": "placa",
+    "cpf_motorista": "cpf",
+    "custo_base": "custo",
+}
+
+
+def _numero(valor) -> float:
+    if isinstance(valor, str):
+        valor = valor.strip()
+        if "," in valor and "." not in valor: valor = valor.replace(",", ".")
+    return float(valor)
+
+
+def _data(valor) -> str:
+    valor = (valor or "").strip()
+    if not ordinal_da_data(valor): raise ValueError(f"Data inválida: {valor!r} (use DD/MM/AAAA)")
+    return valor
+
+
+def ler_registros(caminho):
+    """Gera (número da linha, dict) de um arquivo .csv ou .jsonl; uma linha JSONL inválida vem com None."""
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        if caminho.lower().endswith((".jsonl", ".ndjson")):
+            for numero, linha in enumerate(f, 1):
+                if not linha.strip(): continue
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    registro = None  # vira erro da linha na importação, sem interromper o lote
+                yield numero, registro
+            return
+
+        amostra = f.read(4096)
+        f.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+        except csv.Error:
+            dialeto = csv.excel
+        for numero, registro in enumerate(csv.DictReader(f, dialect=dialeto), 2):
+            yield numero, registro
+
+
+def _normalizar(registro: dict, tipo: str) -> dict:
+    if not isinstance(registro, dict): raise ValueError("A linha não é um objeto JSON válido.")
+    dados = {}
+    for chave, valor in registro.items():
+        if chave is None: continue
+        chave = chave.strip().lower()
+        dados[SINONIMOS.get(chave, chave)] = valor
+    faltando = [c for c in CAMPOS[tipo] if c != "descricao" and dados.get(c) in (None, "")]
+    if faltando:
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}")
+    return dados
+
+
+class _Resolvedor:
+    """Cache local das buscas: cada entidade é buscada no armazenamento uma única vez por lote."""
+
+    def __init__(self, arm, anomalias=None):
+        self.arm = arm
+        self._veiculos = {}
+        self._motoristas = {}
+        # Parâmetros do detector de anomalias (None = sem detecção) e alertas do lote.
+        self.anomalias = anomalias
+        self._detector = None
+        self.alertas = []
+
+    def veiculo(self, placa):
+        chave = normalizar_placa(placa)
+        if chave not in self._veiculos:
+            self._veiculos[chave] = self.arm.buscar_veiculo(placa)
+        veic = self._veiculos[chave]
+        if not veic: raise Exception(f"Veículo Placa {placa} não encontrado.")
+        return veic
+
+    def motorista(self, cpf):
+        chave = normalizar_cpf(cpf)
+        if chave not in self._motoristas:
+            self._motoristas[chave] = self.arm.buscar_motorista(cpf)
+        mot = self._motoristas[chave]
+        if not mot: raise Exception(f"Motorista CPF {cpf} não encontrado.")
+        return mot
+
+    def detector(self):
+        """Detector do lote (None = sem detecção); obtido antes de registrar o abastecimento avaliado."""
+        if self.anomalias is not None and self._detector is None:
+            self._detector = self.arm.detector_anomalias(**self.anomalias)
+        return self._detector
+
+
+def _aplicar_abastecimento(arm, resolvedor, dados):
+    veic = resolvedor.veiculo(dados["placa"])
+    abast = Abastecimento(_data(dados["data"]), dados["combustivel"], _numero(dados["litros"]), _numero(dados["valor"]))
+    detector = resolvedor.detector()
+    veic.abastecer(abast)
+    arm.registrar_abastecimento(veic, abast)
+    if detector is not None: resolvedor.alertas.extend(detector.avaliar(veic, abast))
+
+
+def _aplicar_manutencao(arm, resolvedor, dados):
+    veic = resolvedor.veiculo(dados["placa"])
+    manutencao = Manutencao(_data(dados["data"]), dados["tipo"], _numero(dados["custo"]), dados.get("descricao") or "",
+                            veic.tipo)
+    veic.adicionar_manutencao(manutencao)
+    arm.registrar_manutencao(veic, manutencao)
+
+
+def _aplicar_viagem(arm, resolvedor, dados):
+    mot = resolvedor.motorista(dados["cpf"])
+    veic = resolvedor.veiculo(dados["placa"])
+    viagem = Viagem(mot, veic, dados["destino"], _numero(dados["distancia"]),
+                    _data(dados["data"]) if dados.get("data") else None)
+    viagem.realizar_viagem(exibir_mensagem=False)
+    arm.registrar_viagem(veic, viagem.to_dict())
+
+
+APLICADORES = {
+    "abastecimentos": _aplicar_abastecimento,
+    "manutencoes": _aplicar_manutencao,
+    "viagens": _aplicar_viagem,
+}
+
+
+def importar_registros(arm, tipo: str, registros, anomalias=None) -> dict:
+    """
+    Aplica (linha, dict) com as validações dos modelos, em uma única transação
+    (carrega e grava uma vez). Linhas inválidas não interrompem o lote: vão
+    para a lista de erros do resumo, e cada linha roda em um ponto de
+    salvamento, então o que uma linha com erro chegou a alterar é desfeito.
+    Com `anomalias` (parâmetros do DetectorAnomalias), cada abastecimento
+    passa pelo detector e os alertas vão para o resumo.
+    """
+    if tipo not in APLICADORES:
+        raise ValueError(f"Tipo de importação inválido: {tipo}. Use {', '.join(APLICADORES)}.")
+
+    aplicar = APLICADORES[tipo]
+    resolvedor = _Resolvedor(arm, anomalias)
+    importados = 0
+    erros = []
+    with arm.transacao():
+        for linha, registro in registros:
+            try:
+                with arm.ponto_de_salvamento():
+                    aplicar(arm, resolvedor, _normalizar(registro, tipo))
+                importados += 1
+            except Exception as e:
+                erros.append({"linha": linha, "erro": str(e)})
+    return {"tipo": tipo, "importados": importados, "erros": erros, "alertas": resolvedor.alertas}
+
+
+def importar_arquivo(arm, tipo: str, caminho: str, anomalias=None) -> dict:
+    return importar_registros(arm, tipo, ler_registros(caminho), anomalias)
+
+
+def salvar_relatorio_erros(erros, caminho):
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=["linha", "erro"])
+        escritor.writeheader()
+        escritor.writerows(erros)
+
+
+if __name__ == "__main__":
+    import argparse
+    import controller
+
+    parser = argparse.ArgumentParser(description="Importação em lote para o sistema de frota.")
+    parser.add_argument("tipo", choices=sorted(APLICADORES))
+    parser.add_argument("arquivo", help="Arquivo .csv ou .jsonl")
+    parser.add_argument("--erros", help="Grava o relatório de erros por linha neste CSV")
+    args = parser.parse_args()
+
+    resultado = controller.importar_lote_controller(args.tipo, args.arquivo)
+    print(f"{resultado['importados']} registro(s) importado(s), {len(resultado['erros'])} erro(s).")
+    for erro in resultado["erros"][:20]:
+        print(f"  linha {erro['linha']}: {erro['erro']}")
+    if args.erros:
+        salvar_relatorio_erros(resultado["erros"], args.erros)
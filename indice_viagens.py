@@ -0,0 +1,196 @@
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from models import ordinal_da_data, data_do_ordinal
+from repositorio import normalizar_placa, normalizar_cpf
+from snapshot import EscritorColunas, LeitorColunas, SnapshotInvalidoError
+from trava import gravar_atomico
+
+# Campo da viagem -> normalização da chave.
+CAMPOS = {"cpf_motorista": normalizar_cpf, "placa_veiculo": normalizar_placa}
+# O arquivo é regravado quando as viagens ainda não gravadas passam de max(GRAVAR_A_CADA, 1/8 das gravadas):
+# custo amortizado O(1) por viagem, e ao abrir só essa cauda é relida do diário.
+GRAVAR_A_CADA = 1000
+
+
+class _Postagens:
+    """
+    Viagens de uma chave, em ordem de anexação: offset da linha no diário, distância e dia (ordinal).
+    Para as consultas por período, as posições ordenadas por dia (montadas na primeira consulta e
+    estendidas enquanto as viagens chegam em ordem de data).
+    """
+    __slots__ = ("offsets", "distancias", "dias", "_ordem", "_dias_ordenados")
+
+    def __init__(self):
+        self.offsets = array("q")
+        self.distancias = array("d")
+        self.dias = array("q")
+        self._ordem = None
+        self._dias_ordenados = None
+
+    def anexar(self, offset, distancia, dia):
+        if self._ordem is not None: self._estender_ordem(len(self.offsets), dia)
+        self.offsets.append(offset)
+        self.distancias.append(distancia)
+        self.dias.append(dia)
+
+    def _estender_ordem(self, k, dia):
+        if self._dias_ordenados and dia < self._dias_ordenados[-1]:
+            self._ordem = self._dias_ordenados = None  # fora de ordem: reordena na próxima consulta
+            return
+        self._ordem.append(k)
+        self._dias_ordenados.append(dia)
+
+    def selecao(self, inicio=None, fim=None):
+        """Posições das viagens do período, em ordem de anexação (custo proporcional às selecionadas)."""
+        if inicio is None and fim is None: return range(len(self.offsets))
+        if self._ordem is None:
+            self._ordem = array("q", sorted(range(len(self.dias)), key=self.dias.__getitem__))
+            self._dias_ordenados = array("q", (self.dias[k] for k in self._ordem))
+        i = 0 if inicio is None else bisect_left(self._dias_ordenados, inicio)
+        j = len(self._ordem) if fim is None else bisect_right(self._dias_ordenados, fim)
+        return sorted(self._ordem[i:j])
+
+
+class IndiceViagens:
+    """
+    Índices secundários do diário de viagens por motorista (cpf_motorista) e
+    por veículo (placa_veiculo), mantidos a cada anexação e gravados em
+    <diário>.chaves (layout colunar do snapshot.py). Ao abrir, só as viagens
+    anexadas depois da última gravação são lidas do diário. As consultas
+    custam proporcionalmente às viagens selecionadas (por período: bisect
+    nos dias ordenados da chave).
+    """
+
+    def __init__(self, diario):
+        self.diario = diario
+        self.arquivo = diario.arquivo + ".chaves"
+        self._postagens = None  # campo -> chave -> _Postagens
+        self._coberto = 0  # viagens do diário já indexadas
+        self._gravado = 0
+        self._inode = None  # o diário só é reescrito por rename: outro inode, outro conteúdo
+        diario.indices.append(self)
+
+    def _inode_diario(self):
+        try:
+            return os.stat(self.diario.arquivo).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _esvaziar(self):
+        self._postagens = {campo: {} for campo in CAMPOS}
+        self._coberto = self._gravado = 0
+
+    def _carregar(self):
+        self._esvaziar()
+        self._inode = self._inode_diario()
+        try:
+            with open(self.arquivo, "rb") as f:
+                leitor = LeitorColunas(f.read())
+            if leitor.entidade != b"I" or leitor.numeros("inode_diario")[0] != (self._inode or 0): return
+            for campo, postagens in self._postagens.items():
+                limites = leitor.numeros(campo + ".limites")
+                colunas = [leitor.numeros(f"{campo}.{nome}") for nome in ("offset", "distancia", "dia")]
+                for k, chave in enumerate(leitor.textos(campo)):
+                    p = postagens[chave] = _Postagens()
+                    p.offsets, p.distancias, p.dias = (c[limites[k]:limites[k + 1]] for c in colunas)
+            self._coberto = self._gravado = leitor.registros
+        except FileNotFoundError:
+            pass
+        except SnapshotInvalidoError:
+            self._esvaziar()  # arquivo danificado: refeito a partir do diário
+
+    def _indexar(self, viagens, offsets):
+        dias = {}  # strptime é o custo dominante; poucas datas distintas por lote
+        for dados, offset in zip(viagens, offsets):
+            distancia = float(dados.get("distancia") or 0)
+            data = dados.get("data") or ""
+            dia = dias.get(data)
+            if dia is None: dia = dias[data] = ordinal_da_data(data)
+            for campo, normalizar in CAMPOS.items():
+                chave = normalizar(str(dados.get(campo) or ""))
+                p = self._postagens[campo].get(chave)
+                if p is None: p = self._postagens[campo][chave] = _Postagens()
+                p.anexar(offset, distancia, dia)
+        self._coberto += len(viagens)
+
+    def em_dia(self):
+        """Carrega o índice (se preciso) e indexa as viagens anexadas por outros processos."""
+        if self._postagens is None or self._inode != self._inode_diario(): self._carregar()
+        total = len(self.diario)
+        if self._coberto > total:  # diário truncado por fora
+            self._esvaziar()
+        if self._coberto < total:
+            faltam = total - self._coberto
+            self._indexar(self.diario.ler(self._coberto, faltam), self.diario.offsets(self._coberto, faltam))
+            self._gravar_se_preciso()
+        return self
+
+    # --- Ganchos do DiarioViagens (chamados com a trava do diário) ---
+
+    def anexadas(self, posicao, viagens, offsets):
+        if self._postagens is None or self._coberto != posicao: return  # fica para a próxima consulta
+        self._indexar(viagens, offsets)
+        self._gravar_se_preciso()
+
+    def redefinir(self):
+        self._postagens = None
+        if os.path.exists(self.arquivo): os.remove(self.arquivo)
+
+    # --- Persistência ---
+
+    def _gravar_se_preciso(self):
+        if self._coberto - self._gravado >= max(GRAVAR_A_CADA, self._gravado // 8): self.gravar()
+
+    def gravar(self):
+        with self.diario.trava:
+            # Outro processo reescreveu o diário: este índice não vale para o arquivo atual.
+            if self._postagens is None or self._inode != self._inode_diario(): return
+            escritor = EscritorColunas(b"I", self._coberto)
+            escritor.numeros("inode_diario", "q", [self._inode or 0])
+            for campo, postagens in self._postagens.items():
+                limites = array("q", [0])
+                colunas = (array("q"), array("d"), array("q"))
+                for p in postagens.values():
+                    colunas[0].extend(p.offsets)
+                    colunas[1].extend(p.distancias)
+                    colunas[2].extend(p.dias)
+                    limites.append(len(colunas[0]))
+                escritor.textos(campo, list(postagens))
+                escritor.numeros(campo + ".limites", "q", limites)
+                for nome, coluna in zip(("offset", "distancia", "dia"), colunas):
+                    escritor.numeros(f"{campo}.{nome}", coluna.typecode, coluna)
+            gravar_atomico(self.arquivo, escritor.conteudo())
+            self._gravado = self._coberto
+
+    # --- Consultas (inicio/fim: ordinais inclusivos, None = sem limite) ---
+
+    def _postagem(self, campo, chave):
+        return self.em_dia()._postagens[campo].get(CAMPOS[campo](chave))
+
+    def viagens(self, campo, chave, inicio=None, fim=None) -> list:
+        p = self._postagem(campo, chave)
+        if p is None: return []
+        return self.diario.ler_em([p.offsets[k] for k in p.selecao(inicio, fim)])
+
+    def totais(self, campo, chave, inicio=None, fim=None) -> dict:
+        p = self._postagem(campo, chave)
+        selecao = p.selecao(inicio, fim) if p is not None else ()
+        return {"viagens": len(selecao), "distancia": sum(p.distancias[k] for k in selecao) if selecao else 0.0}
+
+    def utilizacao_motoristas(self, inicio=None, fim=None) -> list:
+        """Por CPF: viagens, km, dias com viagem e data da última viagem no período."""
+        linhas = []
+        for cpf, p in self.em_dia()._postagens["cpf_motorista"].items():
+            selecao = p.selecao(inicio, fim)
+            if not selecao: continue
+            dias = {p.dias[k] for k in selecao}
+            linhas.append({
+                "cpf": cpf,
+                "viagens": len(selecao),
+                "distancia": sum(p.distancias[k] for k in selecao),
+                "dias_ativos": len(dias),
+                "ultima_viagem": data_do_ordinal(max(dias)),
+            })
+        return linhas
@@ -0,0 +1,203 @@
+"""
+Instrumentação opcional das operações do controller: tempo de parede, bytes
+lidos/gravados, objetos materializados e tempo de parse/dump de JSON, com
+cProfile para chamadas lentas.
+
+Ativação: variável de ambiente FROTA_INSTRUMENTACAO=1 ou, no settings.json,
+"instrumentacao": {"ativa": true}. Desativada, cada chamada custa apenas a
+verificação da configuração.
+"""
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import configuracoes
+
+MAX_REGISTROS = 10000
+
+_registros = deque(maxlen=MAX_REGISTROS)
+_trava = threading.Lock()
+_local = threading.local()
+_ativa_settings = [0.0, False]  # (validade, valor): o settings.json é consultado no máximo 1x/s
+
+
+def _configuracao() -> dict:
+    return configuracoes.secao("instrumentacao")
+
+
+def ativa() -> bool:
+    valor = os.environ.get("FROTA_INSTRUMENTACAO")
+    if valor is not None: return valor.strip().lower() in ("1", "true", "sim", "s")
+    agora = time.monotonic()
+    if agora >= _ativa_settings[0]:
+        _ativa_settings[:] = [agora + 1.0, bool(_configuracao().get("ativa", False))]
+    return _ativa_settings[1]
+
+
+def limite_perfil_ms() -> float:
+    """Chamadas acima deste tempo têm o cProfile gravado em disco (0 = desligado)."""
+    valor = os.environ.get("FROTA_PERFIL_MS")
+    if valor is not None: return float(valor)
+    return float(_configuracao().get("perfil_acima_ms", 0))
+
+
+def _pilha() -> list:
+    pilha = getattr(_local, "pilha", None)
+    if pilha is None: pilha = _local.pilha = []
+    return pilha
+
+
+# --- Ganchos chamados pela camada de E/S (sem efeito fora de uma chamada medida) ---
+
+def _somar(campo, valor):
+    pilha = getattr(_local, "pilha", None)
+    if not pilha: return
+    # Chamadas aninhadas (ex.: carregar_veiculos dentro de um *_controller) somam também no chamador.
+    for quadro in pilha:
+        quadro[campo] += valor
+
+
+def contar_leitura(n: int):
+    _somar("bytes_lidos", n)
+
+
+def contar_escrita(n: int):
+    _somar("bytes_escritos", n)
+
+
+def contar_objetos(n: int):
+    _somar("objetos", n)
+
+
+def contar_json(operacao: str, segundos: float):
+    _somar("json_parse_ms" if operacao == "parse" else "json_dump_ms", segundos * 1000)
+
+
+# --- Medição das funções ---
+
+def _gravar_perfil(perfil, nome):
+    pasta = _configuracao().get("pasta_perfis", "perfis")
+    if not os.path.exists(pasta): os.makedirs(pasta)
+    caminho = os.path.join(pasta, f"{nome}-{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+    perfil.dump_stats(caminho)
+    return caminho
+
+
+def _registrar(registro):
+    with _trava:
+        _registros.append(registro)
+    arquivo = _configuracao().get("arquivo")
+    if arquivo:
+        with open(arquivo, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def _executar_medindo(funcao, args, kwargs):
+    pilha = _pilha()
+    quadro = {"bytes_lidos": 0, "bytes_escritos": 0, "objetos": 0, "json_parse_ms": 0.0, "json_dump_ms": 0.0}
+    limite = limite_perfil_ms() if not pilha else 0
+    perfil = None
+    if limite > 0:
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:  # outro profiler já ativo
+            perfil = None
+
+    pilha.append(quadro)
+    momento = datetime.now().isoformat(timespec="milliseconds")
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        return funcao(*args, **kwargs)
+    except BaseException as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        pilha.pop()
+        if perfil is not None: perfil.disable()
+        registro = {
+            "funcao": funcao.__name__,
+            "inicio": momento,
+            "duracao_ms": duracao_ms,
+            "profundidade": len(pilha),
+            "erro": erro,
+            "perfil": _gravar_perfil(perfil, funcao.__name__) if perfil is not None and duracao_ms >= limite else None,
+        }
+        registro.update(quadro)
+        _registrar(registro)
+
+
+def instrumentado(funcao):
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        if not ativa(): return funcao(*args, **kwargs)
+        return _executar_medindo(funcao, args, kwargs)
+    envolvida.instrumentada = True
+    return envolvida
+
+
+def instrumentar(namespace: dict, deve_medir):
+    """Envolve as funções definidas no próprio módulo cujo nome satisfaz `deve_medir(nome)`."""
+    for nome, valor in list(namespace.items()):
+        if (callable(valor) and getattr(valor, "__module__", None) == namespace["__name__"]
+                and not getattr(valor, "instrumentada", False) and deve_medir(nome)):
+            namespace[nome] = instrumentado(valor)
+
+
+# --- Consulta e exportação ---
+
+def registros() -> list:
+    with _trava:
+        return list(_registros)
+
+
+def limpar():
+    with _trava:
+        _registros.clear()
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+def resumo() -> list:
+    """Totais por função, da que mais consumiu tempo à que menos consumiu."""
+    por_funcao = {}
+    for r in registros():
+        por_funcao.setdefault(r["funcao"], []).append(r)
+
+    linhas = []
+    for nome, chamadas in por_funcao.items():
+        duracoes = [c["duracao_ms"] for c in chamadas]
+        linhas.append({
+            "funcao": nome,
+            "chamadas": len(chamadas),
+            "erros": sum(1 for c in chamadas if c["erro"]),
+            "total_ms": sum(duracoes),
+            "media_ms": sum(duracoes) / len(duracoes),
+            "p95_ms": _percentil(duracoes, 95),
+            "max_ms": max(duracoes),
+            "bytes_lidos": sum(c["bytes_lidos"] for c in chamadas),
+            "bytes_escritos": sum(c["bytes_escritos"] for c in chamadas),
+            "objetos": sum(c["objetos"] for c in chamadas),
+            "json_ms": sum(c["json_parse_ms"] + c["json_dump_ms"] for c in chamadas),
+            "perfis": [c["perfil"] for c in chamadas if c["perfil"]],
+        })
+    linhas.sort(key=lambda l: l["total_ms"], reverse=True)
+    return linhas
+
+
+def exportar_jsonl(caminho) -> int:
+    dados = registros()
+    with open(caminho, "w", encoding="utf-8") as f:
+        for r in dados:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return len(dados)
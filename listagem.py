@@ -0,0 +1,130 @@
+from bisect import bisect_left, insort
+from itertools import islice
+
+from repositorio import normalizar_placa
+
+# Chave de ordenação -> valor do veículo. Empates seguem a ordem de cadastro.
+ORDENACOES = {
+    "placa": lambda v: normalizar_placa(v.placa),
+    "km": lambda v: v.quilometragem,
+    "ano": lambda v: v.ano,
+}
+
+
+def linha_listagem(veiculo) -> dict:
+    """Só os campos de cabeçalho: nenhum histórico é lido ou materializado."""
+    return {
+        "placa": veiculo.placa,
+        "tipo": veiculo.tipo,
+        "marca": veiculo.marca,
+        "modelo": veiculo.modelo,
+        "ano": veiculo.ano,
+        "quilometragem": veiculo.quilometragem,
+        "status": veiculo.status.value,
+    }
+
+
+def paginar(total, pagina, por_pagina, buscar) -> dict:
+    """Página `pagina` (1 = primeira, limitada ao intervalo válido); buscar(inicio, quantidade) devolve as linhas."""
+    por_pagina = max(1, int(por_pagina))
+    paginas = max(1, -(-total // por_pagina))
+    pagina = min(max(1, int(pagina)), paginas)
+    return {
+        "linhas": buscar((pagina - 1) * por_pagina, por_pagina),
+        "pagina": pagina,
+        "paginas": paginas,
+        "por_pagina": por_pagina,
+        "total": total,
+    }
+
+
+class IndiceListagem:
+    """
+    Índices da listagem da frota: para cada chave de ordenação, uma lista
+    ordenada de (valor, ordem), criada no primeiro uso e mantida a cada
+    alteração como no RankingEficiencia; e contagens por (status, tipo) para
+    o total das consultas filtradas. Sem filtro, a página é uma fatia direta
+    do índice; com filtro, o índice é percorrido até completar a página.
+    """
+
+    def __init__(self, veiculos=(), geracao=None):
+        self.geracao = geracao
+        self._veiculos = {}  # ordem -> veículo
+        self._por_placa = {}
+        self._filtros = {}  # ordem -> (status, tipo) indexados
+        self._contagens = {}
+        self._ordenados = {}  # chave -> [(valor, ordem)]
+        self._valores = {}  # chave -> {ordem: valor indexado}
+        self._proxima_ordem = 0
+        for v in veiculos:
+            self.atualizar(v)
+
+    def __len__(self):
+        return len(self._veiculos)
+
+    def _indice(self, ordem_por):
+        indice = self._ordenados.get(ordem_por)
+        if indice is None:
+            valor = ORDENACOES[ordem_por]
+            valores = self._valores[ordem_por] = {ordem: valor(v) for ordem, v in self._veiculos.items()}
+            indice = self._ordenados[ordem_por] = sorted((v, ordem) for ordem, v in valores.items())
+        return indice
+
+    def _contar(self, filtro, delta):
+        self._contagens[filtro] = self._contagens.get(filtro, 0) + delta
+
+    def atualizar(self, veiculo):
+        """Insere ou reposiciona o veículo em cada índice já criado."""
+        placa = normalizar_placa(veiculo.placa)
+        ordem = self._por_placa.get(placa)
+        if ordem is None:
+            ordem = self._por_placa[placa] = self._proxima_ordem
+            self._proxima_ordem += 1
+        else:
+            self._contar(self._filtros[ordem], -1)
+        self._veiculos[ordem] = veiculo
+        self._filtros[ordem] = (veiculo.status.value, veiculo.tipo)
+        self._contar(self._filtros[ordem], 1)
+        for chave, indice in self._ordenados.items():
+            valores = self._valores[chave]
+            novo = ORDENACOES[chave](veiculo)
+            antigo = valores.get(ordem)
+            if ordem in valores:
+                if antigo == novo: continue
+                del indice[bisect_left(indice, (antigo, ordem))]
+            valores[ordem] = novo
+            insort(indice, (novo, ordem))
+
+    def remover(self, placa):
+        ordem = self._por_placa.pop(normalizar_placa(placa), None)
+        if ordem is None: return
+        self._contar(self._filtros.pop(ordem), -1)
+        del self._veiculos[ordem]
+        for chave, indice in self._ordenados.items():
+            del indice[bisect_left(indice, (self._valores[chave].pop(ordem), ordem))]
+
+    def total(self, status=None, tipo=None) -> int:
+        if status is None and tipo is None: return len(self._veiculos)
+        return sum(n for (s, t), n in self._contagens.items()
+                   if (status is None or s == status) and (tipo is None or t == tipo))
+
+    def linhas(self, status=None, tipo=None, ordem_por="placa", decrescente=False, inicio=0):
+        """Gera as linhas na ordem pedida, a partir da posição `inicio` entre as que passam no filtro."""
+        indice = self._indice(ordem_por)
+        posicoes = range(len(indice) - 1, -1, -1) if decrescente else range(len(indice))
+        if status is None and tipo is None:
+            for i in posicoes[inicio:]:
+                yield linha_listagem(self._veiculos[indice[i][1]])
+            return
+        for i in posicoes:
+            ordem = indice[i][1]
+            s, t = self._filtros[ordem]
+            if (status is not None and s != status) or (tipo is not None and t != tipo): continue
+            if inicio:
+                inicio -= 1
+                continue
+            yield linha_listagem(self._veiculos[ordem])
+
+    def pagina(self, status=None, tipo=None, ordem_por="placa", decrescente=False, pagina=1, por_pagina=50) -> dict:
+        return paginar(self.total(status, tipo), pagina, por_pagina, lambda inicio, quantidade: list(
+            islice(self.linhas(status, tipo, ordem_por, decrescente, inicio), quantidade)))
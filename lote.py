@@ -0,0 +1,142 @@
+"""
+Modo não interativo do CLI: executa um fluxo de operações em JSONL (uma por
+linha) em uma única sessão, com a frota carregada uma vez e gravada a cada
+`checkpoint` operações (uma transação por bloco, como os lotes do servidor).
+
+    {"op": "abastecimento", "placa": "ABC-1234", "data": "02/01/2025", "combustivel": "Gasolina", "litros": 40, "valor": 240}
+
+Os demais campos são os argumentos da operação (ver OPERACOES); "id", se
+houver, volta no resultado. Cada operação gera uma linha de resultado JSON,
+escrita depois da gravação do bloco: {"linha", "ok", "op", "resultado" | "erro"}.
+Uma operação que falha é desfeita por inteiro (ponto de salvamento) sem
+afetar as demais do bloco.
+{"op": "checkpoint"} grava o bloco na hora.
+"""
+import json
+
+import controller
+
+CHECKPOINT = 1000
+
+
+def _buscar_veiculo(placa):
+    v = controller.buscar_veiculo(placa)
+    return v.to_dict(incluir_historicos=False) if v else None
+
+
+def _buscar_motorista(cpf):
+    m = controller.buscar_motorista(cpf)
+    return m.to_dict() if m else None
+
+
+def _viagem(cpf, placa, destino, distancia, data=None):
+    # Pelo despacho em lote, como o POST /viagens do servidor: sem mensagens no stdout dos resultados.
+    resultado = controller.realizar_viagens_lote([(cpf, placa, destino, distancia, data)])[0]
+    if not resultado["sucesso"]: raise Exception(resultado["erro"])
+    return {"quilometragem": resultado["quilometragem"]}
+
+
+def _relatorio_custos(inicio=None, fim=None):
+    if inicio: return controller.gerar_relatorio_custos_periodo(inicio, fim)
+    return controller.gerar_relatorio_custos()
+
+
+def _relatorio_eficiencia(inicio=None, fim=None):
+    if inicio: return controller.gerar_relatorio_eficiencia_periodo(inicio, fim)
+    return controller.gerar_relatorio_eficiencia()
+
+
+# Nome da operação -> função; os argumentos têm os nomes dos parâmetros do controller.
+OPERACOES = {
+    "cadastrar_veiculo": controller.cadastrar_veiculo_controller,
+    "cadastrar_motorista": controller.cadastrar_motorista_controller,
+    "atualizar_veiculo": controller.atualizar_veiculo_controller,
+    "atualizar_motorista": controller.atualizar_motorista_controller,
+    "viagem": _viagem,
+    "abastecimento": controller.registrar_abastecimento_controller,
+    "manutencao": controller.registrar_manutencao_controller,
+    "finalizar_manutencao": controller.finalizar_manutencao_controller,
+    "buscar_veiculo": _buscar_veiculo,
+    "buscar_motorista": _buscar_motorista,
+    "listar_frota": controller.listar_frota_controller,
+    "relatorio_custos": _relatorio_custos,
+    "relatorio_eficiencia": _relatorio_eficiencia,
+    "totais_periodo": controller.totais_periodo_controller,
+    "viagens_motorista": controller.viagens_do_motorista_controller,
+    "viagens_veiculo": controller.viagens_do_veiculo_controller,
+    "utilizacao_motoristas": controller.utilizacao_motoristas_controller,
+    "proximas_revisoes": controller.proximas_revisoes_controller,
+    "revisoes_vencidas": controller.revisoes_vencidas_controller,
+    "alertas": controller.listar_alertas_controller,
+    "recalcular_custos": controller.recalcular_custos_controller,
+}
+
+
+def _executar_linha(numero, linha) -> dict:
+    resultado = {"linha": numero, "ok": False}
+    try:
+        operacao = json.loads(linha)
+        if not isinstance(operacao, dict): raise Exception("A linha deve ser um objeto JSON.")
+        if "id" in operacao: resultado["id"] = operacao.pop("id")
+        nome = resultado["op"] = operacao.pop("op", None)
+        funcao = OPERACOES.get(nome)
+        if funcao is None: raise Exception(f"Operação desconhecida: {nome}.")
+        with controller.obter_armazenamento().ponto_de_salvamento():
+            resultado["resultado"] = funcao(**operacao)
+        resultado["ok"] = True
+    except json.JSONDecodeError:
+        resultado.update(ok=False, erro="Linha não é um JSON válido.")
+    except TypeError as e:  # argumentos que a operação não aceita (ou faltando)
+        resultado.update(ok=False, erro=f"Argumentos inválidos: {e}")
+    except Exception as e:
+        resultado.update(ok=False, erro=str(e))
+    return resultado
+
+
+def _aplicar(bloco) -> list:
+    """Um bloco em uma transação: as operações que deram certo só são confirmadas com a gravação do bloco."""
+    resultados = []
+    try:
+        with controller.obter_armazenamento().transacao():
+            for numero, linha in bloco:
+                resultados.append(_executar_linha(numero, linha))
+    except Exception as e:  # falha ao gravar: nenhuma operação do bloco foi confirmada
+        erro = f"Falha ao gravar o bloco: {e}"
+        resultados = [{"linha": numero, "ok": False, "erro": erro} for numero, _ in bloco]
+    return resultados
+
+
+def _checkpoint(linha) -> bool:
+    if '"checkpoint"' not in linha: return False
+    try:
+        return json.loads(linha).get("op") == "checkpoint"
+    except (ValueError, AttributeError):
+        return False
+
+
+def executar(entrada, saida, checkpoint=CHECKPOINT) -> dict:
+    """Lê as operações de `entrada` (linhas JSONL) e escreve um resultado por operação em `saida`."""
+    resumo = {"operacoes": 0, "erros": 0}
+    bloco = []
+
+    def gravar_bloco():
+        for r in _aplicar(bloco):
+            saida.write(json.dumps(r, ensure_ascii=False) + "\n")
+            resumo["operacoes"] += 1
+            resumo["erros"] += not r["ok"]
+        saida.flush()
+        bloco.clear()
+
+    try:
+        for numero, linha in enumerate(entrada, 1):
+            if not linha.strip(): continue
+            if _checkpoint(linha):
+                if bloco: gravar_bloco()
+                continue
+            bloco.append((numero, linha))
+            if len(bloco) >= max(1, checkpoint): gravar_bloco()
+        if bloco: gravar_bloco()
+    finally:
+        # Blocos já confirmados em write-behind vão ao disco mesmo se a leitura ou a saída falhar.
+        controller.descarregar_armazenamentos()
+    return resumo
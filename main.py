@@ -1,8 +1,19 @@
+import argparse
+import sys
+
 import controller
+import lote
 import views
 from models import AlocacaoInvalidaError, ManutencaoInvalidaError
 
 def main():
+    try:
+        _menu()
+    finally:
+        # Em write-behind ainda pode haver um grupo em memória: grava ao sair do menu, por qualquer caminho.
+        controller.descarregar_armazenamentos()
+
+def _menu():
     while True:
         views.exibir_cabecalho()
         print("--- GESTÃO DE CADASTROS ---")
@@ -18,17 +29,44 @@ def main():
         print("9.  Registrar Abastecimento")
         print("10. Registrar Manutenção")
         print("11. Finalizar Manutenção (Liberar Veículo)")
+        print("16. Importar Lote (CSV/JSONL)")
+        print("20. Despachar Viagens em Lote")
+        print("21. Alocar Viagens Automaticamente")
         print("\n--- RELATÓRIOS GERENCIAIS ---")
         print("12. Relatório de Custos Manutenção")
         print("13. Ranking de Eficiência (Km/l)")
+        print("14. Últimas Viagens Registradas")
+        print("15. Verificar Consistência dos Agregados")
+        print("17. Painel Analítico da Frota")
+        print("18. Fechamento Mensal (Custos e Eficiência do Mês)")
+        print("19. Instrumentação (Tempos e E/S das Operações)")
+        print("22. Agenda de Revisões Preventivas")
+        print("23. Viagens por Motorista ou Veículo")
+        print("24. Utilização dos Motoristas")
+        print("25. Alertas de Abastecimento (Anomalias)")
+        print("26. Cache de Veículos (Acertos e Despejos)")
+        print("27. Recalcular Custos de Manutenção (Regras do settings.json)")
         print("0.  Sair")
         
         opcao = input("\nEscolha uma opção: ")
 
         try:
             if opcao == "1":
-                veiculos = controller.carregar_veiculos()
-                views.exibir_relatorio_frota([v.to_dict() for v in veiculos])
+                status = input("Status (vazio = todos; Ativo/Manutencao/Inativo): ")
+                tipo = input("Tipo (vazio = todos; Carro/Moto/Caminhao): ")
+                ordem = input("Ordenar por (placa/km/ano, vazio = placa): ")
+                decrescente = input("Decrescente? (s/n): ").lower() == "s"
+                pagina = 1
+                while True:
+                    dados = controller.listar_frota_controller(status, tipo, ordem, decrescente, pagina)
+                    views.exibir_pagina_frota(dados)
+                    if dados["paginas"] <= 1: break
+                    comando = input("[Enter] próxima, [a] anterior, número = ir para a página, [s] sair: ").strip().lower()
+                    if comando == "s": break
+                    elif comando == "a": pagina = max(1, dados["pagina"] - 1)
+                    elif comando.isdigit(): pagina = int(comando)
+                    elif dados["pagina"] == dados["paginas"]: break
+                    else: pagina = dados["pagina"] + 1
             
             elif opcao == "2":
                 print("\n--- Novo Veículo ---")
@@ -85,7 +123,8 @@ def main():
                 placa = input("Placa Veículo: ")
                 dest = input("Destino: ")
                 dist = input("Distância (km): ")
-                msg = controller.realizar_viagem_controller(cpf, placa, dest, dist)
+                data = input("Data (DD/MM/AAAA, vazio = hoje): ").strip()
+                msg = controller.realizar_viagem_controller(cpf, placa, dest, dist, data or None)
                 print(f"SUCESSO: {msg}")
 
             elif opcao == "9":
@@ -111,6 +150,65 @@ def main():
                 msg = controller.finalizar_manutencao_controller(placa)
                 print(f"SUCESSO: {msg}")
             
+            elif opcao == "16":
+                tipo = input("Tipo (abastecimentos/manutencoes/viagens): ")
+                caminho = input("Arquivo (.csv ou .jsonl): ")
+                resultado = controller.importar_lote_controller(tipo, caminho)
+                views.exibir_resultado_importacao(resultado)
+
+            elif opcao == "20":
+                print("Uma viagem por linha: CPF;Placa;Destino;Distância[;Data]. Linha vazia encerra.")
+                viagens = []
+                while True:
+                    linha = input("> ").strip()
+                    if not linha: break
+                    viagens.append(tuple(campo.strip() for campo in linha.split(";")))
+                views.exibir_resultado_viagens_lote(controller.realizar_viagens_lote(viagens))
+
+            elif opcao == "21":
+                print("Uma viagem por linha: Destino;Distância[;Tipo[;Data]]. Linha vazia encerra.")
+                pendentes = []
+                while True:
+                    linha = input("> ").strip()
+                    if not linha: break
+                    pendentes.append(tuple(campo.strip() for campo in linha.split(";")))
+                plano = controller.alocar_viagens_controller(pendentes)
+                views.exibir_alocacao_viagens(plano)
+                if any(not a["erro"] for a in plano["alocacoes"]) and input("Confirmar despacho? (s/n): ").lower() == "s":
+                    views.exibir_resultado_viagens_lote(controller.despachar_alocacoes_lote(plano["alocacoes"]))
+
+            elif opcao == "22":
+                views.exibir_agenda_revisoes(controller.revisoes_vencidas_controller(),
+                                             controller.proximas_revisoes_controller(10))
+
+            elif opcao == "23":
+                chave = input("CPF do motorista ou placa do veículo: ")
+                inicio = input("Data inicial (DD/MM/AAAA, vazio = todo o histórico): ")
+                fim = input("Data final (DD/MM/AAAA): ") if inicio.strip() else ""
+                if controller.buscar_motorista(chave):
+                    views.exibir_viagens_entidade(f"motorista {chave}", controller.viagens_do_motorista_controller(chave, inicio, fim))
+                else:
+                    views.exibir_viagens_entidade(f"veículo {chave}", controller.viagens_do_veiculo_controller(chave, inicio, fim))
+
+            elif opcao == "24":
+                inicio = input("Data inicial (DD/MM/AAAA, vazio = todo o histórico): ")
+                fim = input("Data final (DD/MM/AAAA): ") if inicio.strip() else ""
+                views.exibir_utilizacao_motoristas(controller.utilizacao_motoristas_controller(inicio, fim))
+
+            elif opcao == "25":
+                views.exibir_alertas_abastecimento(controller.listar_alertas_controller(50))
+                if input("Reprocessar todo o histórico de abastecimentos? (s/n): ").lower() == "s":
+                    resumo = controller.reprocessar_alertas_controller()
+                    print(f"SUCESSO: {resumo['abastecimentos']} abastecimento(s) analisado(s), {resumo['alertas']} alerta(s).")
+
+            elif opcao == "26":
+                views.exibir_estatisticas_cache(controller.estatisticas_cache_controller())
+
+            elif opcao == "27":
+                views.exibir_impacto_custos(controller.recalcular_custos_controller())
+                if input("Aplicar os custos recalculados ao histórico? (s/n): ").lower() == "s":
+                    views.exibir_impacto_custos(controller.recalcular_custos_controller(aplicar=True))
+
             elif opcao == "12":
                 dados = controller.gerar_relatorio_custos()
                 views.exibir_relatorio_custos(dados)
@@ -119,6 +217,34 @@ def main():
                 dados = controller.gerar_relatorio_eficiencia()
                 views.exibir_ranking_eficiencia(dados)
 
+            elif opcao == "14":
+                dados = controller.ultimas_viagens(20)
+                views.exibir_viagens(dados)
+
+            elif opcao == "15":
+                dados = controller.verificar_agregados_controller()
+                views.exibir_divergencias_agregados(dados)
+                if dados and input("Recalcular agregados a partir do histórico? (s/n): ").lower() == "s":
+                    controller.verificar_agregados_controller(corrigir=True)
+                    print("SUCESSO: Agregados recalculados.")
+
+            elif opcao == "17":
+                views.exibir_painel_analitico(controller.gerar_painel_analitico())
+
+            elif opcao == "18":
+                mes = input("Mês (1-12): ")
+                ano = input("Ano (AAAA): ")
+                inicio, fim = controller.periodo_do_mes(mes, ano)
+                views.exibir_totais_periodo(inicio, fim, controller.totais_periodo_controller(inicio, fim))
+                views.exibir_relatorio_custos(controller.gerar_relatorio_custos_periodo(inicio, fim))
+                views.exibir_ranking_eficiencia(controller.gerar_relatorio_eficiencia_periodo(inicio, fim))
+
+            elif opcao == "19":
+                views.exibir_resumo_instrumentacao(controller.resumo_instrumentacao())
+                caminho = input("Exportar chamadas para JSONL (caminho, vazio = não): ").strip()
+                if caminho:
+                    print(f"SUCESSO: {controller.exportar_instrumentacao(caminho)} chamada(s) exportada(s).")
+
             elif opcao == "0":
                 print("Encerrando sistema...")
                 break
@@ -132,5 +258,22 @@ def main():
         
         input("\nPressione Enter para continuar...")
 
+def executar_lote(caminho, checkpoint):
+    """Modo --batch: operações JSONL do arquivo (ou stdin, com "-"); resultados JSONL no stdout."""
+    if caminho == "-":
+        resumo = lote.executar(sys.stdin, sys.stdout, checkpoint)
+    else:
+        with open(caminho, "r", encoding="utf-8") as entrada:
+            resumo = lote.executar(entrada, sys.stdout, checkpoint)
+    print(f"{resumo['operacoes']} operação(ões), {resumo['erros']} erro(s).", file=sys.stderr)
+    return 1 if resumo["erros"] else 0
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sistema de Gestão de Frota")
+    parser.add_argument("--batch", metavar="ARQUIVO",
+                        help="executa as operações JSONL do arquivo (- = stdin) sem o menu (ver lote.py)")
+    parser.add_argument("--checkpoint", type=int, default=lote.CHECKPOINT,
+                        help=f"operações por gravação no modo --batch (padrão: {lote.CHECKPOINT})")
+    args = parser.parse_args()
+    if args.batch: sys.exit(executar_lote(args.batch, args.checkpoint))
     main()
\ No newline at end of file
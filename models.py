@@ -1,7 +1,15 @@
+import sys
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from functools import lru_cache
 from enum import Enum
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any
 
+import instrumentacao
+
 class AlocacaoInvalidaError(Exception):
     pass
 
@@ -11,6 +19,32 @@ class ManutencaoInvalidaError(Exception):
 class OperacaoInvalidaError(Exception):
     pass
 
+@lru_cache(maxsize=4096)
+def ordinal_da_data(data: str) -> int:
+    """Converte "DD/MM/AAAA" em ordinal (date.toordinal); 0 quando a data não é reconhecida."""
+    try:
+        return datetime.strptime(data.strip(), "%d/%m/%Y").toordinal()
+    except (ValueError, AttributeError):
+        return 0
+
+def ordinal(data) -> int:
+    """Aceita ordinal (int), date/datetime ou "DD/MM/AAAA"."""
+    if isinstance(data, int): return data
+    if isinstance(data, date): return data.toordinal()
+    return ordinal_da_data(data)
+
+def data_do_ordinal(dia: int) -> str:
+    return date.fromordinal(dia).strftime("%d/%m/%Y") if dia > 0 else ""
+
+def intervalo_mes(ano: int, mes: int):
+    """(primeiro, último) dia do mês como ordinais, para as consultas por período."""
+    inicio = date(int(ano), int(mes), 1)
+    proximo = date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    return inicio.toordinal(), proximo.toordinal() - 1
+
+def _ordenar_por_data(dicts) -> list:
+    return sorted(dicts, key=lambda d: ordinal_da_data(d['data']))
+
 class StatusVeiculo(Enum):
     ATIVO = "Ativo"
     MANUTENCAO = "Em Manutenção"
@@ -25,24 +59,119 @@ class ManutencaoBasica(EstrategiaManutencao):
     def calcular_custo(self, valor_base: float) -> float:
         return valor_base
 
-class ManutencaoCorretiva(EstrategiaManutencao):
+class ManutencaoMultiplicador(EstrategiaManutencao):
+    __slots__ = ("fator",)
+
+    def __init__(self, fator: float):
+        self.fator = fator
+
     def calcular_custo(self, valor_base: float) -> float:
-        return valor_base * 1.20
+        return valor_base * self.fator
+
+class ManutencaoCorretiva(ManutencaoMultiplicador):
+    def __init__(self):
+        super().__init__(1.20)
+
+ESTRATEGIA_PADRAO = ManutencaoBasica()
+
+def _chave_tipo(tipo) -> str:
+    return (tipo or "").strip().lower().replace("ã", "a")
+
+class TabelaCustos:
+    """
+    Regras de custo das manutenções (seção "regras_custo" do settings.json):
+    custo_final = custo_base x padrao x por_tipo_manutencao[tipo] x por_tipo_veiculo[tipo do veículo]
+    x o multiplicador de cada período (com tipo de manutenção e/ou de veículo opcionais) que contém a data.
+    Cada combinação (tipo, tipo do veículo) é compilada uma vez em faixas de datas, e cada
+    fator distinto vira uma estratégia compartilhada.
+    """
+
+    def __init__(self, regras=None):
+        self.regras = regras or {}
+        self.padrao = float(self.regras.get("padrao", 1.0))
+        tipos = self.regras.get("por_tipo_manutencao", {"corretiva": 1.20})
+        self.por_tipo_manutencao = {_chave_tipo(t): float(f) for t, f in tipos.items()}
+        self.por_tipo_veiculo = {_chave_tipo(t): float(f) for t, f in self.regras.get("por_tipo_veiculo", {}).items()}
+        self.periodos = []
+        for p in self.regras.get("periodos", []):
+            inicio, fim = ordinal_da_data(p.get("inicio") or ""), ordinal_da_data(p.get("fim") or "")
+            if (p.get("inicio") and not inicio) or (p.get("fim") and not fim):
+                raise ValueError(f"regras_custo: data inválida no período {p}. Use DD/MM/AAAA.")
+            self.periodos.append((inicio, fim or sys.maxsize, float(p["multiplicador"]),
+                                  _chave_tipo(p["tipo_manutencao"]) if p.get("tipo_manutencao") else None,
+                                  _chave_tipo(p["tipo_veiculo"]) if p.get("tipo_veiculo") else None))
+        self._estrategias = {}
+        self._compiladas = {}
+
+    def _estrategia(self, fator) -> EstrategiaManutencao:
+        if fator == 1.0: return ESTRATEGIA_PADRAO
+        estrategia = self._estrategias.get(fator)
+        if estrategia is None: estrategia = self._estrategias[fator] = ManutencaoMultiplicador(fator)
+        return estrategia
+
+    def _compilar(self, tipo, tipo_veiculo):
+        """(limites, estratégias): a estratégia de um dia é estrategias[bisect_right(limites, dia)]."""
+        fator = self.padrao * self.por_tipo_manutencao.get(tipo, 1.0) * self.por_tipo_veiculo.get(tipo_veiculo, 1.0)
+        periodos = [(i, f, m) for i, f, m, t, tv in self.periodos if t in (None, tipo) and tv in (None, tipo_veiculo)]
+        limites = sorted({i for i, _, _ in periodos} | {f + 1 for _, f, _ in periodos if f < sys.maxsize})
+        estrategias = []
+        for inicio in [-1] + limites:
+            fator_faixa = fator
+            for i, f, m in periodos:
+                if i <= inicio <= f: fator_faixa *= m
+            estrategias.append(self._estrategia(fator_faixa))
+        return limites, estrategias
+
+    def estrategia(self, tipo, tipo_veiculo=None, dia=0) -> EstrategiaManutencao:
+        chave = (_chave_tipo(tipo), _chave_tipo(tipo_veiculo))
+        compilada = self._compiladas.get(chave)
+        if compilada is None: compilada = self._compiladas[chave] = self._compilar(*chave)
+        limites, estrategias = compilada
+        return estrategias[bisect_right(limites, dia)] if limites else estrategias[0]
+
+_tabela_custos = TabelaCustos()
+
+def configurar_regras_custo(regras):
+    """Troca as regras de custo (só recompila se mudaram). Custos já gravados não mudam: ver recalcular_custos_manutencao."""
+    global _tabela_custos
+    if (regras or {}) != _tabela_custos.regras: _tabela_custos = TabelaCustos(regras)
+
+def estrategia_para(tipo: str, tipo_veiculo: str = None, dia: int = 0) -> EstrategiaManutencao:
+    return _tabela_custos.estrategia(tipo, tipo_veiculo, dia)
 
 class Manutencao:
-    def __init__(self, data: str, tipo: str, custo_base: float, descricao: str):
+    __slots__ = ("data", "ordinal", "tipo", "descricao", "custo_base", "custo_final", "estrategia")
+
+    def __init__(self, data: str, tipo: str, custo_base: float, descricao: str, tipo_veiculo: str = None):
         self.data = data
+        self.ordinal = ordinal_da_data(data)
         self.tipo = tipo
         self.descricao = descricao
         self.custo_base = float(custo_base)
-        
-        if self.tipo.lower() == "corretiva":
-            self.estrategia = ManutencaoCorretiva()
-        else:
-            self.estrategia = ManutencaoBasica()
-            
+        self.estrategia = estrategia_para(self.tipo, tipo_veiculo, self.ordinal)
         self.custo_final = self.estrategia.calcular_custo(self.custo_base)
 
+    @classmethod
+    def restaurar(cls, data: str, tipo: str, custo_base: float, custo_final: float, descricao: str):
+        """
+        Reconstrói um registro já calculado, preservando o custo_final gravado (sem recalcular).
+        Sem estratégia: a regra que vale hoje pode não ser a que gerou o custo gravado.
+        """
+        manut = cls.__new__(cls)
+        manut.data = data
+        manut.ordinal = ordinal_da_data(data)
+        manut.tipo = sys.intern(tipo)
+        manut.descricao = descricao
+        manut.custo_base = float(custo_base)
+        manut.estrategia = None
+        manut.custo_final = float(custo_final)
+        return manut
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls.restaurar(data['data'], data['tipo'], data['custo_base'],
+                             data.get('custo_final', data['custo_base']), data.get('descricao', ''))
+
     def to_dict(self):
         return {
             "data": self.data,
@@ -53,12 +182,19 @@ class Manutencao:
         }
 
 class Abastecimento:
+    __slots__ = ("data", "ordinal", "combustivel", "litros", "valor")
+
     def __init__(self, data: str, combustivel: str, litros: float, valor: float):
         self.data = data
+        self.ordinal = ordinal_da_data(data)
         self.combustivel = combustivel
         self.litros = float(litros)
         self.valor = float(valor)
 
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['data'], sys.intern(data['combustivel']), data['litros'], data['valor'])
+
     def to_dict(self):
         return {
             "data": self.data,
@@ -67,6 +203,130 @@ class Abastecimento:
             "valor": self.valor
         }
 
+class HistoricoManutencoes:
+    """
+    Histórico colunar: valores numéricos em array('d') e textos em listas.
+    Iterar/indexar devolve registros Manutencao montados na hora (cópias:
+    alterá-los não altera o histórico). Mantido em ordem de data: append
+    insere na posição da data (fim da lista no caso comum).
+    """
+    __slots__ = ("datas", "ordinais", "tipos", "descricoes", "custos_base", "custos_finais")
+
+    def __init__(self, registros=()):
+        self.datas = []
+        self.ordinais = array('l')
+        self.tipos = []
+        self.descricoes = []
+        self.custos_base = array('d')
+        self.custos_finais = array('d')
+        for m in registros:
+            self.append(m)
+
+    @classmethod
+    def from_dicts(cls, dicts):
+        historico = cls()
+        for m in _ordenar_por_data(dicts):
+            historico.datas.append(m['data'])
+            historico.ordinais.append(ordinal_da_data(m['data']))
+            historico.tipos.append(sys.intern(m['tipo']))
+            historico.descricoes.append(m.get('descricao', ''))
+            historico.custos_base.append(float(m['custo_base']))
+            historico.custos_finais.append(float(m.get('custo_final', m['custo_base'])))
+        return historico
+
+    def append(self, m: Manutencao):
+        i = bisect_right(self.ordinais, m.ordinal)
+        self.datas.insert(i, m.data)
+        self.ordinais.insert(i, m.ordinal)
+        self.tipos.insert(i, sys.intern(m.tipo))
+        self.descricoes.insert(i, m.descricao)
+        self.custos_base.insert(i, m.custo_base)
+        self.custos_finais.insert(i, m.custo_final)
+        return i
+
+    def remover(self, i):
+        for coluna in self.__slots__:
+            del getattr(self, coluna)[i]
+
+    def _registro(self, i) -> Manutencao:
+        return Manutencao.restaurar(self.datas[i], self.tipos[i], self.custos_base[i],
+                                    self.custos_finais[i], self.descricoes[i])
+
+    def __len__(self):
+        return len(self.custos_finais)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._registro(j) for j in range(*i.indices(len(self)))]
+        return self._registro(range(len(self))[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._registro(i)
+
+class HistoricoAbastecimentos:
+    """Histórico colunar de abastecimentos, em ordem de data (ver HistoricoManutencoes)."""
+    __slots__ = ("datas", "ordinais", "combustiveis", "litros", "valores")
+
+    def __init__(self, registros=()):
+        self.datas = []
+        self.ordinais = array('l')
+        self.combustiveis = []
+        self.litros = array('d')
+        self.valores = array('d')
+        for a in registros:
+            self.append(a)
+
+    @classmethod
+    def from_dicts(cls, dicts):
+        historico = cls()
+        for a in _ordenar_por_data(dicts):
+            historico.datas.append(a['data'])
+            historico.ordinais.append(ordinal_da_data(a['data']))
+            historico.combustiveis.append(sys.intern(a['combustivel']))
+            historico.litros.append(float(a['litros']))
+            historico.valores.append(float(a['valor']))
+        return historico
+
+    def append(self, a: Abastecimento):
+        i = bisect_right(self.ordinais, a.ordinal)
+        self.datas.insert(i, a.data)
+        self.ordinais.insert(i, a.ordinal)
+        self.combustiveis.insert(i, sys.intern(a.combustivel))
+        self.litros.insert(i, a.litros)
+        self.valores.insert(i, a.valor)
+        return i
+
+    def remover(self, i):
+        for coluna in self.__slots__:
+            del getattr(self, coluna)[i]
+
+    def _registro(self, i) -> Abastecimento:
+        return Abastecimento(self.datas[i], self.combustiveis[i], self.litros[i], self.valores[i])
+
+    def __len__(self):
+        return len(self.litros)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._registro(j) for j in range(*i.indices(len(self)))]
+        return self._registro(range(len(self))[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._registro(i)
+
+# Observador das alterações feitas pelos métodos dos veículos (pontos de salvamento do armazenamento):
+# chamado com o veículo antes de cada alteração e, depois de mudar um histórico, com a função que a desfaz.
+_observador_alteracoes = None
+
+def observar_alteracoes(observador):
+    global _observador_alteracoes
+    _observador_alteracoes = observador
+
+def _avisar_alteracao(veiculo, desfazer=None):
+    if _observador_alteracoes is not None: _observador_alteracoes(veiculo, desfazer)
+
 class ManutenivelMixin:
     def registrar_manutencao_status(self):
         if self.status != StatusVeiculo.ATIVO:
@@ -81,7 +341,25 @@ class ManutenivelMixin:
 
 class AbastecivelMixin:
     def abastecer(self, abastecimento: Abastecimento):
-        self.historico_abastecimentos.append(abastecimento)
+        _avisar_alteracao(self)
+        self._inserir_por_data("abastecimentos", self.historico_abastecimentos, abastecimento)
+        self.total_litros += abastecimento.litros
+        self.total_combustivel += abastecimento.valor
+        self.qtd_abastecimentos += 1
+
+# Um bit por categoria de CNH; C, D e E também habilitam B, e D e E também habilitam C.
+BITS_CNH = {"A": 1, "B": 2, "C": 4, "D": 8, "E": 16}
+CATEGORIAS_IMPLICITAS_CNH = {"C": "B", "D": "BC", "E": "BC"}
+
+@lru_cache(maxsize=None)
+def capacidade_cnh(categoria: str) -> int:
+    """Máscara com os bits de todas as categorias que a CNH habilita (ex.: "AD" -> A|B|C|D)."""
+    mascara = 0
+    for letra in categoria.upper():
+        mascara |= BITS_CNH.get(letra, 0)
+        for implicita in CATEGORIAS_IMPLICITAS_CNH.get(letra, ""):
+            mascara |= BITS_CNH[implicita]
+    return mascara
 
 class Pessoa:
     def __init__(self, nome: str, cpf: str):
@@ -99,7 +377,19 @@ class Motorista(Pessoa):
     def __init__(self, nome: str, cpf: str, cnh: str, categoria_cnh: str):
         super().__init__(nome, cpf)
         self.cnh = cnh
-        self.categoria_cnh = categoria_cnh.upper()
+        self.categoria_cnh = categoria_cnh
+
+    @property
+    def categoria_cnh(self) -> str:
+        return self._categoria_cnh
+
+    @categoria_cnh.setter
+    def categoria_cnh(self, valor: str):
+        self._categoria_cnh = valor.upper()
+        self.capacidade_cnh = capacidade_cnh(self._categoria_cnh)
+
+    def habilitado_para(self, categoria_minima: str) -> bool:
+        return bool(self.capacidade_cnh & BITS_CNH[categoria_minima])
 
     def to_dict(self):
         data = super().to_dict()
@@ -113,7 +403,15 @@ class Motorista(Pessoa):
     def __str__(self):
         return f"{self.nome} | CPF: {self.cpf} | CNH: {self.categoria_cnh}"
 
+CAMPOS_AGREGADOS = (
+    "total_manutencao", "qtd_manutencoes", "total_litros",
+    "total_combustivel", "qtd_abastecimentos", "km_percorridos"
+)
+
 class Veiculo(ABC, ManutenivelMixin, AbastecivelMixin):
+    # Quando True, os históricos usam armazenamento colunar (HistoricoManutencoes/HistoricoAbastecimentos).
+    historico_colunar = False
+
     def __init__(self, placa: str, marca: str, modelo: str, ano: int, km_inicial: float = 0, status: str = "Ativo"):
         self.placa = placa
         self.marca = marca
@@ -122,9 +420,29 @@ class Veiculo(ABC, ManutenivelMixin, AbastecivelMixin):
         
         self.__quilometragem = float(km_inicial)
         self.km_entrada = float(km_inicial) 
+        # Km da última manutenção preventiva: base para a próxima revisão (manutencao.intervalo_km).
+        self.km_ultima_revisao = float(km_inicial)
         
-        self.historico_manutencoes: List[Manutencao] = []
-        self.historico_abastecimentos: List[Abastecimento] = []
+        # Históricos materializados sob demanda: enquanto forem None, os dados
+        # ficam em _*_brutos (lista de dicts ou função que os carrega).
+        self._historico_manutencoes = HistoricoManutencoes() if self.historico_colunar else []
+        self._historico_abastecimentos = HistoricoAbastecimentos() if self.historico_colunar else []
+        self._manutencoes_brutas = None
+        self._abastecimentos_brutos = None
+        # Ordinais das datas de cada histórico em lista, para as buscas por período (bisect).
+        self._indices_datas = {}
+        # Km rodados por dia (um registro por dia com viagem), em ordem de data.
+        self._km_dias = array('l')
+        self._km_distancias = array('d')
+        self._km_brutos = None
+
+        # Agregados mantidos em O(1) a cada operação (evitam re-somar o histórico nos relatórios).
+        self.total_manutencao = 0.0
+        self.qtd_manutencoes = 0
+        self.total_litros = 0.0
+        self.total_combustivel = 0.0
+        self.qtd_abastecimentos = 0
+        self.km_percorridos = 0.0
 
         if isinstance(status, str):
             self.__status = StatusVeiculo(status)
@@ -139,19 +457,293 @@ class Veiculo(ABC, ManutenivelMixin, AbastecivelMixin):
     def quilometragem(self, nova_km: float):
         if nova_km < self.__quilometragem:
             raise ValueError("A quilometragem não pode ser reduzida.")
+        _avisar_alteracao(self)
+        self.km_percorridos += nova_km - self.__quilometragem
         self.__quilometragem = nova_km
 
+    @property
+    def historico_manutencoes(self) -> List[Manutencao]:
+        if self._historico_manutencoes is None:
+            self._historico_manutencoes = self._novo_historico_manutencoes(self._manutencoes_brutas)
+            self._manutencoes_brutas = None
+            instrumentacao.contar_objetos(len(self._historico_manutencoes))
+        return self._historico_manutencoes
+
+    @historico_manutencoes.setter
+    def historico_manutencoes(self, lista: List[Manutencao]):
+        self._historico_manutencoes = lista
+        self._manutencoes_brutas = None
+
+    @property
+    def historico_abastecimentos(self) -> List[Abastecimento]:
+        if self._historico_abastecimentos is None:
+            self._historico_abastecimentos = self._novo_historico_abastecimentos(self._abastecimentos_brutos)
+            self._abastecimentos_brutos = None
+            instrumentacao.contar_objetos(len(self._historico_abastecimentos))
+        return self._historico_abastecimentos
+
+    @historico_abastecimentos.setter
+    def historico_abastecimentos(self, lista: List[Abastecimento]):
+        self._historico_abastecimentos = lista
+        self._abastecimentos_brutos = None
+
+    def _novo_historico_manutencoes(self, brutos):
+        if self.historico_colunar: return self._colunar(brutos, HistoricoManutencoes)
+        return [Manutencao.from_dict(m) for m in _ordenar_por_data(self._brutos(brutos))]
+
+    def _novo_historico_abastecimentos(self, brutos):
+        if self.historico_colunar: return self._colunar(brutos, HistoricoAbastecimentos)
+        return [Abastecimento.from_dict(a) for a in _ordenar_por_data(self._brutos(brutos))]
+
+    @staticmethod
+    def _brutos(brutos) -> list:
+        return brutos() if callable(brutos) else (brutos or [])
+
+    @staticmethod
+    def _colunar(brutos, classe):
+        # Fontes com visão colunar própria (snapshot binário) dispensam a passagem por dicts.
+        if hasattr(brutos, "colunar"): return brutos.colunar()
+        return classe.from_dicts(Veiculo._brutos(brutos))
+
+    def definir_historicos_brutos(self, manutencoes, abastecimentos, km_por_dia=None):
+        """Adia a construção dos históricos até o primeiro acesso (listas de dicts ou funções de carga)."""
+        self._historico_manutencoes = None
+        self._historico_abastecimentos = None
+        self._manutencoes_brutas = manutencoes
+        self._abastecimentos_brutos = abastecimentos
+        self._km_brutos = km_por_dia
+
+    def historicos_materializados(self) -> bool:
+        return self._historico_manutencoes is not None and self._historico_abastecimentos is not None
+
+    def manutencoes_colunares(self) -> "HistoricoManutencoes":
+        """Visão colunar do histórico de manutenções, sem materializar objetos Manutencao."""
+        if isinstance(self._historico_manutencoes, HistoricoManutencoes): return self._historico_manutencoes
+        if self._historico_manutencoes is None:
+            return self._colunar(self._manutencoes_brutas, HistoricoManutencoes)
+        return HistoricoManutencoes(self._historico_manutencoes)
+
+    def abastecimentos_colunares(self) -> "HistoricoAbastecimentos":
+        """Visão colunar do histórico de abastecimentos, sem materializar objetos Abastecimento."""
+        if isinstance(self._historico_abastecimentos, HistoricoAbastecimentos): return self._historico_abastecimentos
+        if self._historico_abastecimentos is None:
+            return self._colunar(self._abastecimentos_brutos, HistoricoAbastecimentos)
+        return HistoricoAbastecimentos(self._historico_abastecimentos)
+
     @property
     def status(self) -> StatusVeiculo:
         return self.__status
 
     @status.setter
     def status(self, novo_status: StatusVeiculo):
+        _avisar_alteracao(self)
         self.__status = novo_status
 
     def adicionar_manutencao(self, manutencao: Manutencao):
+        _avisar_alteracao(self)
         self.registrar_manutencao_status()
-        self.historico_manutencoes.append(manutencao)
+        self._inserir_por_data("manutencoes", self.historico_manutencoes, manutencao)
+        self.total_manutencao += manutencao.custo_final
+        self.qtd_manutencoes += 1
+        if manutencao.tipo.lower() == "preventiva":
+            self.km_ultima_revisao = self.quilometragem
+
+    def km_ate_revisao(self, intervalo_km: float) -> float:
+        """Km que faltam para a próxima revisão (negativo: revisão vencida)."""
+        return self.km_ultima_revisao + intervalo_km - self.quilometragem
+
+    # --- Consultas por período (datas: "DD/MM/AAAA", date ou ordinal; limites inclusivos) ---
+
+    def _ordinais(self, nome, historico):
+        """Ordinais do histórico em ordem; históricos em lista alterados por fora são reordenados aqui."""
+        if not isinstance(historico, list): return historico.ordinais
+        indice = self._indices_datas.get(nome)
+        if indice is None or indice[0] is not historico or len(indice[1]) != len(historico):
+            ordinais = array('l', (r.ordinal for r in historico))
+            if any(a > b for a, b in zip(ordinais, ordinais[1:])):
+                historico.sort(key=lambda r: r.ordinal)
+                ordinais = array('l', sorted(ordinais))
+            indice = self._indices_datas[nome] = (historico, ordinais)
+        return indice[1]
+
+    def _inserir_por_data(self, nome, historico, registro):
+        if not isinstance(historico, list):
+            i = historico.append(registro)
+        else:
+            ordinais = self._ordinais(nome, historico)
+            i = bisect_right(ordinais, registro.ordinal)
+            historico.insert(i, registro)
+            ordinais.insert(i, registro.ordinal)
+        if _observador_alteracoes is not None:
+            _avisar_alteracao(self, lambda: self._remover_do_historico(nome, historico, i))
+
+    def _remover_do_historico(self, nome, historico, i):
+        if not isinstance(historico, list):
+            historico.remover(i)
+            return
+        del historico[i]
+        self._indices_datas.pop(nome, None)
+
+    def _fatia(self, nome, historico, inicio, fim):
+        ordinais = self._ordinais(nome, historico)
+        return bisect_left(ordinais, ordinal(inicio)), bisect_right(ordinais, ordinal(fim))
+
+    def manutencoes_entre(self, inicio, fim) -> List[Manutencao]:
+        historico = self.historico_manutencoes
+        i, j = self._fatia("manutencoes", historico, inicio, fim)
+        return historico[i:j]
+
+    def custo_manutencao_entre(self, inicio, fim) -> float:
+        historico = self.historico_manutencoes
+        i, j = self._fatia("manutencoes", historico, inicio, fim)
+        if isinstance(historico, HistoricoManutencoes): return sum(historico.custos_finais[i:j])
+        return sum(m.custo_final for m in historico[i:j])
+
+    def qtd_manutencoes_entre(self, inicio, fim) -> int:
+        i, j = self._fatia("manutencoes", self.historico_manutencoes, inicio, fim)
+        return j - i
+
+    def abastecimentos_entre(self, inicio, fim) -> List[Abastecimento]:
+        historico = self.historico_abastecimentos
+        i, j = self._fatia("abastecimentos", historico, inicio, fim)
+        return historico[i:j]
+
+    def litros_entre(self, inicio, fim) -> float:
+        historico = self.historico_abastecimentos
+        i, j = self._fatia("abastecimentos", historico, inicio, fim)
+        if isinstance(historico, HistoricoAbastecimentos): return sum(historico.litros[i:j])
+        return sum(a.litros for a in historico[i:j])
+
+    def gasto_combustivel_entre(self, inicio, fim) -> float:
+        historico = self.historico_abastecimentos
+        i, j = self._fatia("abastecimentos", historico, inicio, fim)
+        if isinstance(historico, HistoricoAbastecimentos): return sum(historico.valores[i:j])
+        return sum(a.valor for a in historico[i:j])
+
+    def _km_por_dia(self):
+        if hasattr(self._km_brutos, "colunar"):
+            self._km_dias, self._km_distancias = self._km_brutos.colunar()
+            self._km_brutos = None
+        elif self._km_brutos is not None:
+            dias = array('l')
+            distancias = array('d')
+            for dia, km in sorted((ordinal(d), float(km)) for d, km in self._brutos(self._km_brutos)):
+                if dias and dias[-1] == dia: distancias[-1] += km
+                else:
+                    dias.append(dia)
+                    distancias.append(km)
+            self._km_dias, self._km_distancias, self._km_brutos = dias, distancias, None
+        return self._km_dias, self._km_distancias
+
+    def km_por_dia_colunar(self):
+        """(dias, km): ordinais dos dias com viagem e os km de cada um, em arrays."""
+        return self._km_por_dia()
+
+    def registrar_percurso(self, distancia: float, data=None):
+        """Soma a distância à quilometragem e aos km do dia (padrão: hoje)."""
+        self.quilometragem = self.quilometragem + distancia
+        dia = ordinal(data) if data else date.today().toordinal()
+        dias, distancias = self._km_por_dia()
+        i = bisect_left(dias, dia)
+        if i < len(dias) and dias[i] == dia:
+            anterior = distancias[i]
+            distancias[i] += distancia
+            if _observador_alteracoes is not None:
+                _avisar_alteracao(self, lambda: distancias.__setitem__(i, anterior))
+        else:
+            dias.insert(i, dia)
+            distancias.insert(i, distancia)
+            if _observador_alteracoes is not None:
+                _avisar_alteracao(self, lambda: (dias.pop(i), distancias.pop(i)))
+
+    def km_entre(self, inicio, fim) -> float:
+        """Km das viagens datadas no período (viagens anteriores ao registro por dia não entram)."""
+        dias, distancias = self._km_por_dia()
+        return sum(distancias[bisect_left(dias, ordinal(inicio)):bisect_right(dias, ordinal(fim))])
+
+    def km_l_entre(self, inicio, fim) -> float:
+        litros = self.litros_entre(inicio, fim)
+        km = self.km_entre(inicio, fim)
+        return km / litros if litros > 0 and km > 0 else 0.0
+
+    @property
+    def km_l(self) -> float:
+        if self.total_litros > 0 and self.km_percorridos > 0:
+            return self.km_percorridos / self.total_litros
+        return 0.0
+
+    def agregados(self) -> Dict[str, float]:
+        return {
+            "total_manutencao": self.total_manutencao,
+            "qtd_manutencoes": self.qtd_manutencoes,
+            "total_litros": self.total_litros,
+            "total_combustivel": self.total_combustivel,
+            "qtd_abastecimentos": self.qtd_abastecimentos,
+            "km_percorridos": self.km_percorridos
+        }
+
+    def calcular_agregados(self) -> Dict[str, float]:
+        """Recalcula os agregados a partir do histórico bruto (sem alterar o veículo)."""
+        if self._historico_manutencoes is None:
+            manutencoes = self._brutos(self._manutencoes_brutas)
+            custos = [float(m.get('custo_final', m['custo_base'])) for m in manutencoes]
+        elif isinstance(self._historico_manutencoes, HistoricoManutencoes):
+            custos = self._historico_manutencoes.custos_finais
+        else:
+            custos = [m.custo_final for m in self._historico_manutencoes]
+
+        if self._historico_abastecimentos is None:
+            abastecimentos = [(float(a['litros']), float(a['valor'])) for a in self._brutos(self._abastecimentos_brutos)]
+        elif isinstance(self._historico_abastecimentos, HistoricoAbastecimentos):
+            historico = self._historico_abastecimentos
+            abastecimentos = list(zip(historico.litros, historico.valores))
+        else:
+            abastecimentos = [(a.litros, a.valor) for a in self._historico_abastecimentos]
+
+        return {
+            "total_manutencao": sum(custos),
+            "qtd_manutencoes": len(custos),
+            "total_litros": sum(litros for litros, _ in abastecimentos),
+            "total_combustivel": sum(valor for _, valor in abastecimentos),
+            "qtd_abastecimentos": len(abastecimentos),
+            "km_percorridos": self.quilometragem - self.km_entrada
+        }
+
+    def definir_agregados(self, agregados: Dict[str, float]):
+        _avisar_alteracao(self)
+        self.total_manutencao = float(agregados["total_manutencao"])
+        self.qtd_manutencoes = int(agregados["qtd_manutencoes"])
+        self.total_litros = float(agregados["total_litros"])
+        self.total_combustivel = float(agregados["total_combustivel"])
+        self.qtd_abastecimentos = int(agregados["qtd_abastecimentos"])
+        self.km_percorridos = float(agregados["km_percorridos"])
+
+    def custos_manutencao_recalculados(self):
+        """(histórico colunar, custos finais pelas regras de custo atuais), sem alterar o veículo."""
+        historico = self.manutencoes_colunares()
+        custos = array('d', (estrategia_para(tipo, self.tipo, dia).calcular_custo(base) for tipo, dia, base
+                             in zip(historico.tipos, historico.ordinais, historico.custos_base)))
+        return historico, custos
+
+    def aplicar_custos_manutencao(self, historico: "HistoricoManutencoes", custos):
+        """Grava no histórico (e no total) os custos de custos_manutencao_recalculados."""
+        _avisar_alteracao(self)
+        self.total_manutencao += sum(custos) - sum(historico.custos_finais)
+        anteriores = historico.custos_finais
+        historico.custos_finais = array('d', custos)
+        if _observador_alteracoes is not None:
+            _avisar_alteracao(self, lambda: setattr(historico, "custos_finais", anteriores))
+        self.historico_manutencoes = historico if self.historico_colunar else list(historico)
+
+    def divergencias_agregados(self) -> List[Dict[str, Any]]:
+        """Compara os agregados mantidos com os recalculados do histórico."""
+        recalculados = self.calcular_agregados()
+        atuais = self.agregados()
+        return [
+            {"placa": self.placa, "campo": campo, "armazenado": atuais[campo], "recalculado": valor}
+            for campo, valor in recalculados.items()
+            if not math.isclose(atuais[campo], valor, rel_tol=1e-9, abs_tol=1e-6)
+        ]
 
     def __lt__(self, other):
         if not isinstance(other, Veiculo): return NotImplemented
@@ -163,8 +755,8 @@ class Veiculo(ABC, ManutenivelMixin, AbastecivelMixin):
     def __str__(self):
         return f"[{self.placa}] {self.modelo} ({self.marca}) - {self.status.value}"
 
-    def to_dict(self):
-        return {
+    def to_dict(self, incluir_historicos: bool = True):
+        dados = {
             "tipo": self.tipo,
             "placa": self.placa,
             "marca": self.marca,
@@ -172,10 +764,25 @@ class Veiculo(ABC, ManutenivelMixin, AbastecivelMixin):
             "ano": self.ano,
             "quilometragem": self.quilometragem,
             "km_entrada": self.km_entrada,
+            "km_ultima_revisao": self.km_ultima_revisao,
             "status": self.status.value,
-            "manutencoes": [m.to_dict() for m in self.historico_manutencoes],
-            "abastecimentos": [a.to_dict() for a in self.historico_abastecimentos]
+            "agregados": self.agregados()
         }
+        if incluir_historicos:
+            # Históricos nunca acessados são regravados como vieram, sem materializar objetos.
+            if self._historico_manutencoes is None:
+                dados["manutencoes"] = self._brutos(self._manutencoes_brutas)
+            else:
+                dados["manutencoes"] = [m.to_dict() for m in self._historico_manutencoes]
+            if self._historico_abastecimentos is None:
+                dados["abastecimentos"] = self._brutos(self._abastecimentos_brutos)
+            else:
+                dados["abastecimentos"] = [a.to_dict() for a in self._historico_abastecimentos]
+            if self._km_brutos is not None:
+                dados["km_por_dia"] = self._brutos(self._km_brutos)
+            else:
+                dados["km_por_dia"] = [[data_do_ordinal(d), km] for d, km in zip(self._km_dias, self._km_distancias)]
+        return dados
     
     @classmethod
     def from_dict(cls, data):
@@ -193,15 +800,15 @@ class Veiculo(ABC, ManutenivelMixin, AbastecivelMixin):
         )
         
         veiculo.km_entrada = data.get('km_entrada', veiculo.quilometragem)
-        
-        for m in data.get('manutencoes', []):
-            manut = Manutencao(m['data'], m['tipo'], m['custo_base'], m.get('descricao', ''))
-            manut.custo_final = m.get('custo_final', m['custo_base']) 
-            veiculo.historico_manutencoes.append(manut)
-
-        for a in data.get('abastecimentos', []):
-            abast = Abastecimento(a['data'], a['combustivel'], a['litros'], a['valor'])
-            veiculo.historico_abastecimentos.append(abast)
+        veiculo.km_ultima_revisao = data.get('km_ultima_revisao', veiculo.km_entrada)
+        veiculo.definir_historicos_brutos(data.get('manutencoes', []), data.get('abastecimentos', []),
+                                          data.get('km_por_dia', []))
+
+        agregados = data.get('agregados')
+        if agregados and all(campo in agregados for campo in CAMPOS_AGREGADOS):
+            veiculo.definir_agregados(agregados)
+        else:
+            veiculo.definir_agregados(veiculo.calcular_agregados())
             
         return veiculo
 
@@ -218,11 +825,12 @@ class Caminhao(Veiculo):
     categoria_minima_cnh = "C"
 
 class Viagem:
-    def __init__(self, motorista: Motorista, veiculo: Veiculo, destino: str, distancia: float):
+    def __init__(self, motorista: Motorista, veiculo: Veiculo, destino: str, distancia: float, data: str = None):
         self.motorista = motorista
         self.veiculo = veiculo
         self.destino = destino
         self.distancia = float(distancia)
+        self.data = data or date.today().strftime("%d/%m/%Y")
         self._validar_alocacao()
 
     def _validar_alocacao(self):
@@ -232,21 +840,16 @@ class Viagem:
             )
 
         req = self.veiculo.categoria_minima_cnh
-        cnh_mot = self.motorista.categoria_cnh
-        
-        compativel = False
-        if req in cnh_mot: compativel = True
-        if req == "B" and any(cat in cnh_mot for cat in ["C", "D", "E"]): compativel = True
-        if req == "C" and any(cat in cnh_mot for cat in ["D", "E"]): compativel = True
-
-        if not compativel:
-            raise AlocacaoInvalidaError(f"CNH {cnh_mot} incompatível com {self.veiculo.tipo} (Req: {req})")
+        if not self.motorista.habilitado_para(req):
+            raise AlocacaoInvalidaError(
+                f"CNH {self.motorista.categoria_cnh} incompatível com {self.veiculo.tipo} (Req: {req})"
+            )
 
-    def realizar_viagem(self):
+    def realizar_viagem(self, exibir_mensagem: bool = True):
         """Atualiza a quilometragem do veículo somando a distância da viagem."""
-        nova_km = self.veiculo.quilometragem + self.distancia
-        self.veiculo.quilometragem = nova_km
-        print(f"Viagem para {self.destino} finalizada. Nova KM do veículo: {self.veiculo.quilometragem}")
+        self.veiculo.registrar_percurso(self.distancia, self.data)
+        if exibir_mensagem:
+            print(f"Viagem para {self.destino} finalizada. Nova KM do veículo: {self.veiculo.quilometragem}")
 
     def to_dict(self):
         return {
@@ -255,7 +858,8 @@ class Viagem:
             "placa_veiculo": self.veiculo.placa,
             "modelo_veiculo": self.veiculo.modelo,
             "destino": self.destino,
-            "distancia": self.distancia
+            "distancia": self.distancia,
+            "data": self.data
         }
 
     def __str__(self):
@@ -0,0 +1,118 @@
+import os
+import zlib
+
+from models import Veiculo
+from repositorio import RepositorioJSON, normalizar_placa
+from snapshot import RepositorioSnapshot, arquivo_snapshot
+from ranking import RankingEficiencia
+
+
+def particao_da_placa(placa, particoes) -> int:
+    """Partição estável entre processos e execuções (hash() do Python muda a cada processo)."""
+    return zlib.crc32(normalizar_placa(placa).encode("utf-8")) % particoes
+
+
+def arquivos_particoes(arquivo, particoes) -> list:
+    """veiculos.json -> veiculos.p0de8.json ... veiculos.p7de8.json (o total no nome evita misturar divisões)."""
+    base, extensao = os.path.splitext(arquivo)
+    return [f"{base}.p{i}de{particoes}{extensao}" for i in range(particoes)]
+
+
+def repositorio_veiculos(arquivo, formato="json"):
+    if formato == "binario": return RepositorioSnapshot(arquivo_snapshot(arquivo), "veiculos")
+    return RepositorioJSON(arquivo, Veiculo.from_dict, lambda v: normalizar_placa(v.placa))
+
+
+class RepositorioParticionado:
+    """
+    Mesma interface do RepositorioJSON para os veículos, divididos em N
+    arquivos pela placa normalizada. Buscar, alterar e gravar um veículo só
+    lê e grava o arquivo da partição dele; listar junta as partições na ordem.
+    """
+
+    def __init__(self, arquivo, particoes, formato="json"):
+        self.arquivos = arquivos_particoes(arquivo, particoes)
+        self.formato = formato
+        self.particoes = [repositorio_veiculos(a, formato) for a in self.arquivos]
+
+    def _particao(self, chave):
+        return self.particoes[particao_da_placa(chave, len(self.particoes))]
+
+    @property
+    def geracao(self):
+        # Cada partição só incrementa a sua: a soma muda sempre que alguma é trocada.
+        return sum(p.geracao for p in self.particoes)
+
+    @property
+    def carregado(self):
+        return all(p.carregado for p in self.particoes)
+
+    @property
+    def alteracoes_pendentes(self):
+        return any(p.alteracoes_pendentes for p in self.particoes)
+
+    def sincronizar(self):
+        for p in self.particoes: p.sincronizar()
+
+    def listar(self) -> list:
+        return [item for p in self.particoes for item in p.listar()]
+
+    def buscar(self, chave):
+        return self._particao(chave).buscar(chave)
+
+    def adicionar(self, item):
+        self._particao(item.placa).adicionar(item)
+
+    def substituir(self, itens):
+        divisao = [[] for _ in self.particoes]
+        for item in itens:
+            divisao[particao_da_placa(item.placa, len(self.particoes))].append(item)
+        for p, parte in zip(self.particoes, divisao):
+            p.substituir(parte)
+
+    def marcar_alterado(self, item=None):
+        if item is not None:
+            self._particao(item.placa).marcar_alterado(item)
+            return
+        for p in self.particoes: p.marcar_alterado()
+
+    def gravar(self, sincronizar=True):
+        """Grava só as partições alteradas."""
+        for p in self.particoes:
+            if p.alteracoes_pendentes: p.gravar(sincronizar=sincronizar)
+
+    def invalidar(self):
+        for p in self.particoes: p.invalidar()
+
+    def existe(self) -> bool:
+        return any(os.path.exists(p.arquivo) for p in self.particoes)
+
+    def migrar_de(self, repositorio):
+        """Divide o arquivo único (na primeira abertura com partições) sem apagá-lo."""
+        if self.existe() or not os.path.exists(repositorio.arquivo): return False
+        self.substituir(repositorio.listar())
+        for p in self.particoes: p.gravar(sincronizar=True)
+        return True
+
+
+# --- Map-reduce dos relatórios (funções de módulo: executadas nos processos do pool) ---
+
+def linhas_custos(veiculos) -> list:
+    return [{
+        "placa": v.placa,
+        "modelo": v.modelo,
+        "total_manutencao": v.total_manutencao,
+        "qtd_manutencoes": v.qtd_manutencoes
+    } for v in veiculos]
+
+
+def _eficiencia(veiculos) -> list:
+    return RankingEficiencia(veiculos).relatorio()
+
+
+MAPAS = {"custos": linhas_custos, "eficiencia": _eficiencia}
+
+
+def mapear_particao(arquivo, formato, relatorio) -> list:
+    """Lê uma partição do disco e devolve as linhas do relatório só com os veículos dela."""
+    return MAPAS[relatorio](repositorio_veiculos(arquivo, formato).listar())
@@ -0,0 +1,59 @@
+from bisect import bisect_left, insort
+
+from repositorio import normalizar_placa
+
+
+class RankingEficiencia:
+    """
+    Ranking de km/l mantido ordenado de forma incremental.
+    Cada veículo ocupa a chave (-km_l, ordem); a ordem de cadastro desempata,
+    como fazia o sort estável do relatório original.
+    """
+
+    def __init__(self, veiculos=(), geracao=None):
+        self.geracao = geracao
+        self._chaves = []
+        self._por_placa = {}
+        self._veiculos = {}
+        self._proxima_ordem = 0
+        for v in veiculos:
+            self.atualizar(v)
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def atualizar(self, veiculo):
+        """Reposiciona (ou insere) o veículo em O(log n) para a busca + deslocamento da lista."""
+        placa = normalizar_placa(veiculo.placa)
+        antiga = self._por_placa.get(placa)
+        if antiga is None:
+            ordem = self._proxima_ordem
+            self._proxima_ordem += 1
+        else:
+            ordem = antiga[1]
+            nova = (-veiculo.km_l, ordem)
+            if nova == antiga: return
+            del self._chaves[bisect_left(self._chaves, antiga)]
+
+        chave = (-veiculo.km_l, ordem)
+        insort(self._chaves, chave)
+        self._por_placa[placa] = chave
+        self._veiculos[ordem] = veiculo
+
+    def remover(self, placa):
+        chave = self._por_placa.pop(normalizar_placa(placa), None)
+        if chave is None: return
+        del self._chaves[bisect_left(self._chaves, chave)]
+        del self._veiculos[chave[1]]
+
+    def relatorio(self) -> list:
+        relatorio = []
+        for _, ordem in self._chaves:
+            v = self._veiculos[ordem]
+            relatorio.append({
+                "placa": v.placa,
+                "modelo": v.modelo,
+                "litros": v.total_litros,
+                "km_l": v.km_l
+            })
+        return relatorio
@@ -0,0 +1,163 @@
+import gc
+import os
+import json
+import time
+
+import instrumentacao
+from trava import gravar_atomico
+
+
+class ConflitoVersaoError(Exception):
+    pass
+
+
+def normalizar_placa(placa: str) -> str:
+    return placa.strip().upper()
+
+
+def normalizar_cpf(cpf: str) -> str:
+    return cpf.strip()
+
+
+class RepositorioJSON:
+    """
+    Mapa de identidade dos objetos de um arquivo JSON, com índice hash por chave.
+    O arquivo só é relido quando sua assinatura (inode, mtime, tamanho) muda.
+    """
+
+    def __init__(self, arquivo, fabrica, chave):
+        self.arquivo = arquivo
+        self._fabrica = fabrica
+        self._chave = chave
+        self._assinatura = None
+        self._itens = []
+        self._indice = {}
+        # JSON já formatado de cada item (por id) desde a última gravação: só os
+        # itens marcados como alterados são serializados de novo.
+        self._fragmentos = {}
+        # Há alterações em memória ainda não gravadas (write-behind): o arquivo não pode ser relido por cima delas.
+        self.alteracoes_pendentes = False
+        # Muda sempre que o conteúdo é trocado por outro (releitura, substituição),
+        # permitindo que estruturas derivadas saibam quando se reconstruir.
+        self.geracao = 0
+
+    def _assinatura_atual(self):
+        try:
+            st = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _definir(self, itens, assinatura):
+        self._itens = list(itens)
+        self._indice = {}
+        self._fragmentos = {}
+        self.alteracoes_pendentes = False
+        for item in self._itens:
+            self._indice.setdefault(self._chave(item), item)
+        self._assinatura = assinatura
+        self.geracao += 1
+
+    @property
+    def carregado(self) -> bool:
+        """O arquivo já foi lido (ou gravado) por este repositório."""
+        return self._assinatura is not None
+
+    def sincronizar(self):
+        self._sincronizar()
+
+    def _sincronizar(self):
+        assinatura = self._assinatura_atual()
+        if assinatura == self._assinatura: return
+        if self.alteracoes_pendentes:
+            raise ConflitoVersaoError(f"{self.arquivo} foi alterado por outro processo com gravações pendentes aqui.")
+
+        itens = []
+        if assinatura is not None:
+            with open(self.arquivo, "rb") as f:
+                conteudo = f.read()
+            instrumentacao.contar_leitura(len(conteudo))
+            # Carga em massa de objetos sem ciclos: o coletor de ciclos só varreria a frota várias vezes.
+            coletor_ativo = gc.isenabled()
+            gc.disable()
+            try:
+                itens = self._decodificar(conteudo)
+            finally:
+                if coletor_ativo: gc.enable()
+            instrumentacao.contar_objetos(len(itens))
+        self._definir(itens, assinatura)
+
+    def _decodificar(self, conteudo: bytes) -> list:
+        inicio = time.perf_counter()
+        dados = json.loads(conteudo)
+        instrumentacao.contar_json("parse", time.perf_counter() - inicio)
+        return [self._fabrica(d) for d in dados]
+
+    def listar(self) -> list:
+        self._sincronizar()
+        return list(self._itens)
+
+    def buscar(self, chave):
+        self._sincronizar()
+        return self._indice.get(chave)
+
+    def adicionar(self, item):
+        self._sincronizar()
+        self._itens.append(item)
+        self._indice.setdefault(self._chave(item), item)
+
+    def substituir(self, itens):
+        """Troca o conteúdo em memória; a gravação fica a cargo de `gravar`."""
+        self._definir(itens, self._assinatura)
+
+    def marcar_alterado(self, item=None):
+        """O item (ou, sem argumento, todos) precisa ser serializado de novo na próxima gravação."""
+        if item is None: self._fragmentos.clear()
+        else: self._fragmentos.pop(id(item), None)
+        self.alteracoes_pendentes = True
+
+    def _fragmento(self, item) -> str:
+        fragmento = self._fragmentos.get(id(item))
+        if fragmento is None:
+            # Mesmo texto que o item teria dentro de json.dumps(lista, indent=4).
+            fragmento = "    " + json.dumps(item.to_dict(), indent=4, ensure_ascii=False).replace("\n", "\n    ")
+            self._fragmentos[id(item)] = fragmento
+        return fragmento
+
+    def _serializar(self, itens) -> str:
+        if itens is not self._itens:
+            return json.dumps([item.to_dict() for item in itens], indent=4, ensure_ascii=False)
+        if not itens: return "[]"
+        return "[\n" + ",\n".join(self._fragmento(item) for item in itens) + "\n]"
+
+    def _codificar(self, itens) -> bytes:
+        inicio = time.perf_counter()
+        conteudo = self._serializar(itens)
+        instrumentacao.contar_json("dump", time.perf_counter() - inicio)
+        return conteudo.encode("utf-8")
+
+    def gravar(self, itens=None, sincronizar=True):
+        """
+        Gravação atômica com verificação otimista de versão: se o arquivo mudou
+        desde a última leitura (outro processo gravou), nada é sobrescrito.
+        """
+        if itens is None: itens = self._itens
+        if self._assinatura_atual() != self._assinatura:
+            raise ConflitoVersaoError(f"{self.arquivo} foi alterado por outro processo; operação descartada.")
+
+        pasta = os.path.dirname(self.arquivo)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        gravar_atomico(self.arquivo, self._codificar(itens), sincronizar)
+        self.registrar_gravacao(itens)
+
+    def registrar_gravacao(self, itens):
+        """Adota a lista recém-gravada em disco sem precisar relê-la."""
+        if itens is self._itens:
+            self._assinatura = self._assinatura_atual()
+            self.alteracoes_pendentes = False
+        else:
+            self._definir(itens, self._assinatura_atual())
+
+    def invalidar(self):
+        self._definir([], None)
@@ -0,0 +1,383 @@
+"""
+Serviço HTTP/JSON (somente biblioteca padrão, asyncio) sobre o controller.
+O processo fica no ar com a frota carregada em memória (mapa de identidade
+do armazenamento), em vez de reler os arquivos a cada comando.
+
+Todas as operações do controller rodam em uma única thread de dados, na ordem
+de chegada: as mutações de uma mesma entidade (e de todas as outras) ficam
+serializadas, e a thread do asyncio só cuida das conexões. Mutações que chegam
+juntas são aplicadas em lote dentro de uma transação do armazenamento: uma
+gravação para o lote inteiro, e cada cliente só recebe a resposta depois dela.
+Cada mutação roda em um ponto de salvamento: a que falha é desfeita por inteiro.
+
+    python servidor.py [--host 127.0.0.1] [--porta 8080]
+
+Rotas (corpos e respostas em JSON):
+    GET   /saude
+    GET   /veiculos                         GET  /veiculos/{placa}
+    GET   /frota?status=&tipo=&ordem=placa|km|ano&decrescente=&pagina=&por_pagina=
+    POST  /veiculos                         PATCH /veiculos/{placa}
+    POST  /veiculos/{placa}/manutencoes     POST /veiculos/{placa}/liberar
+    POST  /veiculos/{placa}/abastecimentos  GET  /veiculos/{placa}/viagens[?inicio=&fim=]
+    GET   /motoristas                       GET  /motoristas/{cpf}
+    GET   /motoristas/{cpf}/viagens[?inicio=&fim=]
+    POST  /motoristas                       PATCH /motoristas/{cpf}
+    GET   /viagens?pagina=&por_pagina=      GET  /viagens/ultimas?n=
+    POST  /viagens                          POST /viagens/lote
+    POST  /alocacoes                        (corpo: {"pendentes": [...], "despachar": false})
+    GET   /relatorios/custos[?inicio=&fim=] GET  /relatorios/eficiencia[?inicio=&fim=]
+    GET   /relatorios/periodo?inicio=&fim=[&placa=]
+    GET   /relatorios/motoristas[?inicio=&fim=]
+    GET   /revisoes?n=                      GET  /revisoes/vencidas
+    GET   /alertas?n=                       POST /alertas/reprocessar
+    GET   /cache                            POST /manutencoes/recalcular  (corpo: {"aplicar": false})
+"""
+import argparse
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import controller
+from models import AlocacaoInvalidaError, ManutencaoInvalidaError, OperacaoInvalidaError
+
+MAX_CORPO = 10 * 2**20
+MAX_LOTE = 256
+MOTIVOS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+# Além do Exception simples das regras de negócio do controller: erros nos dados enviados (400).
+# Qualquer outra exceção é falha do servidor (500).
+ERROS_DO_CLIENTE = (ValueError, KeyError, AlocacaoInvalidaError, ManutencaoInvalidaError, OperacaoInvalidaError)
+
+
+def erro_do_cliente(e) -> bool:
+    return type(e) is Exception or isinstance(e, ERROS_DO_CLIENTE)
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ServicoFrota:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frota-dados")
+        self._fila = None
+        self._gravador = None
+        self.rotas = []
+        self._registrar_rotas()
+
+    # --- Execução na thread de dados ---
+
+    async def ler(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+
+    async def alterar(self, funcao, *args):
+        """Enfileira a mutação; o gravador a aplica no próximo lote e a resposta sai depois da gravação."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((funcao, args, futuro))
+        return await futuro
+
+    async def _gravar_lotes(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            while len(lote) < MAX_LOTE and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+            try:
+                resultados = await loop.run_in_executor(self.executor, self._aplicar_lote, lote)
+            except Exception as e:  # falha ao gravar: nenhuma mutação do lote é confirmada
+                resultados = [(False, e)] * len(lote)
+            for (_, _, futuro), (sucesso, valor) in zip(lote, resultados):
+                if futuro.done(): continue
+                if sucesso: futuro.set_result(valor)
+                else: futuro.set_exception(valor)
+
+    @staticmethod
+    def _aplicar_lote(lote):
+        resultados = []
+        arm = controller.obter_armazenamento()
+        with arm.transacao():
+            for funcao, args, _ in lote:
+                try:
+                    with arm.ponto_de_salvamento():
+                        resultados.append((True, funcao(*args)))
+                except Exception as e:
+                    resultados.append((False, e))
+        return resultados
+
+    async def iniciar(self, host="127.0.0.1", porta=8080):
+        self._fila = asyncio.Queue()
+        self._gravador = asyncio.create_task(self._gravar_lotes())
+        # Aquece o estado: frota, motoristas e ranking já ficam em memória antes do primeiro cliente.
+        await self.ler(controller.carregar_veiculos)
+        await self.ler(controller.carregar_motoristas)
+        return await asyncio.start_server(self._atender, host, porta, limit=2**16)
+
+    async def encerrar(self):
+        if self._gravador is not None:
+            while not self._fila.empty(): await asyncio.sleep(0.01)
+            self._gravador.cancel()
+        await self.ler(controller.descarregar_armazenamentos)
+        self.executor.shutdown(wait=True)
+
+    # --- HTTP ---
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha: break
+                try:
+                    metodo, alvo, versao = linha.decode("latin-1").split()
+                except ValueError:
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await reader.readline()
+                    if linha in (b"\r\n", b"\n", b""): break
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                tamanho = int(cabecalhos.get("content-length") or 0)
+                if tamanho > MAX_CORPO:
+                    await self._responder(writer, 413, {"erro": "Corpo grande demais."}, False)
+                    break
+                corpo = await reader.readexactly(tamanho) if tamanho else b""
+
+                status, resposta = await self._despachar(metodo.upper(), alvo, corpo)
+                conexao = cabecalhos.get("connection", "").lower()
+                manter = conexao != "close" and (versao != "HTTP/1.0" or conexao == "keep-alive")
+                await self._responder(writer, status, resposta, manter)
+                if not manter: break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _responder(writer, status, resposta, manter):
+        corpo = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode("latin-1") + corpo
+        )
+        await writer.drain()
+
+    async def _despachar(self, metodo, alvo, corpo):
+        partes = urlsplit(alvo)
+        caminho = unquote(partes.path).rstrip("/") or "/"
+        consulta = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+        encontrou = False
+        for metodo_rota, padrao, tratador in self.rotas:
+            casou = padrao.fullmatch(caminho)
+            if not casou: continue
+            encontrou = True
+            if metodo_rota != metodo: continue
+            try:
+                dados = json.loads(corpo) if corpo else {}
+                status, resposta = await tratador(consulta, dados, *casou.groups())
+                return status, resposta
+            except ErroHTTP as e:
+                return e.status, {"erro": str(e)}
+            except json.JSONDecodeError:
+                return 400, {"erro": "Corpo não é um JSON válido."}
+            except Exception as e:
+                if erro_do_cliente(e): return 400, {"erro": str(e)}
+                return 500, {"erro": f"Erro interno: {e}"}
+        if encontrou: return 405, {"erro": f"Método {metodo} não permitido em {caminho}."}
+        return 404, {"erro": f"Rota {caminho} não encontrada."}
+
+    def _rota(self, metodo, padrao):
+        def registrar(tratador):
+            self.rotas.append((metodo, re.compile(padrao), tratador))
+            return tratador
+        return registrar
+
+    # --- Rotas ---
+
+    def _registrar_rotas(self):
+        rota = self._rota
+
+        @rota("GET", r"/saude")
+        async def saude(consulta, dados):
+            return 200, {"ok": True, "mutacoes_na_fila": self._fila.qsize() if self._fila else 0}
+
+        @rota("GET", r"/veiculos")
+        async def listar_veiculos(consulta, dados):
+            veiculos = await self.ler(controller.carregar_veiculos)
+            return 200, [v.to_dict(incluir_historicos=False) for v in veiculos]
+
+        @rota("GET", r"/frota")
+        async def frota(consulta, dados):
+            return 200, await self.ler(controller.listar_frota_controller, consulta.get("status"), consulta.get("tipo"),
+                                       consulta.get("ordem", "placa"), consulta.get("decrescente") in ("1", "true", "s"),
+                                       consulta.get("pagina", 1), consulta.get("por_pagina", 50))
+
+        @rota("GET", r"/veiculos/([^/]+)")
+        async def veiculo(consulta, dados, placa):
+            v = await self.ler(controller.buscar_veiculo, placa)
+            if not v: raise ErroHTTP(404, f"Veículo {placa} não encontrado.")
+            return 200, v.to_dict(incluir_historicos=False)
+
+        @rota("POST", r"/veiculos")
+        async def cadastrar_veiculo(consulta, dados):
+            msg = await self.alterar(controller.cadastrar_veiculo_controller, dados.get("tipo", ""), dados.get("placa", ""),
+                                     dados.get("marca", ""), dados.get("modelo", ""), dados.get("ano", ""),
+                                     dados.get("km_inicial", 0))
+            return 201, {"mensagem": msg}
+
+        @rota("PATCH", r"/veiculos/([^/]+)")
+        async def atualizar_veiculo(consulta, dados, placa):
+            msg = await self.alterar(controller.atualizar_veiculo_controller, placa, dados.get("marca"),
+                                     dados.get("modelo"), dados.get("ano"))
+            return 200, {"mensagem": msg}
+
+        @rota("POST", r"/veiculos/([^/]+)/manutencoes")
+        async def manutencao(consulta, dados, placa):
+            msg = await self.alterar(controller.registrar_manutencao_controller, placa, dados.get("data", ""),
+                                     dados.get("tipo", ""), dados.get("custo", 0), dados.get("descricao", ""))
+            return 201, {"mensagem": msg}
+
+        @rota("POST", r"/veiculos/([^/]+)/liberar")
+        async def liberar(consulta, dados, placa):
+            return 200, {"mensagem": await self.alterar(controller.finalizar_manutencao_controller, placa)}
+
+        @rota("POST", r"/veiculos/([^/]+)/abastecimentos")
+        async def abastecimento(consulta, dados, placa):
+            msg = await self.alterar(controller.registrar_abastecimento_controller, placa, dados.get("data", ""),
+                                     dados.get("combustivel", ""), dados.get("litros", 0), dados.get("valor", 0))
+            return 201, {"mensagem": msg}
+
+        @rota("GET", r"/veiculos/([^/]+)/viagens")
+        async def viagens_veiculo(consulta, dados, placa):
+            return 200, await self.ler(controller.viagens_do_veiculo_controller, placa,
+                                       consulta.get("inicio"), consulta.get("fim"))
+
+        @rota("GET", r"/motoristas")
+        async def listar_motoristas(consulta, dados):
+            return 200, [m.to_dict() for m in await self.ler(controller.carregar_motoristas)]
+
+        @rota("GET", r"/motoristas/([^/]+)")
+        async def motorista(consulta, dados, cpf):
+            m = await self.ler(controller.buscar_motorista, cpf)
+            if not m: raise ErroHTTP(404, f"Motorista {cpf} não encontrado.")
+            return 200, m.to_dict()
+
+        @rota("GET", r"/motoristas/([^/]+)/viagens")
+        async def viagens_motorista(consulta, dados, cpf):
+            return 200, await self.ler(controller.viagens_do_motorista_controller, cpf,
+                                       consulta.get("inicio"), consulta.get("fim"))
+
+        @rota("POST", r"/motoristas")
+        async def cadastrar_motorista(consulta, dados):
+            msg = await self.alterar(controller.cadastrar_motorista_controller, dados.get("nome", ""), dados.get("cpf", ""),
+                                     dados.get("cnh", ""), dados.get("categoria_cnh", ""))
+            return 201, {"mensagem": msg}
+
+        @rota("PATCH", r"/motoristas/([^/]+)")
+        async def atualizar_motorista(consulta, dados, cpf):
+            msg = await self.alterar(controller.atualizar_motorista_controller, cpf, dados.get("nome"),
+                                     dados.get("cnh"), dados.get("categoria_cnh"))
+            return 200, {"mensagem": msg}
+
+        @rota("GET", r"/viagens")
+        async def viagens(consulta, dados):
+            pagina, por_pagina = int(consulta.get("pagina", 1)), int(consulta.get("por_pagina", 20))
+            return 200, await self.ler(controller.listar_viagens, pagina, por_pagina)
+
+        @rota("GET", r"/viagens/ultimas")
+        async def ultimas_viagens(consulta, dados):
+            return 200, await self.ler(controller.ultimas_viagens, int(consulta.get("n", 20)))
+
+        @rota("POST", r"/viagens")
+        async def viagem(consulta, dados):
+            # Pelo despacho em lote: mesmo caminho de validação, sem mensagens no terminal.
+            resultado = (await self.alterar(controller.realizar_viagens_lote, [dados]))[0]
+            if not resultado["sucesso"]: raise ErroHTTP(400, resultado["erro"])
+            return 201, resultado
+
+        @rota("POST", r"/viagens/lote")
+        async def viagens_lote(consulta, dados):
+            return 200, await self.alterar(controller.realizar_viagens_lote, dados)
+
+        @rota("POST", r"/alocacoes")
+        async def alocacoes(consulta, dados):
+            plano = await self.ler(controller.alocar_viagens_controller, dados.get("pendentes", []))
+            if dados.get("despachar"):
+                plano["despacho"] = await self.alterar(controller.despachar_alocacoes_lote, plano["alocacoes"])
+            return 200, plano
+
+        @rota("GET", r"/relatorios/custos")
+        async def custos(consulta, dados):
+            if "inicio" in consulta:
+                return 200, await self.ler(controller.gerar_relatorio_custos_periodo, consulta["inicio"], consulta.get("fim"))
+            return 200, await self.ler(controller.gerar_relatorio_custos)
+
+        @rota("GET", r"/relatorios/eficiencia")
+        async def eficiencia(consulta, dados):
+            if "inicio" in consulta:
+                return 200, await self.ler(controller.gerar_relatorio_eficiencia_periodo, consulta["inicio"], consulta.get("fim"))
+            return 200, await self.ler(controller.gerar_relatorio_eficiencia)
+
+        @rota("GET", r"/relatorios/periodo")
+        async def periodo(consulta, dados):
+            return 200, await self.ler(controller.totais_periodo_controller, consulta.get("inicio"),
+                                       consulta.get("fim"), consulta.get("placa"))
+
+        @rota("GET", r"/relatorios/motoristas")
+        async def utilizacao_motoristas(consulta, dados):
+            return 200, await self.ler(controller.utilizacao_motoristas_controller, consulta.get("inicio"), consulta.get("fim"))
+
+        @rota("GET", r"/revisoes")
+        async def revisoes(consulta, dados):
+            return 200, await self.ler(controller.proximas_revisoes_controller, int(consulta.get("n", 10)))
+
+        @rota("GET", r"/revisoes/vencidas")
+        async def vencidas(consulta, dados):
+            return 200, await self.ler(controller.revisoes_vencidas_controller)
+
+        @rota("GET", r"/alertas")
+        async def alertas(consulta, dados):
+            return 200, await self.ler(controller.listar_alertas_controller, int(consulta.get("n", 50)))
+
+        @rota("POST", r"/alertas/reprocessar")
+        async def reprocessar_alertas(consulta, dados):
+            return 200, await self.alterar(controller.reprocessar_alertas_controller)
+
+        @rota("POST", r"/manutencoes/recalcular")
+        async def recalcular_custos(consulta, dados):
+            if dados.get("aplicar"): return 200, await self.alterar(controller.recalcular_custos_controller, True)
+            return 200, await self.ler(controller.recalcular_custos_controller)
+
+        @rota("GET", r"/cache")
+        async def cache(consulta, dados):
+            return 200, await self.ler(controller.estatisticas_cache_controller)
+
+
+async def servir(host, porta):
+    servico = ServicoFrota()
+    servidor = await servico.iniciar(host, porta)
+    print(f"Servindo em http://{host}:{servidor.sockets[0].getsockname()[1]} (Ctrl+C encerra)")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        await servico.encerrar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,378 @@
+"""
+Snapshot binário versionado de veículos e motoristas: carrega bem mais
+rápido que o JSON indentado (sem parse de texto e sem um dict por registro
+de histórico). O JSON continua sendo o formato de importação/exportação.
+
+    python snapshot.py --pasta data --para binario   # veiculos.json -> veiculos.snap (idem motoristas)
+    python snapshot.py --pasta data --para json      # .snap -> .json
+
+Layout (little-endian):
+    cabeçalho  "FROTASNP", versão (u16), entidade ("V", "M"...), registros (u64), colunas (u32)
+    coluna     nome (48 bytes), tipo (d/q/i/s), quantidade (u64), bytes (u64), crc32 (u32), dados
+
+Tipos: d = float64, q = int64, i = int32, s = textos UTF-8 separados por NUL.
+Textos repetitivos (tipo, marca, datas...) são categóricos: a coluna guarda
+índices (i) e "<nome>#valores" a tabela de textos distintos. Os históricos
+ficam em colunas únicas para a frota toda; "manutencoes", "abastecimentos" e
+"km_dias" guardam o deslocamento de cada veículo nelas. Leitores ignoram
+colunas desconhecidas, então novas colunas não exigem nova versão.
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+import instrumentacao
+from models import (
+    Veiculo, Carro, Moto, Caminhao, Motorista, HistoricoManutencoes, HistoricoAbastecimentos,
+    CAMPOS_AGREGADOS, StatusVeiculo, ordinal_da_data, data_do_ordinal
+)
+from repositorio import RepositorioJSON, normalizar_placa, normalizar_cpf
+
+MAGICO = b"FROTASNP"
+VERSAO = 1
+CABECALHO = struct.Struct("<8sHcQI")
+COLUNA = struct.Struct("<48scQQI")
+CLASSES = {"Carro": Carro, "Moto": Moto, "Caminhão": Caminhao, "Caminhao": Caminhao}
+
+
+class SnapshotInvalidoError(Exception):
+    pass
+
+
+# --- Colunas ---
+
+def _bytes_do_array(valores) -> bytes:
+    if sys.byteorder == "big":
+        valores = array(valores.typecode, valores)
+        valores.byteswap()
+    return valores.tobytes()
+
+
+class EscritorColunas:
+    """Monta um arquivo no layout acima; também usado por outros arquivos binários (ver indice_viagens)."""
+
+    def __init__(self, entidade: bytes, registros: int):
+        self.entidade = entidade
+        self.registros = registros
+        self.colunas = []
+
+    def _coluna(self, nome, tipo, quantidade, dados: bytes):
+        if len(nome.encode("utf-8")) > 48: raise SnapshotInvalidoError(f"Nome de coluna longo demais: {nome}.")
+        self.colunas.append(COLUNA.pack(nome.encode("utf-8"), tipo, quantidade, len(dados), zlib.crc32(dados)) + dados)
+
+    def numeros(self, nome, tipo, valores):
+        if not isinstance(valores, array) or valores.typecode != tipo: valores = array(tipo, valores)
+        self._coluna(nome, tipo.encode(), len(valores), _bytes_do_array(valores))
+
+    def textos(self, nome, valores):
+        texto = "\x00".join(valores)
+        if texto.count("\x00") != max(len(valores) - 1, 0):
+            raise SnapshotInvalidoError(f"Texto com caractere NUL na coluna {nome}.")
+        self._coluna(nome, b"s", len(valores), texto.encode("utf-8"))
+
+    def categorias(self, nome, valores):
+        codigos = {}
+        indices = array("i", [codigos.setdefault(v, len(codigos)) for v in valores])
+        self.textos(nome + "#valores", list(codigos))
+        self.numeros(nome, "i", indices)
+
+    def conteudo(self) -> bytes:
+        cabecalho = CABECALHO.pack(MAGICO, VERSAO, self.entidade, self.registros, len(self.colunas))
+        return b"".join([cabecalho] + self.colunas)
+
+
+class LeitorColunas:
+    def __init__(self, conteudo: bytes):
+        visao = memoryview(conteudo)
+        if len(visao) < CABECALHO.size: raise SnapshotInvalidoError("Snapshot truncado.")
+        magico, versao, self.entidade, self.registros, n_colunas = CABECALHO.unpack_from(visao)
+        if magico != MAGICO: raise SnapshotInvalidoError("Arquivo não é um snapshot da frota.")
+        if versao > VERSAO:
+            raise SnapshotInvalidoError(f"Snapshot na versão {versao}; este programa lê até a versão {VERSAO}.")
+        self._colunas = {}
+        pos = CABECALHO.size
+        for _ in range(n_colunas):
+            if pos + COLUNA.size > len(visao): raise SnapshotInvalidoError("Snapshot truncado.")
+            nome, tipo, quantidade, tamanho, crc = COLUNA.unpack_from(visao, pos)
+            nome = nome.rstrip(b"\0").decode("utf-8")
+            pos += COLUNA.size
+            dados = visao[pos:pos + tamanho]
+            pos += tamanho
+            if len(dados) != tamanho or zlib.crc32(dados) != crc:
+                raise SnapshotInvalidoError(f"Coluna {nome} corrompida.")
+            self._colunas[nome] = (tipo.decode(), quantidade, dados)
+
+    def _coluna(self, nome):
+        try:
+            return self._colunas[nome]
+        except KeyError:
+            raise SnapshotInvalidoError(f"Coluna {nome} ausente no snapshot.")
+
+    def numeros(self, nome) -> array:
+        tipo, _, dados = self._coluna(nome)
+        valores = array(tipo)
+        valores.frombytes(dados)
+        if sys.byteorder == "big": valores.byteswap()
+        return valores
+
+    def textos(self, nome) -> list:
+        _, quantidade, dados = self._coluna(nome)
+        return str(dados, "utf-8").split("\x00") if quantidade else []
+
+    def categorias(self, nome) -> list:
+        """Valores já expandidos (uma referência à tabela por linha)."""
+        tabela = self.textos(nome + "#valores")
+        return [tabela[i] for i in self.numeros(nome)]
+
+    def categorias_codificadas(self, nome):
+        """(tabela, índices): para colunas grandes, expandidas só na fatia de cada veículo."""
+        return [sys.intern(t) for t in self.textos(nome + "#valores")], self.numeros(nome)
+
+
+# --- Veículos ---
+
+class _HistoricoGravado:
+    """
+    Fatia [inicio, fim) das colunas de histórico de um veículo. Chamado,
+    devolve os dicts do formato JSON; `colunar` monta o histórico colunar
+    direto das colunas (ver Veiculo._colunar).
+    """
+    __slots__ = ("colunas", "inicio", "fim")
+
+    def __init__(self, colunas, inicio, fim):
+        self.colunas = colunas
+        self.inicio = inicio
+        self.fim = fim
+
+
+class _ManutencoesGravadas(_HistoricoGravado):
+    __slots__ = ()
+
+    def __call__(self):
+        (datas, i_datas), (tipos, i_tipos), (descricoes, i_descricoes), bases, finais = self.colunas
+        return [{"data": datas[i_datas[k]], "tipo": tipos[i_tipos[k]], "custo_base": bases[k],
+                 "custo_final": finais[k], "descricao": descricoes[i_descricoes[k]]}
+                for k in range(self.inicio, self.fim)]
+
+    def colunar(self) -> HistoricoManutencoes:
+        (datas, i_datas), (tipos, i_tipos), (descricoes, i_descricoes), bases, finais = self.colunas
+        a, b = self.inicio, self.fim
+        historico = HistoricoManutencoes()
+        historico.datas = [datas[i] for i in i_datas[a:b]]
+        historico.ordinais = array("l", [ordinal_da_data(d) for d in historico.datas])
+        historico.tipos = [tipos[i] for i in i_tipos[a:b]]
+        historico.descricoes = [descricoes[i] for i in i_descricoes[a:b]]
+        historico.custos_base = bases[a:b]
+        historico.custos_finais = finais[a:b]
+        return historico
+
+
+class _AbastecimentosGravados(_HistoricoGravado):
+    __slots__ = ()
+
+    def __call__(self):
+        (datas, i_datas), (combustiveis, i_combustiveis), litros, valores = self.colunas
+        return [{"data": datas[i_datas[k]], "combustivel": combustiveis[i_combustiveis[k]],
+                 "litros": litros[k], "valor": valores[k]}
+                for k in range(self.inicio, self.fim)]
+
+    def colunar(self) -> HistoricoAbastecimentos:
+        (datas, i_datas), (combustiveis, i_combustiveis), litros, valores = self.colunas
+        a, b = self.inicio, self.fim
+        historico = HistoricoAbastecimentos()
+        historico.datas = [datas[i] for i in i_datas[a:b]]
+        historico.ordinais = array("l", [ordinal_da_data(d) for d in historico.datas])
+        historico.combustiveis = [combustiveis[i] for i in i_combustiveis[a:b]]
+        historico.litros = litros[a:b]
+        historico.valores = valores[a:b]
+        return historico
+
+
+class _KmGravado(_HistoricoGravado):
+    __slots__ = ()
+
+    def __call__(self):
+        dias, distancias = self.colunas
+        return [[data_do_ordinal(dias[k]), distancias[k]] for k in range(self.inicio, self.fim)]
+
+    def colunar(self):
+        dias, distancias = self.colunas
+        return array("l", dias[self.inicio:self.fim]), distancias[self.inicio:self.fim]
+
+
+def codificar_veiculos(veiculos) -> bytes:
+    escritor = EscritorColunas(b"V", len(veiculos))
+    escritor.categorias("tipo", [v.tipo for v in veiculos])
+    escritor.textos("placa", [v.placa for v in veiculos])
+    escritor.categorias("marca", [v.marca for v in veiculos])
+    escritor.categorias("modelo", [v.modelo for v in veiculos])
+    escritor.numeros("ano", "q", [v.ano for v in veiculos])
+    for campo in ("quilometragem", "km_entrada", "km_ultima_revisao"):
+        escritor.numeros(campo, "d", [getattr(v, campo) for v in veiculos])
+    escritor.categorias("status", [v.status.value for v in veiculos])
+    for campo in CAMPOS_AGREGADOS:
+        escritor.numeros(campo, "d", [getattr(v, campo) for v in veiculos])
+
+    m_datas, m_tipos, m_descricoes, m_bases, m_finais = [], [], [], array("d"), array("d")
+    a_datas, a_combustiveis, a_litros, a_valores = [], [], array("d"), array("d")
+    k_dias, k_distancias = array("q"), array("d")
+    o_manutencoes, o_abastecimentos, o_km = array("q", [0]), array("q", [0]), array("q", [0])
+    for v in veiculos:
+        m = v.manutencoes_colunares()
+        m_datas += m.datas
+        m_tipos += m.tipos
+        m_descricoes += m.descricoes
+        m_bases += m.custos_base
+        m_finais += m.custos_finais
+        o_manutencoes.append(len(m_bases))
+        a = v.abastecimentos_colunares()
+        a_datas += a.datas
+        a_combustiveis += a.combustiveis
+        a_litros += a.litros
+        a_valores += a.valores
+        o_abastecimentos.append(len(a_litros))
+        dias, distancias = v.km_por_dia_colunar()
+        k_dias += array("q", dias)
+        k_distancias += distancias
+        o_km.append(len(k_distancias))
+
+    escritor.numeros("manutencoes", "q", o_manutencoes)
+    escritor.categorias("manutencao.data", m_datas)
+    escritor.categorias("manutencao.tipo", m_tipos)
+    escritor.categorias("manutencao.descricao", m_descricoes)
+    escritor.numeros("manutencao.custo_base", "d", m_bases)
+    escritor.numeros("manutencao.custo_final", "d", m_finais)
+    escritor.numeros("abastecimentos", "q", o_abastecimentos)
+    escritor.categorias("abastecimento.data", a_datas)
+    escritor.categorias("abastecimento.combustivel", a_combustiveis)
+    escritor.numeros("abastecimento.litros", "d", a_litros)
+    escritor.numeros("abastecimento.valor", "d", a_valores)
+    escritor.numeros("km_dias", "q", o_km)
+    escritor.numeros("km.dia", "q", k_dias)
+    escritor.numeros("km.distancia", "d", k_distancias)
+    return escritor.conteudo()
+
+
+def _decodificar_veiculos(leitor: LeitorColunas) -> list:
+    tipos = leitor.categorias("tipo")
+    placas = leitor.textos("placa")
+    marcas = leitor.categorias("marca")
+    modelos = leitor.categorias("modelo")
+    anos = leitor.numeros("ano")
+    quilometragens = leitor.numeros("quilometragem")
+    km_entradas = leitor.numeros("km_entrada")
+    km_revisoes = leitor.numeros("km_ultima_revisao")
+    tabela_status, indices_status = leitor.categorias_codificadas("status")
+    tabela_status = [StatusVeiculo(s) for s in tabela_status]
+    status = [tabela_status[i] for i in indices_status]
+    agregados = [leitor.numeros(campo) for campo in CAMPOS_AGREGADOS]
+
+    manutencoes = (leitor.categorias_codificadas("manutencao.data"), leitor.categorias_codificadas("manutencao.tipo"),
+                   leitor.categorias_codificadas("manutencao.descricao"),
+                   leitor.numeros("manutencao.custo_base"), leitor.numeros("manutencao.custo_final"))
+    abastecimentos = (leitor.categorias_codificadas("abastecimento.data"),
+                      leitor.categorias_codificadas("abastecimento.combustivel"),
+                      leitor.numeros("abastecimento.litros"), leitor.numeros("abastecimento.valor"))
+    km = (leitor.numeros("km.dia"), leitor.numeros("km.distancia"))
+    o_manutencoes, o_abastecimentos, o_km = (leitor.numeros(n) for n in ("manutencoes", "abastecimentos", "km_dias"))
+
+    veiculos = []
+    for i, valores_agregados in enumerate(zip(*agregados)):
+        v = CLASSES.get(tipos[i], Carro)(placas[i], marcas[i], modelos[i], anos[i], quilometragens[i], status[i])
+        v.km_entrada = km_entradas[i]
+        v.km_ultima_revisao = km_revisoes[i]
+        v.definir_historicos_brutos(_ManutencoesGravadas(manutencoes, o_manutencoes[i], o_manutencoes[i + 1]),
+                                    _AbastecimentosGravados(abastecimentos, o_abastecimentos[i], o_abastecimentos[i + 1]),
+                                    _KmGravado(km, o_km[i], o_km[i + 1]))
+        v.definir_agregados(dict(zip(CAMPOS_AGREGADOS, valores_agregados)))
+        veiculos.append(v)
+    return veiculos
+
+
+# --- Motoristas ---
+
+def codificar_motoristas(motoristas) -> bytes:
+    escritor = EscritorColunas(b"M", len(motoristas))
+    for campo in ("nome", "cpf", "cnh"):
+        escritor.textos(campo, [getattr(m, campo) for m in motoristas])
+    escritor.categorias("categoria_cnh", [m.categoria_cnh for m in motoristas])
+    return escritor.conteudo()
+
+
+def _decodificar_motoristas(leitor: LeitorColunas) -> list:
+    colunas = [leitor.textos(c) for c in ("nome", "cpf", "cnh")] + [leitor.categorias("categoria_cnh")]
+    return [Motorista(*campos) for campos in zip(*colunas)]
+
+
+def decodificar(conteudo: bytes) -> list:
+    leitor = LeitorColunas(conteudo)
+    if leitor.entidade == b"V": return _decodificar_veiculos(leitor)
+    if leitor.entidade == b"M": return _decodificar_motoristas(leitor)
+    raise SnapshotInvalidoError(f"Entidade desconhecida no snapshot: {leitor.entidade!r}.")
+
+
+def arquivo_snapshot(arquivo_json) -> str:
+    return os.path.splitext(arquivo_json)[0] + ".snap"
+
+
+class RepositorioSnapshot(RepositorioJSON):
+    """RepositorioJSON sobre um arquivo de snapshot: mesma identidade, travas e verificação de versão."""
+
+    def __init__(self, arquivo, entidade):
+        if entidade == "veiculos":
+            super().__init__(arquivo, Veiculo.from_dict, lambda v: normalizar_placa(v.placa))
+            self._codificador = codificar_veiculos
+        else:
+            super().__init__(arquivo, Motorista.from_dict, lambda m: normalizar_cpf(m.cpf))
+            self._codificador = codificar_motoristas
+
+    def _decodificar(self, conteudo):
+        inicio = time.perf_counter()
+        itens = decodificar(conteudo)
+        instrumentacao.contar_json("parse", time.perf_counter() - inicio)
+        return itens
+
+    def _codificar(self, itens):
+        inicio = time.perf_counter()
+        conteudo = self._codificador(list(itens))
+        instrumentacao.contar_json("dump", time.perf_counter() - inicio)
+        return conteudo
+
+    def marcar_alterado(self, item=None):
+        self.alteracoes_pendentes = True
+
+    def migrar_de(self, arquivo_json):
+        """Importação única do JSON: só ocorre se o snapshot ainda não existe."""
+        if os.path.exists(self.arquivo) or not os.path.exists(arquivo_json): return False
+        self.substituir(RepositorioJSON(arquivo_json, self._fabrica, self._chave).listar())
+        self.gravar()
+        return True
+
+
+def converter(pasta, para="binario"):
+    """Reescreve veículos e motoristas da pasta no outro formato; devolve os arquivos gravados."""
+    gravados = []
+    for entidade in ("veiculos", "motoristas"):
+        arquivo_json = os.path.join(pasta, entidade + ".json")
+        binario = RepositorioSnapshot(arquivo_snapshot(arquivo_json), entidade)
+        if para == "binario":
+            origem, destino = RepositorioJSON(arquivo_json, binario._fabrica, binario._chave), binario
+        else:
+            origem, destino = binario, RepositorioJSON(arquivo_json, binario._fabrica, binario._chave)
+        destino.sincronizar()
+        destino.gravar(origem.listar())
+        gravados.append(destino.arquivo)
+    return gravados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pasta", default="data")
+    parser.add_argument("--para", choices=("binario", "json"), default="binario")
+    args = parser.parse_args()
+    for arquivo in converter(args.pasta, args.para):
+        print(f"Gravado: {arquivo} ({os.path.getsize(arquivo) / 1e6:.1f} MB)")
@@ -113,4 +113,801 @@ def test_geracao_relatorios_nao_quebra():
     assert controller.gerar_relatorio_eficiencia() == []
     
     controller.cadastrar_veiculo_controller("Carro", "REL-01", "X", "Y", "2020", "0")
-    assert len(controller.gerar_relatorio_custos()) == 1
\ No newline at end of file
+    assert len(controller.gerar_relatorio_custos()) == 1
+
+def test_repositorio_mapa_identidade_e_recarga():
+    """Buscas repetidas devolvem o mesmo objeto até o arquivo mudar em disco."""
+    controller.cadastrar_veiculo_controller("Carro", "IDX-01", "Fiat", "Uno", "2020", "100")
+
+    v1 = controller.buscar_veiculo("idx-01 ")
+    v2 = controller.buscar_veiculo("IDX-01")
+    assert v1 is v2
+    assert v1 in controller.carregar_veiculos()
+
+    with open(controller.FILE_VEICULOS, "w", encoding="utf-8") as f:
+        f.write('[{"tipo": "Carro", "placa": "IDX-01", "marca": "Fiat", "modelo": "Palio", '
+                '"ano": 2020, "quilometragem": 100.0}, {"tipo": "Moto", "placa": "IDX-02", '
+                '"marca": "Honda", "modelo": "CG", "ano": 2021, "quilometragem": 0.0}]')
+
+    recarregado = controller.buscar_veiculo("IDX-01")
+    assert recarregado is not v1
+    assert recarregado.modelo == "Palio"
+    assert controller.buscar_veiculo("IDX-02") is not None
+
+def test_diario_viagens_anexa_e_pagina():
+    """Viagens vão para o diário JSONL e podem ser paginadas sem reler tudo."""
+    controller.cadastrar_veiculo_controller("Carro", "JRN-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_motorista_controller("Ana", "555", "CNH555", "B")
+    for i in range(5):
+        controller.realizar_viagem_controller("555", "JRN-01", f"Destino {i}", "10")
+
+    assert [v["destino"] for v in controller.ultimas_viagens(2)] == ["Destino 3", "Destino 4"]
+    assert [v["destino"] for v in controller.listar_viagens(pagina=2, por_pagina=2)] == ["Destino 2", "Destino 3"]
+    assert len(controller.carregar_viagens_dicts()) == 5
+    assert not os.path.exists(controller.FILE_VIAGENS)
+
+def test_diario_migra_viagens_json_antigo():
+    import json
+    with open(controller.FILE_VIAGENS, "w", encoding="utf-8") as f:
+        json.dump([{"cpf_motorista": "1", "nome_motorista": "A", "placa_veiculo": "X",
+                    "modelo_veiculo": "Y", "destino": "Z", "distancia": 5.0}], f)
+
+    assert controller.ultimas_viagens(1)[0]["destino"] == "Z"
+    assert os.path.exists(os.path.splitext(controller.FILE_VIAGENS)[0] + ".jsonl")
+
+def _usar_sqlite(monkeypatch, tmp_path):
+    import json
+    import configuracoes
+    arquivo = tmp_path / "settings.json"
+    arquivo.write_text(json.dumps({"armazenamento": {"backend": "sqlite", "arquivo_sqlite": "frota.db"}}))
+    monkeypatch.setattr(configuracoes, "ARQUIVO_CONFIG", str(arquivo))
+
+def test_backend_sqlite_fluxo_completo(monkeypatch, tmp_path):
+    """O mesmo fluxo do controller funciona com o backend SQLite escolhido no settings.json."""
+    _usar_sqlite(monkeypatch, tmp_path)
+    from armazenamento import ArmazenamentoSQLite
+    assert isinstance(controller.obter_armazenamento(), ArmazenamentoSQLite)
+
+    controller.cadastrar_veiculo_controller("Carro", "SQL-01", "Fiat", "Mobi", "2023", "1000")
+    controller.cadastrar_veiculo_controller("Moto", "SQL-02", "Honda", "CG", "2022", "0")
+    controller.cadastrar_motorista_controller("Bia", "777", "CNH777", "AB")
+    controller.realizar_viagem_controller("777", "sql-01", "Centro", "1000")
+    controller.registrar_abastecimento_controller("SQL-01", "01/01/2025", "Gasolina", "50", "250")
+    controller.registrar_manutencao_controller("SQL-02", "02/01/2025", "Corretiva", "100", "Pneu")
+
+    assert controller.buscar_veiculo("SQL-02").status == StatusVeiculo.MANUTENCAO
+    assert controller.buscar_veiculo("SQL-01").quilometragem == 2000.0
+    assert controller.ultimas_viagens(1)[0]["destino"] == "Centro"
+
+    custos = {d["placa"]: d for d in controller.gerar_relatorio_custos()}
+    assert custos["SQL-02"]["total_manutencao"] == 120.0
+    assert custos["SQL-01"]["qtd_manutencoes"] == 0
+
+    ranking = controller.gerar_relatorio_eficiencia()
+    assert ranking[0]["placa"] == "SQL-01" and ranking[0]["km_l"] == 20.0
+
+def test_backend_sqlite_desfaz_transacao_com_erro(monkeypatch, tmp_path):
+    _usar_sqlite(monkeypatch, tmp_path)
+    controller.cadastrar_veiculo_controller("Carro", "TRX-01", "Fiat", "Uno", "2020", "0")
+    arm = controller.obter_armazenamento()
+
+    with pytest.raises(RuntimeError):
+        with arm.transacao():
+            veic = arm.buscar_veiculo("TRX-01")
+            veic.marca = "Outra"
+            arm.atualizar_veiculo(veic)
+            raise RuntimeError("falha no meio da operação")
+
+    assert controller.buscar_veiculo("TRX-01").marca == "Fiat"
+
+def test_ranking_incremental_e_verificacao_de_agregados():
+    controller.cadastrar_veiculo_controller("Carro", "RNK-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_veiculo_controller("Carro", "RNK-02", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_motorista_controller("Rui", "888", "CNH888", "B")
+    controller.realizar_viagem_controller("888", "RNK-01", "A", "100")
+    controller.realizar_viagem_controller("888", "RNK-02", "B", "300")
+    controller.registrar_abastecimento_controller("RNK-01", "01/01/2025", "Gasolina", "10", "50")
+    controller.registrar_abastecimento_controller("RNK-02", "01/01/2025", "Gasolina", "10", "50")
+
+    assert [d["placa"] for d in controller.gerar_relatorio_eficiencia()] == ["RNK-02", "RNK-01"]
+    controller.registrar_abastecimento_controller("RNK-02", "02/01/2025", "Gasolina", "50", "250")
+    assert [d["placa"] for d in controller.gerar_relatorio_eficiencia()] == ["RNK-01", "RNK-02"]
+    assert controller.verificar_agregados_controller() == []
+
+    import json
+    with open(controller.FILE_VEICULOS, encoding="utf-8") as f:
+        dados = json.load(f)
+    dados[0]["agregados"]["total_litros"] = 999.0
+    with open(controller.FILE_VEICULOS, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+
+    divergencias = controller.verificar_agregados_controller(corrigir=True)
+    assert [(d["placa"], d["campo"]) for d in divergencias] == [("RNK-01", "total_litros")]
+    assert controller.verificar_agregados_controller() == []
+    assert controller.buscar_veiculo("RNK-01").total_litros == 10.0
+
+def test_importacao_em_lote_com_relatorio_de_erros(tmp_path):
+    controller.cadastrar_veiculo_controller("Carro", "LOT-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_veiculo_controller("Caminhão", "LOT-02", "Volvo", "FH", "2020", "0")
+    controller.cadastrar_motorista_controller("Lia", "321", "CNH321", "B")
+
+    abastecimentos = tmp_path / "abast.csv"
+    abastecimentos.write_text(
+        "placa;data;combustivel;litros;valor\n"
+        "lot-01;01/01/2025;Gasolina;10,5;52,5\n"
+        "XXX-99;01/01/2025;Gasolina;10;50\n"
+        "LOT-01;02/01/2025;Gasolina;abc;50\n"
+        "LOT-01;03/01/2025;Gasolina;20;100\n",
+        encoding="utf-8",
+    )
+    resultado = controller.importar_lote_controller("abastecimentos", str(abastecimentos))
+    assert resultado["importados"] == 2
+    assert [e["linha"] for e in resultado["erros"]] == [3, 4]
+    assert controller.buscar_veiculo("LOT-01").total_litros == 30.5
+
+    viagens = tmp_path / "viagens.jsonl"
+    viagens.write_text(
+        '{"cpf": "321", "placa": "LOT-01", "destino": "A", "distancia": 100}\n'
+        '{"cpf": "321", "placa": "LOT-02", "destino": "B", "distancia": 50}\n'
+        '{"cpf": "321", "placa": "LOT-01", "destino": "C", "distancia": 200}\n'
+        '{"cpf": "321", "placa": \n',
+        encoding="utf-8",
+    )
+    resultado = controller.importar_lote_controller("viagens", str(viagens))
+    assert resultado["importados"] == 2
+    assert "CNH" in resultado["erros"][0]["erro"] and resultado["erros"][1]["linha"] == 4
+    assert controller.buscar_veiculo("LOT-01").quilometragem == 300.0
+    assert [v["destino"] for v in controller.ultimas_viagens(5)] == ["A", "C"]
+
+def _abastecer_varias_vezes(placa, vezes):
+    for _ in range(vezes):
+        controller.registrar_abastecimento_controller(placa, "01/01/2025", "Diesel", "1", "5")
+
+def test_processos_concorrentes_nao_perdem_gravacoes():
+    """Vários processos gravando ao mesmo tempo: trava + gravação atômica preservam todas as operações."""
+    import multiprocessing
+    controller.cadastrar_veiculo_controller("Caminhão", "CON-01", "Volvo", "FH", "2020", "0")
+    controller.cadastrar_veiculo_controller("Caminhão", "CON-02", "Volvo", "FH", "2020", "0")
+
+    contexto = multiprocessing.get_context("fork")
+    processos = [contexto.Process(target=_abastecer_varias_vezes, args=(placa, 15))
+                 for placa in ("CON-01", "CON-02", "CON-01", "CON-02")]
+    for p in processos: p.start()
+    for p in processos: p.join()
+    assert all(p.exitcode == 0 for p in processos)
+
+    assert len(controller.buscar_veiculo("CON-01").historico_abastecimentos) == 30
+    assert len(controller.buscar_veiculo("CON-02").historico_abastecimentos) == 30
+
+def test_gravacao_recusa_arquivo_alterado_por_outro_processo():
+    from repositorio import ConflitoVersaoError
+    controller.cadastrar_veiculo_controller("Carro", "VER-01", "Fiat", "Uno", "2020", "0")
+    arm = controller.obter_armazenamento()
+    arm.veiculos.sincronizar()
+
+    with open(controller.FILE_VEICULOS, "a", encoding="utf-8") as f:
+        f.write(" ")
+
+    with pytest.raises(ConflitoVersaoError):
+        arm.veiculos.gravar()
+
+def test_historicos_carregados_sob_demanda():
+    """Listagem e busca não materializam o histórico; contagens vêm dos agregados."""
+    controller.cadastrar_veiculo_controller("Carro", "LZY-01", "Fiat", "Uno", "2020", "0")
+    controller.registrar_abastecimento_controller("LZY-01", "01/01/2025", "Gasolina", "10", "50")
+    controller.registrar_abastecimento_controller("LZY-01", "02/01/2025", "Gasolina", "20", "100")
+    controller.obter_armazenamento().veiculos.invalidar()
+
+    veiculo = controller.buscar_veiculo("LZY-01")
+    assert not veiculo.historicos_materializados()
+    assert veiculo.qtd_abastecimentos == 2
+    assert veiculo.to_dict()["abastecimentos"][1]["litros"] == 20.0
+    assert not veiculo.historicos_materializados()
+
+    assert [a.litros for a in veiculo.historico_abastecimentos] == [10.0, 20.0]
+    assert veiculo.historicos_materializados() is False
+    assert list(veiculo) == []
+    assert veiculo.historicos_materializados()
+
+def test_painel_analitico_reproduz_relatorios():
+    analise = pytest.importorskip("analise")
+    controller.cadastrar_veiculo_controller("Carro", "ANL-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_veiculo_controller("Moto", "ANL-02", "Honda", "CG", "2021", "0")
+    controller.cadastrar_veiculo_controller("Carro", "ANL-03", "VW", "Gol", "2019", "0")
+    controller.cadastrar_motorista_controller("Ana", "777", "CNH777", "AB")
+    controller.realizar_viagem_controller("777", "ANL-01", "A", "200")
+    controller.realizar_viagem_controller("777", "ANL-02", "B", "300")
+    controller.registrar_abastecimento_controller("ANL-01", "01/01/2025", "Gasolina", "20", "100")
+    controller.registrar_abastecimento_controller("ANL-02", "02/01/2025", "Gasolina", "10", "60")
+    controller.registrar_manutencao_controller("ANL-03", "03/01/2025", "corretiva", "100", "Freio")
+
+    tabela = analise.TabelaFrota(controller.carregar_veiculos())
+    assert tabela.relatorio_custos() == controller.gerar_relatorio_custos()
+    assert tabela.relatorio_eficiencia() == controller.gerar_relatorio_eficiencia()
+
+    resumo = controller.gerar_painel_analitico()
+    assert resumo["custo_por_tipo"]["Carro"] == {"manutencao": 120.0, "combustivel": 100.0}
+    assert resumo["preco_medio_litro"] == pytest.approx(160 / 30)
+    assert resumo["custo_por_km"] == pytest.approx(280 / 500)
+    assert resumo["percentis_km_l"][50] == pytest.approx(20.0)
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_relatorios_por_periodo(monkeypatch, tmp_path, backend):
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    controller.cadastrar_veiculo_controller("Carro", "MES-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_veiculo_controller("Carro", "MES-02", "VW", "Gol", "2020", "0")
+    controller.cadastrar_motorista_controller("Caio", "555", "CNH555", "B")
+    controller.realizar_viagem_controller("555", "MES-01", "A", "300", "10/01/2025")
+    controller.realizar_viagem_controller("555", "MES-02", "B", "200", "20/02/2025")
+    controller.realizar_viagem_controller("555", "MES-01", "C", "100", "05/02/2025")
+    controller.registrar_abastecimento_controller("MES-01", "12/01/2025", "Gasolina", "30", "150")
+    controller.registrar_abastecimento_controller("MES-01", "06/02/2025", "Gasolina", "20", "100")
+    controller.registrar_abastecimento_controller("MES-02", "21/02/2025", "Gasolina", "10", "50")
+    controller.registrar_manutencao_controller("MES-02", "25/01/2025", "Corretiva", "100", "Freio")
+
+    inicio, fim = controller.periodo_do_mes(2, 2025)
+    assert (inicio, fim) == ("01/02/2025", "28/02/2025")
+    custos = {d["placa"]: d for d in controller.gerar_relatorio_custos_periodo(inicio, fim)}
+    assert custos["MES-02"]["qtd_manutencoes"] == 0
+    assert controller.gerar_relatorio_custos_periodo("01/01/2025", "31/01/2025")[1]["total_manutencao"] == 120.0
+
+    ranking = controller.gerar_relatorio_eficiencia_periodo(inicio, fim)
+    assert [(d["placa"], d["km_l"]) for d in ranking] == [("MES-02", 20.0), ("MES-01", 5.0)]
+
+    assert controller.totais_periodo_controller(inicio, fim) == {
+        "total_manutencao": 0.0, "qtd_manutencoes": 0, "litros": 30.0, "total_combustivel": 150.0, "km": 300.0}
+    assert controller.totais_periodo_controller("01/01/2025", "31/01/2025", "MES-01")["km"] == 300.0
+    with pytest.raises(Exception):
+        controller.registrar_abastecimento_controller("MES-01", "31/02/2025", "Gasolina", "1", "1")
+
+def test_gerador_frota_deterministico_e_benchmark(tmp_path):
+    from gerador_frota import gerar_frota, gravar_frota, armazenamento_da_pasta
+    import bench_controller
+
+    frota = gerar_frota(40, semente=7)
+    assert [v.to_dict() for v in frota["veiculos"]] == [v.to_dict() for v in gerar_frota(40, semente=7)["veiculos"]]
+    assert {v.tipo for v in frota["veiculos"]} == {"Carro", "Moto", "Caminhão"}
+
+    arm = armazenamento_da_pasta(str(tmp_path / "frota"))
+    gravar_frota(frota, arm)
+    assert arm.total_viagens() == len(frota["viagens"]) > 0
+    assert arm.verificar_agregados() == []
+
+    resultado = bench_controller.executar(20, repeticoes=2, repeticoes_pesadas=1, com_memoria=False,
+                                          pasta=str(tmp_path / "bench"))
+    assert resultado["meta"]["frota"]["veiculos"] == 20
+    assert resultado["resultados"]["realizar_viagem_controller"]["chamadas"] == 2
+    assert controller.FILE_VEICULOS == os.path.join("data_test", "veiculos.json")
+
+def test_instrumentacao_mede_controller_e_io(monkeypatch, tmp_path):
+    import instrumentacao
+    monkeypatch.setenv("FROTA_INSTRUMENTACAO", "1")
+    instrumentacao.limpar()
+
+    controller.cadastrar_veiculo_controller("Carro", "INS-01", "Fiat", "Uno", "2020", "0")
+    controller._armazenamentos.clear()
+    controller.registrar_abastecimento_controller("INS-01", "01/01/2025", "Gasolina", "10", "50")
+
+    resumo = {f["funcao"]: f for f in controller.resumo_instrumentacao()["funcoes"]}
+    abastecimento = resumo["registrar_abastecimento_controller"]
+    assert abastecimento["chamadas"] == 1
+    assert abastecimento["bytes_lidos"] > 0 and abastecimento["bytes_escritos"] > 0
+    assert abastecimento["objetos"] >= 1 and abastecimento["json_ms"] > 0
+
+    caminho = tmp_path / "chamadas.jsonl"
+    assert controller.exportar_instrumentacao(str(caminho)) == len(caminho.read_text().splitlines()) >= 2
+
+    monkeypatch.setenv("FROTA_INSTRUMENTACAO", "0")
+    instrumentacao.limpar()
+    controller.gerar_relatorio_custos()
+    assert instrumentacao.registros() == []
+
+def test_viagens_em_lote_gravam_uma_vez(monkeypatch):
+    from repositorio import RepositorioJSON
+    controller.cadastrar_veiculo_controller("Carro", "LOT-01", "Fiat", "Uno", "2020", "100")
+    controller.cadastrar_veiculo_controller("Caminhao", "LOT-02", "Volvo", "FH", "2020", "0")
+    controller.cadastrar_motorista_controller("Davi", "321", "CNH321", "B")
+
+    gravacoes = []
+    gravar = RepositorioJSON.gravar
+    monkeypatch.setattr(RepositorioJSON, "gravar", lambda self, *args, **kwargs: (gravacoes.append(self.arquivo), gravar(self, *args, **kwargs)))
+
+    resultados = controller.realizar_viagens_lote([
+        ("321", "LOT-01", "A", "50"),
+        ("321", "LOT-02", "B", "10"),
+        {"cpf": "321", "placa": "lot-01", "destino": "C", "distancia": "25", "data": "02/01/2025"},
+        ("999", "LOT-01", "D", "5"),
+        ("321", "LOT-01"),
+    ])
+
+    assert [r["sucesso"] for r in resultados] == [True, False, True, False, False]
+    assert "CNH" in resultados[1]["erro"]
+    assert resultados[2]["quilometragem"] == 175.0
+    assert gravacoes == [controller.FILE_VEICULOS]
+    assert controller.buscar_veiculo("LOT-01").quilometragem == 175.0
+    assert [v["destino"] for v in controller.ultimas_viagens(5)] == ["A", "C"]
+
+def test_viagem_em_lote_que_falha_ao_registrar_nao_altera_a_km(monkeypatch):
+    controller.cadastrar_veiculo_controller("Carro", "LOT-03", "Fiat", "Uno", "2020", "100")
+    controller.cadastrar_motorista_controller("Davi", "321", "CNH321", "B")
+    arm = controller.obter_armazenamento()
+    registrar = arm.registrar_viagem
+    falhas = ["B"]
+
+    def registrar_viagem(veic, viagem):
+        if viagem["destino"] in falhas: raise OSError("disco cheio")
+        return registrar(veic, viagem)
+
+    monkeypatch.setattr(arm, "registrar_viagem", registrar_viagem)
+    resultados = controller.realizar_viagens_lote([("321", "LOT-03", "A", "50"), ("321", "LOT-03", "B", "30"),
+                                                   ("321", "LOT-03", "C", "20")])
+
+    assert [r["sucesso"] for r in resultados] == [True, False, True]
+    assert resultados[2]["quilometragem"] == 170.0
+    assert controller.buscar_veiculo("LOT-03").quilometragem == 170.0
+
+def test_menu_grava_o_grupo_pendente_ao_sair(monkeypatch):
+    import main
+    descargas = []
+    monkeypatch.setattr(controller, "descarregar_armazenamentos", lambda: descargas.append(1))
+    monkeypatch.setattr("builtins.input", lambda *args: "0")
+    main.main()
+    assert descargas == [1]
+
+    def interromper(*args): raise KeyboardInterrupt
+    monkeypatch.setattr("builtins.input", interromper)
+    with pytest.raises(KeyboardInterrupt):
+        main.main()
+    assert descargas == [1, 1]
+
+def test_arquivo_corrompido_nao_vira_frota_vazia_e_gravacao_com_falha_nao_deixa_temporario(monkeypatch):
+    import trava
+    controller.cadastrar_veiculo_controller("Carro", "COR-01", "Fiat", "Uno", "2020", "0")
+    with open(controller.FILE_MOTORISTAS, "w", encoding="utf-8") as f:
+        f.write("[{")
+    controller._armazenamentos.clear()
+    with pytest.raises(Exception):
+        controller.carregar_motoristas()
+
+    def falhar(*args): raise OSError("disco cheio")
+    monkeypatch.setattr(trava.os, "replace", falhar)
+    with pytest.raises(OSError):
+        trava.gravar_atomico(controller.FILE_VEICULOS, b"[]")
+    assert not [nome for nome in os.listdir(controller.DATA_DIR) if nome.endswith(".tmp")]
+
+def test_alocacao_automatica_despacha_plano():
+    controller.cadastrar_veiculo_controller("Carro", "ALO-01", "Fiat", "Uno", "2020", "500")
+    controller.cadastrar_veiculo_controller("Carro", "ALO-02", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_motorista_controller("Eva", "654", "CNH654", "AB")
+
+    plano = controller.alocar_viagens_controller([("A", "300"), {"destino": "B", "distancia": 250, "data": "03/01/2025"}])
+    assert [a["placa"] for a in plano["alocacoes"]] == ["ALO-02", "ALO-02"]
+    assert plano["desequilibrio_km"] == {"Carro": 50}
+
+    resultados = controller.despachar_alocacoes_lote(plano["alocacoes"])
+    assert all(r["sucesso"] for r in resultados)
+    assert controller.buscar_veiculo("ALO-02").quilometragem == 550
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_agenda_de_revisoes(monkeypatch, tmp_path, backend):
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    monkeypatch.setattr(controller, "_intervalo_revisao", lambda: 1000.0)
+    controller.cadastrar_veiculo_controller("Carro", "REV-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_veiculo_controller("Carro", "REV-02", "VW", "Gol", "2020", "5000")
+    controller.cadastrar_veiculo_controller("Carro", "REV-03", "VW", "Up", "2020", "0")
+    controller.cadastrar_motorista_controller("Gil", "777", "CNH777", "B")
+    assert controller.revisoes_vencidas_controller() == []
+
+    controller.proximas_revisoes_controller(3)  # monta a agenda antes das alterações
+    controller.realizar_viagem_controller("777", "REV-01", "A", "1200")
+    controller.realizar_viagem_controller("777", "REV-02", "B", "900")
+    controller.realizar_viagem_controller("777", "REV-03", "C", "1500")
+    assert [d["placa"] for d in controller.revisoes_vencidas_controller()] == ["REV-03", "REV-01"]
+    assert controller.proximas_revisoes_controller(3)[2]["km_restantes"] == 100
+
+    controller.registrar_manutencao_controller("REV-03", "01/03/2025", "Preventiva", "300", "Revisão")
+    controller.finalizar_manutencao_controller("REV-03")
+    assert [d["placa"] for d in controller.revisoes_vencidas_controller()] == ["REV-01"]
+    proximas = controller.proximas_revisoes_controller(2)
+    assert [(d["placa"], d["km_restantes"]) for d in proximas] == [("REV-01", -200), ("REV-02", 100)]
+    assert controller.buscar_veiculo("REV-03").km_ultima_revisao == 1500
+
+def test_servidor_http_serializa_mutacoes_em_lote(monkeypatch):
+    import asyncio
+    from servidor import ServicoFrota
+    from carga_servidor import requisitar
+    from repositorio import RepositorioJSON
+
+    gravacoes = []
+    gravar = RepositorioJSON.gravar
+    monkeypatch.setattr(RepositorioJSON, "gravar", lambda self, *args, **kwargs: (gravacoes.append(self.arquivo), gravar(self, *args, **kwargs)))
+
+    async def cenario():
+        servico = ServicoFrota()
+        servidor = await servico.iniciar("127.0.0.1", 0)
+        porta = servidor.sockets[0].getsockname()[1]
+        conexoes = [await asyncio.open_connection("127.0.0.1", porta) for _ in range(20)]
+        try:
+            r, w = conexoes[0]
+            assert (await requisitar(r, w, "POST", "/veiculos", {"tipo": "Carro", "placa": "WEB-01", "marca": "Fiat",
+                                                                  "modelo": "Uno", "ano": 2020, "km_inicial": 0}))[0] == 201
+            assert (await requisitar(r, w, "POST", "/motoristas", {"nome": "Ivo", "cpf": "888", "cnh": "1",
+                                                                    "categoria_cnh": "B"}))[0] == 201
+            gravacoes.clear()
+            respostas = await asyncio.gather(*(
+                requisitar(r, w, "POST", "/viagens", {"cpf": "888", "placa": "WEB-01", "destino": f"D{i}", "distancia": 10})
+                for i, (r, w) in enumerate(conexoes)
+            ))
+            assert all(status == 201 for status, _ in respostas)
+            assert len(gravacoes) < len(conexoes)  # viagens simultâneas gravadas em lote
+
+            status, veiculo = await requisitar(r, w, "GET", "/veiculos/web-01")
+            assert status == 200 and veiculo["quilometragem"] == 200.0
+            status, erro = await requisitar(r, w, "POST", "/viagens", {"cpf": "000", "placa": "WEB-01", "destino": "X", "distancia": 1})
+            assert status == 400 and "000" in erro["erro"]
+            assert (await requisitar(r, w, "GET", "/veiculos/NAO-EXISTE"))[0] == 404
+            assert (await requisitar(r, w, "DELETE", "/veiculos/WEB-01"))[0] == 405
+            status, ultimas = await requisitar(r, w, "GET", "/viagens/ultimas?n=5")
+            assert status == 200 and len(ultimas) == 5
+        finally:
+            for _, w in conexoes: w.close()
+            servidor.close()
+            await servico.encerrar()
+
+    asyncio.run(cenario())
+    assert controller.buscar_veiculo("WEB-01").quilometragem == 200.0
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_servidor_desfaz_so_a_mutacao_que_falha_depois_de_gravar(monkeypatch, tmp_path, backend):
+    from servidor import ServicoFrota
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    controller.cadastrar_veiculo_controller("Carro", "SRV-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_motorista_controller("Ivo", "888", "1", "B")
+
+    def viajar_e_falhar():
+        controller.realizar_viagens_lote([("888", "SRV-01", "B", 20, "02/01/2025")])
+        raise Exception("falhou depois de gravar")
+    lote = [(controller.realizar_viagens_lote, ([("888", "SRV-01", "A", 10, "01/01/2025")],), None),
+            (viajar_e_falhar, (), None),
+            (controller.registrar_abastecimento_controller, ("SRV-01", "03/01/2025", "Gasolina", "5", "30"), None)]
+    assert [sucesso for sucesso, _ in ServicoFrota._aplicar_lote(lote)] == [True, False, True]
+
+    controller._armazenamentos.clear()
+    veic = controller.buscar_veiculo("SRV-01")
+    assert (veic.quilometragem, veic.total_litros) == (10.0, 5)
+    assert [v["destino"] for v in controller.ultimas_viagens(5)] == ["A"]
+
+def test_servidor_responde_500_so_para_falhas_internas(monkeypatch):
+    import asyncio
+    from servidor import ServicoFrota
+    servico = ServicoFrota()
+    despachar = lambda alvo: asyncio.run(servico._despachar("GET", alvo, b""))
+    try:
+        assert despachar("/viagens/ultimas?n=abc")[0] == 400
+        assert despachar("/relatorios/custos?inicio=99/99/2025&fim=01/01/2025")[0] == 400
+        monkeypatch.setattr(controller, "ultimas_viagens", lambda n: None.ultimas(n))  # defeito, não erro do cliente
+        status, erro = despachar("/viagens/ultimas?n=5")
+        assert status == 500 and "ultimas" in erro["erro"]
+    finally:
+        servico.executor.shutdown(wait=True)
+
+def test_write_behind_grava_em_grupo(monkeypatch):
+    import json, time
+    configuracao = {"durabilidade": "grupo", "intervalo_ms": 60000, "max_operacoes": 3}
+    monkeypatch.setattr(controller.configuracoes, "secao",
+                        lambda nome, secao=controller.configuracoes.secao: configuracao if nome == "persistencia" else secao(nome))
+    controller.cadastrar_veiculo_controller("Carro", "WB-01", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_motorista_controller("Lia", "999", "CNH999", "B")
+    controller.cadastrar_veiculo_controller("Carro", "WB-02", "Fiat", "Uno", "2020", "0")  # 3ª operação: grava o grupo
+
+    def em_disco():
+        with open(controller.FILE_VEICULOS, encoding="utf-8") as f:
+            return {v["placa"]: v for v in json.load(f)}
+
+    assert set(em_disco()) == {"WB-01", "WB-02"}
+    controller.registrar_abastecimento_controller("WB-01", "01/01/2025", "Gasolina", "10", "60")
+    controller.realizar_viagem_controller("999", "WB-01", "A", "100")
+    with pytest.raises(Exception):  # desfeita com o grupo pendente: o grupo não se perde
+        controller.realizar_viagem_controller("999", "WB-02", "B", "-")
+    assert em_disco()["WB-01"]["quilometragem"] == 0.0
+    from models import Abastecimento
+    arm = controller.obter_armazenamento()
+    with pytest.raises(RuntimeError):  # alterou um veículo do grupo e falhou: ele volta ao estado confirmado
+        with arm.transacao():
+            veic = arm.buscar_veiculo("WB-01")
+            abast = Abastecimento("02/01/2025", "Gasolina", 50, 300)
+            veic.abastecer(abast)
+            arm.registrar_abastecimento(veic, abast)
+            raise RuntimeError("desfeita")
+    assert controller.buscar_veiculo("WB-01").total_litros == 10.0
+
+    controller.descarregar_armazenamentos()
+    disco = em_disco()
+    assert disco["WB-01"]["quilometragem"] == 100.0 and disco["WB-01"]["agregados"]["total_litros"] == 10.0
+    assert [v["destino"] for v in controller.ultimas_viagens(5)] == ["A"]
+    controller.realizar_viagem_controller("999", "WB-01", "C", "10")
+    assert [v["destino"] for v in controller.ultimas_viagens(5)] == ["A", "C"]  # ler o diário grava o grupo antes
+
+    # Os fragmentos reaproveitados geram o mesmo arquivo que uma serialização completa.
+    with open(controller.FILE_VEICULOS, encoding="utf-8") as f:
+        conteudo = f.read()
+    assert conteudo == json.dumps([v.to_dict() for v in controller.carregar_veiculos()], indent=4, ensure_ascii=False)
+
+    configuracao.update(intervalo_ms=20)
+    controller.registrar_abastecimento_controller("WB-02", "02/01/2025", "Gasolina", "5", "30")
+    limite = time.monotonic() + 5
+    while em_disco()["WB-02"]["agregados"]["total_litros"] != 5.0 and time.monotonic() < limite:
+        time.sleep(0.02)
+    assert em_disco()["WB-02"]["agregados"]["total_litros"] == 5.0
+
+def test_formato_binario_importa_json_e_persiste_no_snapshot(monkeypatch, tmp_path):
+    """Com "formato": "binario", os JSON existentes são importados uma vez e as operações gravam o snapshot."""
+    import json
+    import configuracoes
+    import snapshot
+    controller.cadastrar_veiculo_controller("Carro", "BIN-01", "Fiat", "Uno", "2020", "1000")
+    controller.cadastrar_motorista_controller("Ana", "111", "CNH1", "B")
+    json_antes = open(controller.FILE_VEICULOS, "rb").read()
+
+    arquivo = tmp_path / "settings.json"
+    arquivo.write_text(json.dumps({"armazenamento": {"backend": "json", "formato": "binario"}}))
+    monkeypatch.setattr(configuracoes, "ARQUIVO_CONFIG", str(arquivo))
+
+    controller.realizar_viagem_controller("111", "BIN-01", "Centro", "150", "10/03/2025")
+    controller.cadastrar_veiculo_controller("Moto", "BIN-02", "Honda", "CG", "2022", "0")
+    assert open(controller.FILE_VEICULOS, "rb").read() == json_antes
+    controller._armazenamentos.clear()
+    assert controller.buscar_veiculo("BIN-01").quilometragem == 1150.0
+    assert controller.buscar_veiculo("bin-02") is not None
+
+    snapshot.converter(controller.DATA_DIR, "json")
+    with open(controller.FILE_VEICULOS, encoding="utf-8") as f:
+        assert [v["placa"] for v in json.load(f)] == ["BIN-01", "BIN-02"]
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_listagem_paginada_da_frota(monkeypatch, tmp_path, backend):
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    for i, (tipo, km) in enumerate([("Carro", 500), ("Moto", 100), ("Caminhao", 900), ("Carro", 100), ("Moto", 300)]):
+        controller.cadastrar_veiculo_controller(tipo, f"PAG-{5 - i}", "M", "X", str(2020 + i % 2), str(km))
+    controller.cadastrar_motorista_controller("Ana", "1", "C", "AE")
+    controller.registrar_manutencao_controller("PAG-5", "01/01/2025", "Corretiva", "100", "Freio")
+    controller.realizar_viagem_controller("1", "PAG-1", "Centro", "1000", "02/01/2025")
+
+    pagina = controller.listar_frota_controller(ordem="km", decrescente=True, pagina=1, por_pagina=2)
+    assert [l["placa"] for l in pagina["linhas"]] == ["PAG-1", "PAG-3"] and pagina["paginas"] == 3
+    pagina = controller.listar_frota_controller(ordem="km", decrescente=True, pagina=2, por_pagina=2)
+    assert [l["placa"] for l in pagina["linhas"]] == ["PAG-5", "PAG-2"]  # empate em 100 km: cadastro invertido
+    assert [l["placa"] for l in controller.listar_frota_controller(tipo="carro")["linhas"]] == ["PAG-2", "PAG-5"]
+    pagina = controller.listar_frota_controller(status="ativo", tipo="Carro", ordem="ano")
+    assert [l["placa"] for l in pagina["linhas"]] == ["PAG-2"] and pagina["total"] == 1
+    with pytest.raises(Exception, match="Ordenação inválida"):
+        controller.listar_frota_controller(ordem="modelo")
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_viagens_por_motorista_veiculo_e_utilizacao(monkeypatch, tmp_path, backend):
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    controller.cadastrar_veiculo_controller("Carro", "UTI-0001", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_veiculo_controller("Carro", "UTI-0002", "Fiat", "Uno", "2020", "0")
+    for nome, cpf in [("Ana", "111"), ("Bia", "222"), ("Caio", "333")]:
+        controller.cadastrar_motorista_controller(nome, cpf, "C", "B")
+    controller.realizar_viagem_controller("111", "UTI-0001", "Centro", "100", "01/03/2025")
+    controller.realizar_viagem_controller("111", "UTI-0002", "Porto", "50", "01/03/2025")
+    controller.realizar_viagem_controller("222", "UTI-0001", "Sul", "250", "10/03/2025")
+    controller.realizar_viagem_controller("111", "UTI-0001", "Norte", "20", "02/04/2025")
+
+    ana = controller.viagens_do_motorista_controller("111")
+    assert [v["destino"] for v in ana["viagens"]] == ["Centro", "Porto", "Norte"]
+    assert ana["total_viagens"] == 3 and ana["distancia"] == 170.0
+    carro = controller.viagens_do_veiculo_controller(" uti-0001", "01/03/2025", "31/03/2025")
+    assert [v["destino"] for v in carro["viagens"]] == ["Centro", "Sul"] and carro["distancia"] == 350.0
+
+    uso = controller.utilizacao_motoristas_controller("01/03/2025", "31/03/2025")
+    assert [d["nome"] for d in uso] == ["Bia", "Ana", "Caio"]
+    assert (uso[1]["viagens"], uso[1]["dias_ativos"], uso[1]["ultima_viagem"]) == (2, 1, "01/03/2025")
+    assert uso[0]["participacao_km"] == 0.625 and uso[2]["viagens"] == 0
+    with pytest.raises(Exception, match="Motorista não encontrado"):
+        controller.viagens_do_motorista_controller("999")
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_alertas_de_abastecimento_no_registro_e_no_reprocessamento(monkeypatch, tmp_path, backend):
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    controller.cadastrar_veiculo_controller("Carro", "ALR-0001", "Fiat", "Uno", "2020", "0")
+    for dia in range(1, 7):
+        msg = controller.registrar_abastecimento_controller("ALR-0001", f"{dia:02d}/05/2025", "Gasolina", "40", "240")
+        assert "ATENÇÃO" not in msg
+    msg = controller.registrar_abastecimento_controller("ALR-0001", "08/05/2025", "Gasolina", "40", "480")
+    assert "Preço por litro" in msg
+
+    alertas = controller.listar_alertas_controller()
+    assert alertas["total"] == 1 and alertas["alertas"][0]["regra"] == "preco_litro"
+    assert alertas["alertas"][0]["observado"] == 12.0 and alertas["alertas"][0]["esperado"] == 6.0
+    assert controller.reprocessar_alertas_controller() == {"abastecimentos": 7, "alertas": 1}
+    assert controller.listar_alertas_controller()["alertas"] == alertas["alertas"]
+
+    # Transação desfeita: as estatísticas que viram o abastecimento não gravado são descartadas.
+    from models import Abastecimento
+    arm = controller.obter_armazenamento()
+    detector = arm.detector_anomalias()
+    with pytest.raises(RuntimeError):
+        with arm.transacao():
+            detector.avaliar(arm.buscar_veiculo("ALR-0001"), Abastecimento("09/05/2025", "Gasolina", 40, 240))
+            raise RuntimeError("desfeita")
+    assert arm.detector_anomalias() is not detector
+    assert not os.path.exists(os.path.join(controller.DATA_DIR, "alertas_abastecimento.jsonl.idx"))
+
+def test_particoes_tocam_so_a_particao_do_veiculo_e_relatorios_map_reduce(monkeypatch, tmp_path):
+    import json
+    import configuracoes
+    from particoes import particao_da_placa, arquivos_particoes
+    placas = [f"PRT-{i:04d}" for i in range(12)]
+    for i, placa in enumerate(placas):
+        controller.cadastrar_veiculo_controller("Carro", placa, "Fiat", "Uno", "2020", "0")
+        controller.registrar_manutencao_controller(placa, "01/01/2025", "Corretiva", str(100 * i), "Freio")
+        controller.finalizar_manutencao_controller(placa)
+        controller.registrar_abastecimento_controller(placa, "02/01/2025", "Gasolina", "40", "240")
+    controller.cadastrar_motorista_controller("Ana", "111", "CNH1", "B")
+    esperado_custos = {d["placa"]: d for d in controller.gerar_relatorio_custos()}
+
+    arquivo = tmp_path / "settings.json"
+    arquivo.write_text(json.dumps({"armazenamento": {"backend": "json", "particoes": 4, "processos": 2}}))
+    monkeypatch.setattr(configuracoes, "ARQUIVO_CONFIG", str(arquivo))
+    arquivos = arquivos_particoes(controller.FILE_VEICULOS, 4)
+    for placa, km in [("PRT-0003", 400), ("PRT-0007", 200), ("PRT-0010", 400)]:
+        controller.realizar_viagem_controller("111", placa, "Centro", str(km), "03/01/2025")
+    assert all(os.path.exists(a) for a in arquivos)
+
+    dona = arquivos[particao_da_placa("prt-0005", 4)]
+    antes = {a: os.stat(a).st_mtime_ns for a in arquivos}
+    controller.registrar_abastecimento_controller("prt-0005", "04/01/2025", "Gasolina", "10", "60")
+    assert [a for a in arquivos if os.stat(a).st_mtime_ns != antes[a]] == [dona]
+
+    controller._armazenamentos.clear()  # partições ainda não carregadas: relatórios pelo pool de processos
+    assert {d["placa"]: d for d in controller.gerar_relatorio_custos()} == esperado_custos
+    ranking = controller.gerar_relatorio_eficiencia()
+    assert [d["placa"] for d in ranking[:3]] == ["PRT-0003", "PRT-0010", "PRT-0007"]
+    assert len(ranking) == 12
+    controller.carregar_veiculos()  # com as partições em memória, o ranking incremental dá a mesma ordem
+    assert controller.gerar_relatorio_eficiencia() == ranking
+
+
+def test_cache_de_veiculos_limitado_com_despejo_e_gravacao(monkeypatch, tmp_path):
+    import json
+    import configuracoes
+    from armazenamento import ArmazenamentoCache
+    placas = [f"LRU-{i:04d}" for i in range(8)]
+    for placa in placas:
+        controller.cadastrar_veiculo_controller("Carro", placa, "Fiat", "Uno", "2020", "0")
+    assert controller.estatisticas_cache_controller() is None
+
+    arquivo = tmp_path / "settings.json"
+    arquivo.write_text(json.dumps({"armazenamento": {"backend": "json", "cache_max_entradas": 3},
+                                   "persistencia": {"durabilidade": "grupo", "intervalo_ms": 60000}}))
+    monkeypatch.setattr(configuracoes, "ARQUIVO_CONFIG", str(arquivo))
+    assert isinstance(controller.obter_armazenamento(), ArmazenamentoCache)
+    for placa in placas:
+        controller.registrar_abastecimento_controller(placa, "02/01/2025", "Gasolina", "40", "240")
+    controller.registrar_abastecimento_controller("LRU-0007", "03/01/2025", "Gasolina", "10", "60")
+
+    stats = controller.estatisticas_cache_controller()
+    assert stats["entradas"] == 3 and stats["veiculos_no_disco"] == 8
+    assert stats["acertos"] >= 1 and stats["faltas"] >= 8
+    # Alterados que saíram do cache antes do grupo ser gravado foram gravados no despejo.
+    assert stats["despejos"] >= 5 and stats["gravados_no_despejo"] >= 5
+
+    controller.descarregar_armazenamentos()
+    controller._armazenamentos.clear()
+    custos = {d["placa"]: d for d in controller.gerar_relatorio_custos()}
+    assert len(custos) == 8
+    assert controller.buscar_veiculo("LRU-0007").total_litros == 50
+    assert controller.buscar_veiculo("LRU-0000").total_litros == 40
+
+def test_modo_batch_executa_fluxo_jsonl_com_checkpoints(monkeypatch):
+    import io
+    import json
+    import lote
+    from armazenamento import ArmazenamentoJSON
+    gravacoes = []
+    original = ArmazenamentoJSON._gravar_pendencias
+    monkeypatch.setattr(ArmazenamentoJSON, "_gravar_pendencias",
+                        lambda self, sincronizar=True: gravacoes.append(1) or original(self, sincronizar))
+    operacoes = [
+        {"op": "cadastrar_veiculo", "tipo": "Carro", "placa": "BAT-0001", "marca": "Fiat", "modelo": "Uno",
+         "ano": 2020, "km_inicial": 0, "id": "v1"},
+        {"op": "cadastrar_motorista", "nome": "Ana", "cpf": "111", "cnh": "X", "categoria": "B"},
+        {"op": "viagem", "cpf": "111", "placa": "bat-0001", "destino": "Centro", "distancia": 50, "data": "01/01/2025"},
+        {"op": "abastecimento", "placa": "BAT-0001", "data": "02/01/2025", "combustivel": "Gasolina",
+         "litros": 10, "valor": 60},
+        {"op": "checkpoint"},
+        {"op": "viagem", "cpf": "999", "placa": "BAT-0001", "destino": "X", "distancia": 1},
+        {"op": "inexistente"},
+        {"op": "buscar_veiculo", "placa": "BAT-0001"},
+    ]
+    entrada = io.StringIO("\n".join(json.dumps(o) for o in operacoes) + "\nnão é json\n")
+    saida = io.StringIO()
+
+    assert lote.executar(entrada, saida, checkpoint=3) == {"operacoes": 8, "erros": 3}
+    resultados = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert [r["linha"] for r in resultados] == [1, 2, 3, 4, 6, 7, 8, 9]
+    assert resultados[0]["id"] == "v1" and resultados[2]["resultado"] == {"quilometragem": 50.0}
+    assert [r["ok"] for r in resultados] == [True, True, True, True, False, False, True, False]
+    assert "999" in resultados[4]["erro"] and resultados[6]["resultado"]["quilometragem"] == 50.0
+    assert len(gravacoes) == 4  # blocos [1-3], [4] (checkpoint), [6-8] e [9]
+
+    controller._armazenamentos.clear()
+    assert controller.buscar_veiculo("BAT-0001").total_litros == 10
+    assert len(controller.carregar_viagens_dicts()) == 1
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_lote_desfaz_so_a_operacao_que_falha_depois_de_gravar(monkeypatch, tmp_path, backend):
+    import io
+    import json
+    import lote
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    controller.cadastrar_veiculo_controller("Carro", "PNT-0001", "Fiat", "Uno", "2020", "0")
+    controller.cadastrar_motorista_controller("Ana", "111", "X", "B")
+
+    def viajar_abastecer_e_falhar(placa):
+        lote._viagem("111", placa, "B", 20, "02/01/2025")
+        controller.registrar_abastecimento_controller(placa, "02/01/2025", "Gasolina", "40", "240")
+        raise Exception("falhou depois de gravar")
+    monkeypatch.setitem(lote.OPERACOES, "falha_parcial", viajar_abastecer_e_falhar)
+    operacoes = [
+        {"op": "viagem", "cpf": "111", "placa": "PNT-0001", "destino": "A", "distancia": 10, "data": "01/01/2025"},
+        {"op": "falha_parcial", "placa": "PNT-0001"},
+        {"op": "abastecimento", "placa": "PNT-0001", "data": "03/01/2025", "combustivel": "Gasolina",
+         "litros": 5, "valor": 30},
+    ]
+    saida = io.StringIO()
+    assert lote.executar(io.StringIO("\n".join(json.dumps(o) for o in operacoes)), saida) == {"operacoes": 3, "erros": 1}
+
+    controller._armazenamentos.clear()
+    veic = controller.buscar_veiculo("PNT-0001")
+    assert (veic.quilometragem, veic.total_litros) == (10.0, 5)
+    assert [v["destino"] for v in controller.ultimas_viagens(5)] == ["A"]
+
+    # Linhas só de leitura não copiam a frota para o ponto de salvamento.
+    import models
+    copias = []
+    monkeypatch.setattr(models.Veiculo, "to_dict", lambda self, *args: copias.append(self.placa))
+    leituras = [{"op": "relatorio_custos"}, {"op": "relatorio_eficiencia"}, {"op": "proximas_revisoes"}]
+    saida = io.StringIO()
+    assert lote.executar(io.StringIO("\n".join(json.dumps(o) for o in leituras)), saida)["erros"] == 0
+    assert copias == []
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_recalculo_de_custos_simula_e_aplica_novas_regras(monkeypatch, tmp_path, backend):
+    import json
+    import configuracoes
+    import models
+    monkeypatch.setattr(models, "_tabela_custos", models._tabela_custos)  # as regras voltam ao fim do teste
+    if backend == "sqlite": _usar_sqlite(monkeypatch, tmp_path)
+    for placa, tipo in [("RCL-0001", "Carro"), ("RCL-0002", "Caminhao")]:
+        controller.cadastrar_veiculo_controller(tipo, placa, "Marca", "Modelo", "2020", "0")
+        for data, tipo_manut in [("10/01/2025", "Corretiva"), ("10/06/2025", "Preventiva")]:
+            controller.registrar_manutencao_controller(placa, data, tipo_manut, "100", "")
+            controller.finalizar_manutencao_controller(placa)
+    assert controller.recalcular_custos_controller()["alteradas"] == 0
+
+    arquivo = tmp_path / "settings.json"
+    config = json.loads(arquivo.read_text()) if arquivo.exists() else {}
+    config["regras_custo"] = {"por_tipo_manutencao": {"corretiva": 1.5}, "por_tipo_veiculo": {"caminhao": 2.0},
+                              "periodos": [{"inicio": "01/06/2025", "multiplicador": 1.1}]}
+    arquivo.write_text(json.dumps(config))
+    monkeypatch.setattr(configuracoes, "ARQUIVO_CONFIG", str(arquivo))
+
+    simulacao = controller.recalcular_custos_controller()
+    assert (simulacao["aplicado"], simulacao["manutencoes"], simulacao["alteradas"]) == (False, 4, 4)
+    assert simulacao["custo_atual"] == pytest.approx(440.0)
+    assert simulacao["custo_recalculado"] == pytest.approx(150 + 110 + 300 + 220)
+    assert simulacao["por_tipo_manutencao"]["corretiva"]["diferenca"] == pytest.approx(30 + 180)
+    assert [v["placa"] for v in simulacao["veiculos"]] == ["RCL-0002", "RCL-0001"]
+    assert {d["placa"]: d["total_manutencao"] for d in controller.gerar_relatorio_custos()} == \
+           {"RCL-0001": 220.0, "RCL-0002": 220.0}
+
+    aplicado = controller.recalcular_custos_controller(aplicar=True)
+    assert aplicado["aplicado"] and aplicado["diferenca"] == pytest.approx(simulacao["diferenca"])
+    controller._armazenamentos.clear()
+    custos = {d["placa"]: d["total_manutencao"] for d in controller.gerar_relatorio_custos()}
+    assert custos == {"RCL-0001": pytest.approx(260.0), "RCL-0002": pytest.approx(520.0)}
+    assert controller.recalcular_custos_controller()["alteradas"] == 0
+    assert controller.verificar_agregados_controller() == []
@@ -1,7 +1,7 @@
 import pytest
 from models import (
     Carro, Moto, Motorista, StatusVeiculo, 
-    Manutencao, ManutencaoInvalidaError, AlocacaoInvalidaError, Viagem
+    Manutencao, ManutencaoInvalidaError, AlocacaoInvalidaError, Viagem, Abastecimento
 )
 
 def test_criar_veiculo():
@@ -72,4 +72,356 @@ def test_viagem_veiculo_manutencao():
     carro = Carro("CAR", "F", "F", 2020, status="Em Manutenção")
     
     with pytest.raises(AlocacaoInvalidaError):
-        Viagem(mot, carro, "Destino", 100)
\ No newline at end of file
+        Viagem(mot, carro, "Destino", 100)
+
+def test_agregados_incrementais():
+    carro = Carro("AGR-001", "Fiat", "Uno", 2020, 1000)
+    carro.adicionar_manutencao(Manutencao("01/01/2025", "Corretiva", 100.0, "Pneu"))
+    carro.finalizar_manutencao_status()
+    carro.abastecer(Abastecimento("02/01/2025", "Gasolina", 40, 200))
+    Viagem(Motorista("Ana", "111", "123", "B"), carro, "Destino", 400).realizar_viagem()
+
+    assert carro.total_manutencao == 120.0
+    assert carro.qtd_manutencoes == 1
+    assert carro.total_litros == 40.0
+    assert carro.total_combustivel == 200.0
+    assert carro.km_percorridos == 400.0
+    assert carro.km_l == 10.0
+    assert carro.divergencias_agregados() == []
+
+    carro.historico_abastecimentos.append(Abastecimento("03/01/2025", "Gasolina", 10, 50))
+    campos = {d["campo"] for d in carro.divergencias_agregados()}
+    assert campos == {"total_litros", "total_combustivel", "qtd_abastecimentos"}
+
+def test_historico_colunar_mantem_iteracao_e_to_dict(monkeypatch):
+    from models import HistoricoManutencoes, HistoricoAbastecimentos, Veiculo
+    monkeypatch.setattr(Veiculo, "historico_colunar", True)
+
+    carro = Carro("COL-001", "Fiat", "Uno", 2020, 0)
+    assert isinstance(carro.historico_manutencoes, HistoricoManutencoes)
+    carro.adicionar_manutencao(Manutencao("01/01/2025", "Corretiva", 100.0, "Pneu"))
+    carro.abastecer(Abastecimento("02/01/2025", "Diesel", 40, 200))
+
+    assert sum(m.custo_final for m in carro) == 120.0
+    assert carro.historico_abastecimentos[-1].litros == 40.0
+    assert isinstance(carro.historico_abastecimentos, HistoricoAbastecimentos)
+
+    copia = Veiculo.from_dict(carro.to_dict())
+    assert copia.to_dict() == carro.to_dict()
+    assert [m.to_dict() for m in copia] == [m.to_dict() for m in carro]
+    assert copia.divergencias_agregados() == []
+
+def test_estrategias_compartilhadas():
+    m1 = Manutencao("01/01/2025", "Corretiva", 100.0, "A")
+    m2 = Manutencao("02/01/2025", "corretiva", 50.0, "B")
+    assert m1.estrategia is m2.estrategia
+    assert not hasattr(m1, "__dict__")
+
+def test_regras_de_custo_compiladas_por_tipo_veiculo_e_periodo(monkeypatch):
+    import models
+    from models import Caminhao, configurar_regras_custo
+    monkeypatch.setattr(models, "_tabela_custos", models.TabelaCustos())
+    configurar_regras_custo({
+        "por_tipo_manutencao": {"Corretiva": 1.5},
+        "por_tipo_veiculo": {"Caminhão": 2.0},
+        "periodos": [{"inicio": "01/03/2025", "fim": "31/03/2025", "multiplicador": 1.1},
+                     {"inicio": "15/03/2025", "multiplicador": 0.5, "tipo_manutencao": "preventiva"}],
+    })
+    assert Manutencao("01/01/2025", "corretiva", 100, "", "Carro").custo_final == 150.0
+    assert Manutencao("01/01/2025", "corretiva", 100, "", "Caminhao").custo_final == 300.0
+    assert Manutencao("10/03/2025", "Preventiva", 100, "", "Carro").custo_final == pytest.approx(110.0)
+    assert Manutencao("20/03/2025", "Preventiva", 100, "", "Carro").custo_final == pytest.approx(55.0)
+    assert Manutencao("01/05/2025", "Preventiva", 100, "", "Carro").custo_final == 50.0
+    a, b = Manutencao("02/03/2025", "x", 1, ""), Manutencao("03/03/2025", "y", 2, "")
+    assert a.estrategia is b.estrategia  # mesmo fator: estratégia compartilhada
+
+    caminhao = Caminhao("CST-0001", "Volvo", "FH", 2020, 0)
+    caminhao.adicionar_manutencao(Manutencao("01/01/2025", "Corretiva", 100, "", caminhao.tipo))
+    caminhao.finalizar_manutencao_status()
+    configurar_regras_custo({})  # volta ao padrão: corretiva x 1.2
+    historico, custos = caminhao.custos_manutencao_recalculados()
+    assert list(custos) == [120.0] and caminhao.total_manutencao == 300.0
+    caminhao.aplicar_custos_manutencao(historico, custos)
+    assert caminhao.historico_manutencoes[0].custo_final == 120.0 and caminhao.total_manutencao == 120.0
+    with pytest.raises(ValueError):
+        configurar_regras_custo({"periodos": [{"inicio": "2025-01-01", "multiplicador": 2}]})
+
+@pytest.mark.parametrize("colunar", [False, True])
+def test_historico_ordenado_e_consultas_por_periodo(monkeypatch, colunar):
+    from models import Veiculo, intervalo_mes
+    monkeypatch.setattr(Veiculo, "historico_colunar", colunar)
+
+    carro = Carro("PER-001", "Fiat", "Uno", 2020, 0)
+    for data, custo in [("10/02/2025", 100), ("05/01/2025", 50), ("28/02/2025", 30)]:
+        carro.adicionar_manutencao(Manutencao(data, "preventiva", custo, ""))
+        carro.finalizar_manutencao_status()
+    carro.abastecer(Abastecimento("15/02/2025", "Gasolina", 40, 240))
+    carro.abastecer(Abastecimento("31/01/2025", "Gasolina", 10, 60))
+    carro.registrar_percurso(400, "20/02/2025")
+    carro.registrar_percurso(100, "01/03/2025")
+
+    assert [m.data for m in carro] == ["05/01/2025", "10/02/2025", "28/02/2025"]
+    fevereiro = intervalo_mes(2025, 2)
+    assert carro.custo_manutencao_entre(*fevereiro) == 130.0
+    assert carro.qtd_manutencoes_entre("01/01/2025", "10/02/2025") == 2
+    assert carro.litros_entre(*fevereiro) == 40.0
+    assert carro.km_entre(*fevereiro) == 400.0
+    assert carro.km_l_entre(*fevereiro) == 10.0
+    assert carro.quilometragem == 500.0
+
+    copia = Veiculo.from_dict(carro.to_dict())
+    assert copia.km_entre(*fevereiro) == 400.0
+    assert copia.gasto_combustivel_entre("01/01/2025", "31/01/2025") == 60.0
+
+def test_capacidade_cnh_equivale_regra_de_substrings():
+    from itertools import combinations
+    from models import capacidade_cnh, Caminhao
+
+    def regra_antiga(req, cnh):
+        return (req in cnh or (req == "B" and any(c in cnh for c in "CDE"))
+                or (req == "C" and any(c in cnh for c in "DE")))
+
+    categorias = ["".join(c) for n in (1, 2) for c in combinations("ABCDE", n)]
+    for categoria in categorias:
+        mot = Motorista("X", "1", "1", categoria.lower())
+        assert mot.capacidade_cnh == capacidade_cnh(categoria)
+        for req in "ABC":
+            assert mot.habilitado_para(req) == regra_antiga(req, categoria)
+
+    mot = Motorista("X", "1", "1", "B")
+    with pytest.raises(AlocacaoInvalidaError):
+        Viagem(mot, Caminhao("CAM-0001", "Volvo", "FH", 2020), "Y", 10)
+    mot.categoria_cnh = "d"
+    Viagem(mot, Caminhao("CAM-0001", "Volvo", "FH", 2020), "Y", 10)
+
+def test_alocacao_equilibra_km_e_respeita_cnh():
+    from alocacao import alocar_viagens, desequilibrio_km
+    from models import Caminhao
+    veiculos = [Carro("CAR-0001", "F", "U", 2020, 1000), Carro("CAR-0002", "F", "U", 2020, 0),
+                Moto("MOT-0001", "H", "CG", 2020, 0), Caminhao("CAM-0001", "V", "FH", 2020, 0),
+                Carro("CAR-0003", "F", "U", 2020, 0)]
+    veiculos[4].adicionar_manutencao(Manutencao("01/01/2025", "corretiva", 100, ""))
+    motoristas = [Motorista("Ana", "1", "1", "B"), Motorista("Beto", "2", "2", "A"), Motorista("Caio", "3", "3", "B")]
+
+    alocacoes = alocar_viagens([("X", 600, "Carro"), ("Y", 300, "Carro"), ("Z", 400, "Carro"),
+                                ("W", 50, "Moto"), ("K", 10, "Caminhão"), ("Q", "abc")], veiculos, motoristas)
+
+    # 600 -> CAR-0002 (0 km); 400 -> CAR-0002 (600 < 1000); 300 -> CAR-0001 (empate em 1000, ordem de cadastro).
+    assert [a["placa"] for a in alocacoes[:4]] == ["CAR-0002", "CAR-0001", "CAR-0002", "MOT-0001"]
+    assert [a["cpf"] for a in alocacoes[:4]] == ["1", "3", "3", "2"]
+    assert "Caminhão" in alocacoes[4]["erro"] and alocacoes[5]["erro"]
+    assert desequilibrio_km(veiculos, alocacoes)["Carro"] == 300  # CAR-0003, na oficina, fica de fora
+
+def test_agenda_manutencao_heap_incremental():
+    from agenda_manutencao import AgendaManutencao
+    veiculos = [Carro(f"AGE-{i:04d}", "F", "U", 2020, i * 10) for i in range(200)]
+    agenda = AgendaManutencao(veiculos, intervalo_km=1000)
+    for rodada in range(5):  # muitas entradas substituídas: força a compactação
+        for i, v in enumerate(veiculos):
+            v.quilometragem += (i * 37 + rodada * 11) % 300
+            agenda.atualizar(v)
+    assert len(agenda._heap) <= 2 * len(veiculos) + 32
+
+    esperado = sorted(veiculos, key=lambda v: (v.km_ate_revisao(1000), veiculos.index(v)))
+    assert [d["placa"] for d in agenda.proximas(15)] == [v.placa for v in esperado[:15]]
+    assert [d["placa"] for d in agenda.vencidas()] == [v.placa for v in esperado if v.km_ate_revisao(1000) <= 0]
+
+    v = esperado[0]
+    v.adicionar_manutencao(Manutencao("01/01/2025", "Preventiva", 100, ""))
+    agenda.atualizar(v)
+    assert agenda.proximas(1)[0]["placa"] == esperado[1].placa
+    agenda.remover(esperado[1].placa)
+    assert agenda.proximas(1)[0]["placa"] == esperado[2].placa and len(agenda) == 199
+
+@pytest.mark.parametrize("colunar", [False, True])
+def test_snapshot_binario_ida_e_volta(monkeypatch, colunar):
+    import snapshot
+    from models import Veiculo, Caminhao, intervalo_mes
+    carro = Carro("SNP-0001", "Fiat", "Uno", 2020, 1000)
+    carro.adicionar_manutencao(Manutencao("10/02/2025", "preventiva", 100, "Revisão"))
+    carro.finalizar_manutencao_status()
+    carro.abastecer(Abastecimento("15/02/2025", "Gasolina", 40, 240))
+    carro.registrar_percurso(400, "20/02/2025")
+    caminhao = Caminhao("SNP-0002", "Volvo", "FH", 2021, 0)
+    caminhao.adicionar_manutencao(Manutencao("01/03/2025", "Corretiva", 500, "Freios; ç"))
+    veiculos = [carro, caminhao, Moto("SNP-0003", "Honda", "CG", 2022)]
+
+    monkeypatch.setattr(Veiculo, "historico_colunar", colunar)
+    copias = snapshot.decodificar(snapshot.codificar_veiculos(veiculos))
+    assert [v.to_dict() for v in copias] == [v.to_dict() for v in veiculos]
+    assert copias[0].km_entre(*intervalo_mes(2025, 2)) == 400.0 and copias[0].km_ultima_revisao == 1000
+    assert copias[1].status == StatusVeiculo.MANUTENCAO and copias[1].historico_manutencoes[0].custo_final == 600.0
+
+    motoristas = [Motorista("Zé", "1", "C1", "ab"), Motorista("Ana", "2", "C2", "E")]
+    assert [m.to_dict() for m in snapshot.decodificar(snapshot.codificar_motoristas(motoristas))] == \
+        [m.to_dict() for m in motoristas]
+
+    conteudo = bytearray(snapshot.codificar_motoristas(motoristas))
+    conteudo[-1] ^= 0xFF
+    with pytest.raises(snapshot.SnapshotInvalidoError, match="corrompida"):
+        snapshot.decodificar(bytes(conteudo))
+    conteudo[8] = snapshot.VERSAO + 1
+    with pytest.raises(snapshot.SnapshotInvalidoError, match="versão"):
+        snapshot.decodificar(bytes(conteudo))
+
+def test_indice_listagem_incremental_filtros_e_paginas():
+    from listagem import IndiceListagem
+    from models import Caminhao
+    classes = (Carro, Moto, Caminhao)
+    veiculos = [classes[i % 3](f"LIS-{(i * 7) % 50:04d}", "M", "X", 2000 + i % 9, (i * 37) % 500) for i in range(50)]
+    indice = IndiceListagem(veiculos)
+    indice.pagina(ordem_por="km")  # cria o índice por km antes das alterações
+    veiculos[3].quilometragem += 1000
+    veiculos[4].adicionar_manutencao(Manutencao("01/01/2025", "corretiva", 10, ""))
+    for v in veiculos[3:5]: indice.atualizar(v)
+    indice.remover(veiculos[10].placa)
+    restantes = [v for k, v in enumerate(veiculos) if k != 10]
+
+    esperado = sorted(restantes, key=lambda v: (v.quilometragem, veiculos.index(v)), reverse=True)
+    pagina = indice.pagina(ordem_por="km", decrescente=True, pagina=2, por_pagina=20)
+    assert pagina["total"] == 49 and pagina["paginas"] == 3
+    assert [l["placa"] for l in pagina["linhas"]] == [v.placa for v in esperado[20:40]]
+    assert set(pagina["linhas"][0]) == {"placa", "tipo", "marca", "modelo", "ano", "quilometragem", "status"}
+
+    motos = sorted((v for v in restantes if v.tipo == "Moto"), key=lambda v: (v.ano, veiculos.index(v)))
+    pagina = indice.pagina(tipo="Moto", ordem_por="ano", pagina=9, por_pagina=5)  # além do fim: última página
+    assert pagina["pagina"] == 4 and [l["placa"] for l in pagina["linhas"]] == [v.placa for v in motos[15:]]
+    assert indice.pagina(status="Em Manutenção")["linhas"][0]["placa"] == veiculos[4].placa
+
+def test_indice_viagens_persistido_e_atualizado_pela_cauda(tmp_path, monkeypatch):
+    import os
+    import indice_viagens
+    from diario import DiarioViagens
+    from indice_viagens import IndiceViagens
+    from models import ordinal_da_data
+    monkeypatch.setattr(indice_viagens, "GRAVAR_A_CADA", 2)
+    arquivo = str(tmp_path / "viagens.jsonl")
+    viagem = lambda cpf, placa, km, data: {"cpf_motorista": cpf, "placa_veiculo": placa, "distancia": km, "data": data}
+    diario = DiarioViagens(arquivo)
+    indice = IndiceViagens(diario)
+    diario.anexar_varias([viagem("111", "abc1 ", 10, "01/01/2025"), viagem("222", "ABC1", 20, "02/01/2025")])
+    assert indice.totais("placa_veiculo", "Abc1") == {"viagens": 2, "distancia": 30.0}
+    diario.anexar_varias([viagem("111", "XYZ9", 5, "03/01/2025"), viagem("111", "ABC1", 1, "03/01/2025")])
+    assert os.path.exists(indice.arquivo)
+
+    # Anexada por "outro processo" depois da última gravação: reaberto, só a cauda é lida do diário.
+    DiarioViagens(arquivo).anexar(viagem("222", "XYZ9", 7, "05/01/2025"))
+    lidas = []
+    reaberto = IndiceViagens(diario)
+    monkeypatch.setattr(diario, "ler", lambda inicio=0, quantidade=None: lidas.append(inicio) or
+                        DiarioViagens.ler(diario, inicio, quantidade))
+    assert [v["distancia"] for v in reaberto.viagens("cpf_motorista", "111")] == [10, 5, 1]
+    assert lidas == [4]
+    inicio, fim = ordinal_da_data("02/01/2025"), ordinal_da_data("05/01/2025")
+    assert reaberto.totais("cpf_motorista", "222", inicio, fim) == {"viagens": 2, "distancia": 27.0}
+    uso = {d["cpf"]: d for d in reaberto.utilizacao_motoristas(inicio, fim)}
+    assert uso["111"]["dias_ativos"] == 1 and uso["111"]["ultima_viagem"] == "03/01/2025"
+
+    diario.reescrever([viagem("333", "ABC1", 3, "01/02/2025")])
+    assert not os.path.exists(indice.arquivo) and reaberto.viagens("cpf_motorista", "111") == []
+    assert reaberto.totais("cpf_motorista", "333")["viagens"] == 1
+    # Anexada fora de ordem de data: o período continua certo e a resposta, em ordem de anexação.
+    diario.anexar_varias([viagem("333", "ABC1", 4, "15/01/2025"), viagem("333", "ABC1", 6, "20/02/2025")])
+    janeiro = ordinal_da_data("01/01/2025"), ordinal_da_data("31/01/2025")
+    assert reaberto.totais("cpf_motorista", "333", *janeiro) == {"viagens": 1, "distancia": 4.0}
+    assert [v["distancia"] for v in reaberto.viagens("cpf_motorista", "333", janeiro[0])] == [3, 4, 6]
+    assert [v["distancia"] for v in reaberto.viagens("cpf_motorista", "333", ordinal_da_data("01/02/2025"))] == [3, 6]
+
+@pytest.mark.parametrize("colunar", [False, True])
+def test_ponto_de_salvamento_desfaz_historicos_sem_copiar_o_veiculo(tmp_path, monkeypatch, colunar):
+    from armazenamento import ArmazenamentoJSON
+    monkeypatch.setattr(Carro, "historico_colunar", colunar)
+    arm = ArmazenamentoJSON(*(str(tmp_path / nome) for nome in ("veiculos.json", "motoristas.json", "viagens.json")))
+    carro = Carro("PNT-0001", "Fiat", "Uno", 2020, 0)
+    for data in ("01/01/2025", "03/01/2025"):
+        carro.abastecer(Abastecimento(data, "Gasolina", 10, 60))
+    carro.registrar_percurso(10, "01/01/2025")
+    arm.adicionar_veiculo(carro)
+    antes = carro.to_dict()
+
+    copias = []
+    monkeypatch.setattr(Carro, "to_dict", lambda self, *args, to_dict=Carro.to_dict: copias.append(1) or to_dict(self, *args))
+    with arm.transacao():
+        assert arm.listar_veiculos() and arm.buscar_veiculo("PNT-0001") is carro  # só leitura: nada registrado
+        with pytest.raises(RuntimeError):
+            with arm.ponto_de_salvamento():
+                carro.abastecer(Abastecimento("02/01/2025", "Gasolina", 40, 300))  # no meio do histórico
+                carro.registrar_percurso(5, "01/01/2025")
+                carro.registrar_percurso(7, "02/01/2025")
+                carro.adicionar_manutencao(Manutencao("02/01/2025", "Corretiva", 100, ""))
+                arm.registrar_manutencao(carro, None)
+                assert copias == []  # nenhuma cópia do veículo (to_dict) para poder desfazer
+                raise RuntimeError("desfeito")
+    monkeypatch.undo()
+    assert carro.to_dict() == antes and carro.km_entre("01/01/2025", "31/01/2025") == 10
+
+def test_cache_lru_le_do_disco_e_detecta_conflito_entre_processos(tmp_path, monkeypatch):
+    import cache_veiculos
+    from contextlib import nullcontext
+    from repositorio import ConflitoVersaoError
+    from cache_veiculos import RepositorioCache
+    monkeypatch.setattr(cache_veiculos, "GRAVAR_INDICE_A_CADA", 2)
+    arquivo = str(tmp_path / "veiculos.jsonl")
+    cache = RepositorioCache(arquivo, nullcontext(), max_entradas=2)
+    cache.substituir([Carro(f"CCH-{i}", "Fiat", "Uno", 2020, 100 * i) for i in range(5)])
+    cache.gravar()
+    assert [cache.buscar(f"CCH-{i}").quilometragem for i in (0, 1, 0, 2)] == [0, 100, 0, 200]
+    assert (cache.acertos, cache.faltas, cache.despejos) == (1, 3, 1)
+    assert list(cache._entradas) == ["CCH-0", "CCH-2"]  # CCH-1, o menos recente, saiu
+
+    # "Outro processo" (índice reaberto do .idx + cauda) altera um veículo em cache: a cópia é descartada.
+    outro = RepositorioCache(arquivo, nullcontext())
+    v = outro.buscar("CCH-0")
+    v.quilometragem = 999
+    outro.marcar_alterado(v)
+    outro.gravar()
+    assert cache.buscar("CCH-0").quilometragem == 999
+
+    # Alterado aqui (ainda não gravado) e lá: a gravação recusa em vez de perder uma das versões.
+    meu = cache.buscar("CCH-0")
+    meu.quilometragem = 1005
+    cache.marcar_alterado(meu)
+    v.quilometragem = 1000
+    outro.marcar_alterado(v)
+    outro.gravar()
+    with pytest.raises(ConflitoVersaoError):
+        cache.gravar()
+    cache.invalidar()
+    assert cache.buscar("CCH-0").quilometragem == 1000 and len(cache.listar()) == 5
+
+def test_detector_anomalias_welford_e_regras():
+    import statistics
+    from anomalias import Welford, DetectorAnomalias
+    amostras = [40.0, 42.5, 39.0, 41.0, 38.5, 40.2]
+    w = Welford()
+    for x in amostras: w.atualizar(x)
+    assert w.media == pytest.approx(statistics.mean(amostras)) and w.desvio == pytest.approx(statistics.stdev(amostras))
+
+    carro = Carro("ANO-0001", "Fiat", "Uno", 2020, 0)
+    detector = DetectorAnomalias(minimo_amostras=3)
+    alertas = []
+    for dia in range(1, 6):
+        carro.registrar_percurso(400, f"{dia:02d}/03/2025")
+        abast = Abastecimento(f"{dia:02d}/03/2025", "Gasolina", 40 + dia % 2, (40 + dia % 2) * 6)
+        alertas += detector.avaliar(carro, abast)
+        carro.abastecer(abast)
+    assert alertas == []
+    carro.registrar_percurso(100, "06/03/2025")
+    alertas = detector.avaliar(carro, Abastecimento("06/03/2025", "Gasolina", 41, 41 * 9))
+    assert sorted(a["regra"] for a in alertas) == ["preco_litro", "queda_km_l"]
+    assert detector.avaliar(carro, Abastecimento("07/03/2025", "Gasolina", 200, 1200))[0]["regra"] == "litros"
+
+
+def test_particionado_nao_descarrega_o_grupo_dentro_de_uma_transacao(tmp_path):
+    from armazenamento import ArmazenamentoParticionado
+    arquivos = [str(tmp_path / nome) for nome in ("veiculos.json", "motoristas.json", "viagens.json")]
+    ArmazenamentoParticionado(*arquivos, particoes=2, processos=1).adicionar_veiculo(Carro("PRT-0001", "Fiat", "Uno", 2020, 0))
+    arm = ArmazenamentoParticionado(*arquivos, particoes=2, processos=1, durabilidade="grupo", intervalo_ms=60000)
+    arm.adicionar_motorista(Motorista("Ana", "111", "CNH111", "B"))  # grupo pendente
+    with pytest.raises(RuntimeError):
+        with arm.transacao():
+            arm.adicionar_motorista(Motorista("Bia", "222", "CNH222", "B"))
+            assert [linha["placa"] for linha in arm.relatorio_custos()] == ["PRT-0001"]
+            raise RuntimeError("desfeito")
+    arm.descarregar()
+    assert [m.nome for m in ArmazenamentoParticionado(*arquivos, particoes=2, processos=1).listar_motoristas()] == ["Ana"]
@@ -0,0 +1,91 @@
+import os
+import threading
+
+import instrumentacao
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, apenas entre threads.
+    fcntl = None
+
+
+class TravaArquivo:
+    """
+    Trava consultiva (flock) sobre um arquivo .lock, reentrante no mesmo processo.
+    Use `obter_trava` para que cada caminho tenha uma única instância por processo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.RLock()
+        self._contador = 0
+        self._arquivo = None
+
+    def __enter__(self):
+        self._local.acquire()
+        if self._contador == 0:
+            pasta = os.path.dirname(self.caminho)
+            if pasta and not os.path.exists(pasta):
+                os.makedirs(pasta)
+            self._arquivo = open(self.caminho, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_EX)
+        self._contador += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._contador -= 1
+        if self._contador == 0:
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+        self._local.release()
+        return False
+
+
+_travas = {}
+_travas_lock = threading.Lock()
+
+
+def obter_trava(caminho) -> TravaArquivo:
+    caminho = os.path.abspath(caminho)
+    with _travas_lock:
+        if caminho not in _travas:
+            _travas[caminho] = TravaArquivo(caminho)
+        return _travas[caminho]
+
+
+def gravar_atomico(caminho, conteudo: bytes, sincronizar=True):
+    """Grava em um temporário no mesmo diretório e troca com os.replace: leitores nunca veem o arquivo pela metade."""
+    pasta = os.path.dirname(caminho) or "."
+    temporario = os.path.join(pasta, f".{os.path.basename(caminho)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temporario, "wb") as f:
+            f.write(conteudo)
+            if sincronizar:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+    if sincronizar: _sincronizar_pasta(pasta)
+    instrumentacao.contar_escrita(len(conteudo))
+
+
+def _sincronizar_pasta(pasta):
+    """fsync do diretório: torna a troca de nomes do os.replace durável (sem efeito onde não há suporte, ex.: Windows)."""
+    try:
+        fd = os.open(pasta, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
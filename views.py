@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+import sys
+from typing import List, Dict, Any, Optional
 
 def exibir_cabecalho():
     print("\n" + "="*40)
@@ -12,8 +13,8 @@ def exibir_detalhes_veiculo(v):
     print(f"Ano: {v.ano}")
     print(f"KM Atual: {v.quilometragem}")
     print(f"Status: {v.status.value}")
-    print(f"Histórico Manutenções: {len(v.historico_manutencoes)} registros")
-    print(f"Histórico Abastecimentos: {len(v.historico_abastecimentos)} registros")
+    print(f"Histórico Manutenções: {v.qtd_manutencoes} registros")
+    print(f"Histórico Abastecimentos: {v.qtd_abastecimentos} registros")
 
 def exibir_detalhes_motorista(m):
     print(f"\n--- Detalhes do Motorista ---")
@@ -21,20 +22,24 @@ def exibir_detalhes_motorista(m):
     print(f"CPF: {m.cpf}")
     print(f"CNH: {m.cnh} (Categoria: {m.categoria_cnh})")
 
-def exibir_relatorio_frota(dados_veiculos: List[Dict[str, Any]]):
-    print("\n--- Relatório Geral da Frota ---")
-    if not dados_veiculos:
-        print("Nenhum veículo cadastrado.")
-        return
-
-    print(f"{'PLACA':<10} | {'MODELO':<15} | {'STATUS':<15} | {'KM':<10}")
-    print("-" * 60)
+def _tabela_frota(dados_veiculos) -> list:
+    linhas = [f"{'PLACA':<10} | {'MODELO':<15} | {'STATUS':<15} | {'KM':<10}", "-" * 60]
     for item in dados_veiculos:
         placa = item.get('placa', '---')
         modelo = item.get('modelo', '---')
         status = item.get('status', '---')
         km = item.get('quilometragem', 0)
-        print(f"{placa:<10} | {modelo:<15} | {status:<15} | {km:<10}")
+        linhas.append(f"{placa:<10} | {modelo:<15} | {status:<15} | {km:<10}")
+    return linhas
+
+def exibir_pagina_frota(pagina: Dict[str, Any]):
+    """Monta a página inteira e a escreve de uma vez (uma chamada ao terminal por página)."""
+    if not pagina["total"]:
+        print("\nNenhum veículo encontrado.")
+        return
+    linhas = ["", f"--- Frota: página {pagina['pagina']}/{pagina['paginas']} ({pagina['total']} veículos) ---"]
+    linhas += _tabela_frota(pagina["linhas"])
+    sys.stdout.write("\n".join(linhas) + "\n")
 
 def exibir_relatorio_custos(dados: List[Dict]):
     print("\n--- Relatório de Custos de Manutenção ---")
@@ -56,4 +61,186 @@ def exibir_ranking_eficiencia(dados: List[Dict]):
     print(f"{'POS':<3} | {'PLACA':<10} | {'MODELO':<15} | {'KM/L':<10}")
     print("-" * 50)
     for i, d in enumerate(dados, 1):
-        print(f"{i:<3} | {d['placa']:<10} | {d['modelo']:<15} | {d['km_l']:.2f} km/l")
\ No newline at end of file
+        print(f"{i:<3} | {d['placa']:<10} | {d['modelo']:<15} | {d['km_l']:.2f} km/l")
+
+def exibir_viagens(dados: List[Dict]):
+    print("\n--- Viagens Registradas ---")
+    if not dados:
+        print("Nenhuma viagem registrada.")
+        return
+
+    print(f"{'DATA':<10} | {'PLACA':<10} | {'MOTORISTA':<15} | {'DESTINO':<15} | {'KM'}")
+    print("-" * 73)
+    for d in dados:
+        data = d.get('data') or '---'
+        print(f"{data:<10} | {d['placa_veiculo']:<10} | {d['nome_motorista']:<15} | {d['destino']:<15} | {d['distancia']:.1f}")
+
+def exibir_viagens_entidade(titulo: str, dados: Dict[str, Any]):
+    print(f"\n--- Viagens: {titulo} ---")
+    print(f"Viagens: {dados['total_viagens']} | Km rodados: {dados['distancia']:.1f}")
+    if dados['viagens']:
+        exibir_viagens(dados['viagens'])
+
+def exibir_utilizacao_motoristas(dados: List[Dict]):
+    print("\n--- Utilização dos Motoristas ---")
+    if not dados:
+        print("Nenhum motorista cadastrado.")
+        return
+
+    print(f"{'NOME':<20} | {'CPF':<15} | {'VIAGENS':>7} | {'KM':>10} | {'DIAS':>5} | {'% KM':>6} | {'ÚLTIMA':<10}")
+    print("-" * 90)
+    for d in dados:
+        ultima = d['ultima_viagem'] or '---'
+        print(f"{d['nome']:<20} | {d['cpf']:<15} | {d['viagens']:>7} | {d['distancia']:>10.1f} | "
+              f"{d['dias_ativos']:>5} | {d['participacao_km'] * 100:>5.1f}% | {ultima:<10}")
+
+def exibir_divergencias_agregados(dados: List[Dict]):
+    print("\n--- Verificação de Agregados ---")
+    if not dados:
+        print("Nenhuma divergência: agregados consistentes com o histórico.")
+        return
+
+    print(f"{'PLACA':<10} | {'CAMPO':<18} | {'ARMAZENADO':>12} | {'RECALCULADO':>12}")
+    print("-" * 62)
+    for d in dados:
+        print(f"{d['placa']:<10} | {d['campo']:<18} | {d['armazenado']:>12.2f} | {d['recalculado']:>12.2f}")
+
+def exibir_resultado_importacao(resultado: Dict[str, Any]):
+    print(f"\n--- Importação de {resultado['tipo']} ---")
+    print(f"Registros importados: {resultado['importados']}")
+    print(f"Linhas com erro: {len(resultado['erros'])}")
+    if resultado.get('alertas'):
+        print(f"Alertas de anomalia nos abastecimentos: {len(resultado['alertas'])} (ver opção 25)")
+    for erro in resultado['erros'][:50]:
+        print(f"  Linha {erro['linha']:<6} | {erro['erro']}")
+    if len(resultado['erros']) > 50:
+        print(f"  ... e mais {len(resultado['erros']) - 50} erro(s).")
+
+def exibir_alertas_abastecimento(dados: Dict[str, Any]):
+    print("\n--- Alertas de Abastecimento (Anomalias) ---")
+    print(f"Alertas gravados: {dados['total']}")
+    if not dados['alertas']:
+        return
+
+    print(f"{'DATA':<10} | {'PLACA':<10} | {'COMBUSTÍVEL':<11} | {'LITROS':>7} | {'VALOR':>9} | "
+          f"{'OBSERVADO':>9} | {'ESPERADO':>9} | MOTIVO")
+    print("-" * 120)
+    for a in dados['alertas']:
+        print(f"{a['data']:<10} | {a['placa']:<10} | {a['combustivel']:<11} | {a['litros']:>7.1f} | "
+              f"{a['valor']:>9.2f} | {a['observado']:>9.2f} | {a['esperado']:>9.2f} | {a['motivo']}")
+
+def exibir_painel_analitico(resumo: Dict[str, Any]):
+    print("\n--- Painel Analítico da Frota ---")
+    print(f"Veículos: {resumo['veiculos']} | Manutenções: {resumo['manutencoes']} | Abastecimentos: {resumo['abastecimentos']}")
+    print(f"Preço médio do litro: R$ {resumo['preco_medio_litro']:.2f}")
+    print(f"Custo por km (manutenção + combustível): R$ {resumo['custo_por_km']:.2f}")
+
+    print(f"\n{'TIPO':<10} | {'MANUTENÇÃO':>14} | {'COMBUSTÍVEL':>14}")
+    print("-" * 44)
+    for tipo, custos in resumo['custo_por_tipo'].items():
+        print(f"{tipo:<10} | R$ {custos['manutencao']:>11.2f} | R$ {custos['combustivel']:>11.2f}")
+
+    print("\nDistribuição de Km/l:")
+    for p, valor in resumo['percentis_km_l'].items():
+        print(f"  P{p:<3} {valor:.2f} km/l")
+
+def exibir_totais_periodo(inicio: str, fim: str, totais: Dict[str, Any]):
+    print(f"\n--- Totais da Frota: {inicio} a {fim} ---")
+    print(f"Manutenções: {totais['qtd_manutencoes']} | Custo: R$ {totais['total_manutencao']:.2f}")
+    print(f"Combustível: {totais['litros']:.1f} L | Gasto: R$ {totais['total_combustivel']:.2f}")
+    print(f"Km rodados em viagens: {totais['km']:.1f}")
+
+def exibir_resumo_instrumentacao(dados: Dict[str, Any]):
+    print("\n--- Instrumentação das Operações ---")
+    if not dados['ativa']:
+        print("Instrumentação desligada (FROTA_INSTRUMENTACAO=1 ou \"instrumentacao.ativa\" no settings.json).")
+    if not dados['funcoes']:
+        print("Nenhuma chamada medida.")
+        return
+
+    print(f"{'FUNÇÃO':<36} | {'QTD':>5} | {'MÉDIA ms':>9} | {'P95 ms':>9} | {'MÁX ms':>9} | "
+          f"{'LIDO KB':>9} | {'GRAVADO KB':>10} | {'OBJETOS':>8} | {'JSON ms':>8}")
+    print("-" * 131)
+    for f in dados['funcoes']:
+        print(f"{f['funcao']:<36} | {f['chamadas']:>5} | {f['media_ms']:>9.2f} | {f['p95_ms']:>9.2f} | "
+              f"{f['max_ms']:>9.2f} | {f['bytes_lidos'] / 1024:>9.1f} | {f['bytes_escritos'] / 1024:>10.1f} | "
+              f"{f['objetos']:>8} | {f['json_ms']:>8.2f}")
+        for perfil in f['perfis'][-3:]:
+            print(f"    perfil: {perfil}")
+
+def exibir_impacto_custos(dados: Dict[str, Any]):
+    print(f"\n--- Recálculo de Custos de Manutenção ({'aplicado' if dados['aplicado'] else 'simulação'}) ---")
+    print(f"Manutenções: {dados['manutencoes']} | Com custo alterado: {dados['alteradas']}")
+    print(f"Custo atual: R$ {dados['custo_atual']:.2f} | Recalculado: R$ {dados['custo_recalculado']:.2f} | "
+          f"Diferença: R$ {dados['diferenca']:+.2f}")
+    if not dados['alteradas']:
+        return
+
+    print(f"\n{'TIPO':<15} | {'ALTERADAS':>9} | {'DIFERENÇA':>14}")
+    print("-" * 44)
+    for tipo, linha in dados['por_tipo_manutencao'].items():
+        print(f"{tipo:<15} | {linha['alteradas']:>9} | R$ {linha['diferenca']:>+11.2f}")
+
+    print(f"\n{'PLACA':<10} | {'ALTERADAS':>9} | {'ATUAL':>12} | {'RECALCULADO':>12} | {'DIFERENÇA':>12}")
+    print("-" * 67)
+    for v in dados['veiculos']:
+        print(f"{v['placa']:<10} | {v['alteradas']:>9} | {v['custo_atual']:>12.2f} | {v['custo_recalculado']:>12.2f} | "
+              f"{v['diferenca']:>+12.2f}")
+
+def exibir_estatisticas_cache(dados: Optional[Dict[str, Any]]):
+    print("\n--- Cache de Veículos ---")
+    if dados is None:
+        print("Cache desligado: a frota inteira fica em memória (\"armazenamento.cache_max_entradas\" no settings.json).")
+        return
+
+    limite_mb = f"{dados['max_bytes'] / 2**20:.1f} MB" if dados['max_bytes'] else "sem limite"
+    print(f"Em memória: {dados['entradas']} de {dados['veiculos_no_disco']} veículo(s), {dados['bytes'] / 1024:.1f} KB "
+          f"(limite: {dados['max_entradas'] or 'sem limite'} entradas, {limite_mb})")
+    print(f"Acertos: {dados['acertos']} | Faltas: {dados['faltas']} | Taxa de acerto: {dados['taxa_acerto'] * 100:.1f}%")
+    print(f"Despejos: {dados['despejos']} ({dados['gravados_no_despejo']} gravado(s) ao sair do cache)")
+
+def exibir_resultado_viagens_lote(resultados: List[Dict[str, Any]]):
+    print("\n--- Despacho de Viagens em Lote ---")
+    if not resultados:
+        print("Nenhuma viagem informada.")
+        return
+
+    sucessos = sum(1 for r in resultados if r['sucesso'])
+    print(f"Viagens registradas: {sucessos} | Com erro: {len(resultados) - sucessos}")
+    for r in resultados:
+        if r['sucesso']:
+            print(f"  #{r['indice'] + 1:<4} {r['placa']:<10} OK (KM atual: {r['quilometragem']:.1f})")
+        else:
+            print(f"  #{r['indice'] + 1:<4} {str(r['placa']):<10} ERRO: {r['erro']}")
+
+def exibir_alocacao_viagens(plano: Dict[str, Any]):
+    print("\n--- Alocação Automática de Viagens ---")
+    alocacoes = plano['alocacoes']
+    if not alocacoes:
+        print("Nenhuma viagem informada.")
+        return
+
+    print(f"{'#':<4} | {'DESTINO':<15} | {'KM':>7} | {'PLACA':<10} | {'CPF MOTORISTA':<15} | {'KM PROJ.':>10}")
+    print("-" * 77)
+    for a in alocacoes:
+        if a['erro']:
+            print(f"{a['indice'] + 1:<4} | {str(a['destino']):<15} | ERRO: {a['erro']}")
+        else:
+            print(f"{a['indice'] + 1:<4} | {a['destino']:<15} | {a['distancia']:>7.1f} | {a['placa']:<10} | "
+                  f"{a['cpf']:<15} | {a['km_projetada']:>10.1f}")
+    for tipo, diferenca in plano['desequilibrio_km'].items():
+        print(f"Diferença de KM entre {tipo}s ativos após a alocação: {diferenca:.1f}")
+
+def exibir_agenda_revisoes(vencidas: List[Dict], proximas: List[Dict]):
+    print("\n--- Agenda de Revisões Preventivas ---")
+    print(f"Revisões vencidas: {len(vencidas)}")
+    if not proximas:
+        print("Nenhum veículo cadastrado.")
+        return
+
+    print(f"{'PLACA':<10} | {'MODELO':<15} | {'STATUS':<15} | {'KM ATUAL':>10} | {'REVISÃO EM':>10} | {'FALTAM':>9}")
+    print("-" * 84)
+    for d in vencidas + [p for p in proximas if p['km_restantes'] > 0]:
+        faltam = f"{d['km_restantes']:>9.0f}" if d['km_restantes'] > 0 else f"{'VENCIDA':>9}"
+        print(f"{d['placa']:<10} | {d['modelo']:<15} | {d['status']:<15} | {d['quilometragem']:>10.0f} | "
+              f"{d['km_proxima_revisao']:>10.0f} | {faltam}")